@@ -0,0 +1,49 @@
+# src/kronoterm_voice_actions/benchmark/match_transcripts.py
+"""
+Matches a file of logged transcripts (one per line) against the command templates in one batch and writes
+the action, parameter and score of every transcript as CSV.
+
+    python -m kronoterm_voice_actions.benchmark.match_transcripts transcripts.txt [--cutoff 0.65] [--scorer NAME]
+        [--output results.csv]
+"""
+
+import argparse
+import csv
+import math
+import sys
+import time
+
+from kronoterm_voice_actions.wyoming.matcher import CommandIndex
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.scorer import get_scorer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("transcripts", type=argparse.FileType("r", encoding="utf-8"), help="'-' reads stdin")
+    parser.add_argument("--cutoff", type=float, default=0.65)
+    parser.add_argument("--scorer", default=None, help="difflib or rapidfuzz, rapidfuzz when installed by default")
+    parser.add_argument("--output", type=argparse.FileType("w", encoding="utf-8"), default=sys.stdout)
+    args = parser.parse_args()
+
+    texts = [line.strip() for line in args.transcripts if line.strip()]
+    index = CommandIndex(MqttClient.command_grammar, cutoff=args.cutoff, scorer=get_scorer(args.scorer))
+
+    start = time.perf_counter()
+    result = index.match_batch(texts)
+    elapsed = time.perf_counter() - start
+
+    writer = csv.writer(args.output)
+    writer.writerow(["text", "action", "parameter", "score"])
+    for text, action, parameter, score in zip(texts, result.actions, result.parameters, result.scores):
+        writer.writerow([text, action or "", "" if math.isnan(parameter) else parameter, f"{score:.4f}"])
+
+    matched = sum(action is not None for action in result.actions)
+    print(
+        f"{matched}/{len(texts)} transcripts matched with {index.scorer.name} in {elapsed:.3f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
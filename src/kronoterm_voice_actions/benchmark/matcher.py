@@ -0,0 +1,297 @@
+# src/kronoterm_voice_actions/benchmark/matcher.py
+"""
+Latency, throughput and accuracy of every matcher stage on the transcript corpus, compared with the stored baseline.
+
+    python -m kronoterm_voice_actions.benchmark.matcher [--repeat N] [--check] [--update-baseline]
+    python -m kronoterm_voice_actions.benchmark.matcher --write-corpus
+
+Stages:
+    numerals  prepare_text, the numeral rewriting and temperature extraction
+    scoring   slot resolution and CommandIndex.best_template on the prepared text
+    match     CommandIndex.match with an empty cache, the whole pipeline
+    cached    CommandIndex.match answered from the cache
+    batch     CommandIndex.match_batch over the whole corpus, reported per utterance
+
+With --check the exit status is 1 if any stage is less accurate than the baseline or its p95 latency grew by more
+than --latency-tolerance times.
+"""
+
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from kronoterm_voice_actions.wyoming.matcher import (
+    CommandIndex,
+    normalize_text,
+    prepare_text,
+)
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.scorer import DIFFLIB, RAPIDFUZZ
+
+CORPUS_PATH = Path(__file__).with_name("corpus.tsv")
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Spoken temperatures as Whisper transcribes them, with their values
+TEMPERATURES = [
+    ("dvaindvajset", 22.0),
+    ("petinštirideset", 45.0),
+    ("enaindvajset celih pet", 21.5),
+    ("devetnajst", 19.0),
+    ("50", 50.0),
+]
+FILLERS = ["prosim", "hej", "a lahko", "zdaj", "hvala"]
+LETTERS = "abcčdefghijklmnoprsštuvzž"
+
+
+@dataclass(frozen=True)
+class Sample:
+    text: str
+    handler: str
+    parameter: float | None
+    kind: str
+
+
+@dataclass(frozen=True)
+class StageResult:
+    p50: float
+    p95: float
+    p99: float
+    throughput: float
+    accuracy: float | None
+
+
+def handler_names() -> dict[str, str]:
+    """Label of the handler call every template dispatches to, e.g. get_loop_temp(2)."""
+    return {template: command.label for template, command in MqttClient.map_template_to_function.items()}
+
+
+def add_noise(text: str, rng: random.Random) -> str:
+    """Introduces one to five character errors and sometimes a filler word, leaving the placeholder intact."""
+    chars = list(text.replace("<temperature>", "#"))
+    for _ in range(rng.randint(1, 5)):
+        i = rng.choice([i for i, char in enumerate(chars) if char.isalpha()])
+        edit = rng.choice(("substitute", "delete", "insert"))
+        if edit == "substitute":
+            chars[i] = rng.choice(LETTERS)
+        elif edit == "delete":
+            del chars[i]
+        else:
+            chars.insert(i, rng.choice(LETTERS))
+
+    text = "".join(chars).replace("#", "<temperature>")
+    if rng.random() < 0.3:
+        filler = rng.choice(FILLERS)
+        text = f"{filler} {text}" if rng.random() < 0.5 else f"{text} {filler}"
+
+    return text
+
+
+def generate_corpus(seed: int = 2025, noisy_per_clean: int = 2) -> list[Sample]:
+    """
+    Clean transcripts are the templates with spoken temperatures filled in, every clean transcript gets noisy
+    variants with character errors and filler words.
+    """
+    rng = random.Random(seed)
+    samples = []
+    for template, handler in handler_names().items():
+        temperatures = TEMPERATURES if "<temperature>" in template else [(None, None)]
+        for spoken, value in temperatures:
+            variants = [(template, "clean")]
+            variants += [(add_noise(template, rng), "noisy") for _ in range(noisy_per_clean)]
+            for text, kind in variants:
+                if spoken is not None:
+                    text = text.replace("<temperature>", spoken)
+                samples.append(Sample(text, handler, value, kind))
+
+    return samples
+
+
+def write_corpus(samples: list[Sample], path: Path = CORPUS_PATH):
+    with path.open("w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file, delimiter="\t", lineterminator="\n")
+        writer.writerow(["text", "handler", "parameter", "kind"])
+        for sample in samples:
+            writer.writerow([sample.text, sample.handler, "" if sample.parameter is None else sample.parameter, sample.kind])
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> list[Sample]:
+    with path.open(encoding="utf-8", newline="") as file:
+        return [
+            Sample(row["text"], row["handler"], float(row["parameter"]) if row["parameter"] else None, row["kind"])
+            for row in csv.DictReader(file, delimiter="\t")
+        ]
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def summarize(latencies: list[float], accuracy: float | None) -> StageResult:
+    """Latencies are given in seconds, percentiles are reported in microseconds."""
+    ordered = sorted(latencies)
+    return StageResult(
+        p50=percentile(ordered, 0.50) * 1e6,
+        p95=percentile(ordered, 0.95) * 1e6,
+        p99=percentile(ordered, 0.99) * 1e6,
+        throughput=len(latencies) / sum(latencies),
+        accuracy=accuracy,
+    )
+
+
+def timed(function, *args) -> tuple[object, float]:
+    start = time.perf_counter()
+    try:
+        result = function(*args)
+    except ValueError:
+        result = None
+    return result, time.perf_counter() - start
+
+
+def score(index: CommandIndex, text: str) -> str | None:
+    """The scoring stage, returns the concrete template."""
+    skeleton_text, slot_values = index.resolve_slots(text)
+    match = index.best_template(skeleton_text)
+    if match is None:
+        return None
+    return index.expand(match[0], slot_values, text)
+
+
+def is_correct(sample: Sample, match: tuple[str, float | None] | None, handlers: dict[str, str]) -> bool:
+    if match is None:
+        return False
+    return handlers[match[0]] == sample.handler and match[1] == sample.parameter
+
+
+def evaluate(samples: list[Sample], backend, repeat: int = 1) -> dict[str, StageResult]:
+    """Runs every stage over the corpus `repeat` times. Accuracy is taken from the first round."""
+    handlers = handler_names()
+    index = CommandIndex(MqttClient.command_grammar, scorer=backend)
+    texts = [normalize_text(sample.text) for sample in samples]
+    latencies: dict[str, list[float]] = {stage: [] for stage in ("numerals", "scoring", "match", "cached", "batch")}
+    correct = {"numerals": 0, "scoring": 0, "match": 0}
+    temperature_samples = sum(sample.parameter is not None for sample in samples)
+
+    index.match_batch(texts)  # builds the numeral lexicon outside the measurement
+
+    for round_number in range(repeat):
+        first = round_number == 0
+        for sample, text in zip(samples, texts):
+            prepared, elapsed = timed(prepare_text, text, backend)
+            latencies["numerals"].append(elapsed)
+            if prepared is not None:
+                if first and sample.parameter is not None and prepared[1] is not None:
+                    correct["numerals"] += float(prepared[1]) == sample.parameter
+                template, elapsed = timed(score, index, normalize_text(prepared[0]))
+                latencies["scoring"].append(elapsed)
+                if first and template is not None:
+                    correct["scoring"] += handlers[template] == sample.handler
+
+            index.cache.clear()
+            match, elapsed = timed(index.match, text)
+            latencies["match"].append(elapsed)
+            if first:
+                correct["match"] += is_correct(sample, match, handlers)
+
+            _, elapsed = timed(index.match, text)
+            latencies["cached"].append(elapsed)
+
+        start = time.perf_counter()
+        index.match_batch(texts)
+        latencies["batch"].extend([(time.perf_counter() - start) / len(texts)] * len(texts))
+
+    accuracy = {
+        "numerals": correct["numerals"] / temperature_samples if temperature_samples else None,
+        "scoring": correct["scoring"] / len(samples),
+        "match": correct["match"] / len(samples),
+        "cached": correct["match"] / len(samples),
+        "batch": None,
+    }
+    return {stage: summarize(values, accuracy[stage]) for stage, values in latencies.items()}
+
+
+def compare(
+    results: dict[str, StageResult], baseline: dict[str, dict[str, float]], latency_tolerance: float
+) -> list[str]:
+    """Returns a description of every regression against the baseline of one scorer."""
+    regressions = []
+    for stage, result in results.items():
+        expected = baseline.get(stage)
+        if expected is None:
+            continue
+
+        if result.accuracy is not None and expected.get("accuracy") is not None:
+            if result.accuracy < expected["accuracy"] - 1e-9:
+                regressions.append(f"{stage}: accuracy {result.accuracy:.4f} < baseline {expected['accuracy']:.4f}")
+
+        if result.p95 > expected["p95"] * latency_tolerance:
+            regressions.append(
+                f"{stage}: p95 {result.p95:.1f}us > {latency_tolerance:g} x baseline {expected['p95']:.1f}us"
+            )
+
+    return regressions
+
+
+def print_results(name: str, results: dict[str, StageResult]):
+    print(f"{name}")
+    print(f"  {'stage':<9} {'p50':>10} {'p95':>10} {'p99':>10} {'per second':>11} {'accuracy':>9}")
+    for stage, result in results.items():
+        accuracy = "" if result.accuracy is None else f"{result.accuracy:.2%}"
+        print(f"  {stage:<9} {result.p50:>8.1f}us {result.p95:>8.1f}us {result.p99:>8.1f}us "
+              f"{result.throughput:>11.0f} {accuracy:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", action="store_true", help="exit with status 1 on a regression")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--latency-tolerance", type=float, default=3.0)
+    parser.add_argument("--write-corpus", action="store_true", help="regenerate the corpus from the templates")
+    args = parser.parse_args()
+
+    if args.write_corpus:
+        samples = generate_corpus()
+        write_corpus(samples)
+        print(f"Wrote {len(samples)} transcripts to {CORPUS_PATH}")
+        return
+
+    samples = load_corpus()
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8")) if BASELINE_PATH.exists() else {}
+    print(f"{len(samples)} transcripts, {sum(sample.kind == 'noisy' for sample in samples)} noisy")
+
+    regressions = []
+    for backend in (DIFFLIB, RAPIDFUZZ):
+        if backend is None:
+            continue
+
+        results = evaluate(samples, backend, args.repeat)
+        print_results(backend.name, results)
+        if args.update_baseline:
+            baseline[backend.name] = {
+                stage: {key: value if key == "accuracy" else round(value, 1) for key, value in asdict(result).items()}
+                for stage, result in results.items()
+            }
+        elif backend.name in baseline:
+            regressions += [
+                f"{backend.name} {regression}"
+                for regression in compare(results, baseline[backend.name], args.latency_tolerance)
+            ]
+
+    if args.update_baseline:
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+        print(f"Updated {BASELINE_PATH}")
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# src/kronoterm_voice_actions/benchmark/numerals.py
+"""
+Compares the single-pass numeral parser with the multi-pass reference implementation.
+
+    python -m kronoterm_voice_actions.benchmark.numerals [--repeat N]
+"""
+
+import argparse
+import time
+
+from kronoterm_voice_actions.wyoming import matcher, scorer
+
+SENTENCES = [
+    "nastavi temperaturo prostora ena na dvaindvajset stopinj",
+    "nastavi temperaturo prostora dva na endvajst celih pet stopinj",
+    "nastavi na pet in dvajset stopinj",
+    "prosim te nastavi mi temperturo za sanitarno vodo na petinštirideset stopinj",
+    "segrej sanitarno vodo na 50 stopinj",
+    "nastavi želeno temperaturo prostora tretjega kroga na devetnajst cela pet stopinj",
+]
+
+
+def measure(function, backend, repeat: int, cold: bool) -> float:
+    """Average time of one call in microseconds."""
+    elapsed = 0.0
+    for _ in range(repeat):
+        for sentence in SENTENCES:
+            if cold:
+                matcher.classify_word.cache_clear()
+            start = time.perf_counter()
+            function(sentence, backend)
+            elapsed += time.perf_counter() - start
+
+    return elapsed / (repeat * len(SENTENCES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    backends = [backend for backend in (scorer.DIFFLIB, scorer.RAPIDFUZZ) if backend is not None]
+    print(f"{'scorer':<10} {'multi-pass':>12} {'single-pass':>12} {'(cold)':>12} {'speedup':>9}")
+    for backend in backends:
+        matcher.get_lexicon(backend)
+        multipass = measure(matcher.replace_numbers_with_digits_multipass, backend, args.repeat, cold=False)
+        single_cold = measure(matcher.replace_numbers_with_digits, backend, args.repeat, cold=True)
+        single = measure(matcher.replace_numbers_with_digits, backend, args.repeat, cold=False)
+        print(f"{backend.name:<10} {multipass:>10.1f}us {single:>10.1f}us {single_cold:>10.1f}us "
+              f"{multipass / single:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
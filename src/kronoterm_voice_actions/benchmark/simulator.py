@@ -0,0 +1,305 @@
+# src/kronoterm_voice_actions/benchmark/simulator.py
+"""
+Simulated Kronoterm heat pump, a pymodbus server speaking Modbus RTU over TCP.
+
+    python -m kronoterm_voice_actions.benchmark.simulator [--port 5020] [--latency S] [--jitter S]
+                                                          [--error-rate P] [--drop-rate P] [--seed N]
+
+Point ModbusConnection at socket://127.0.0.1:5020, pyserial then carries the RTU frames over TCP, so the same
+serial client code runs as with /dev/ttyUSB0. Every RegisterAddress holds a realistic value, writes to setpoints are
+clamped to the range the unit accepts and update the registers that follow from them, like the real unit does.
+Latency and jitter delay every request, the error rate answers with a "device busy" exception and the drop rate
+leaves requests unanswered so the client times out.
+"""
+
+import argparse
+import asyncio
+import random
+from typing import Self
+
+from pymodbus import FramerType
+from pymodbus.constants import ExcCodes
+from pymodbus.exceptions import NoSuchIdException
+from pymodbus.server import ModbusTcpServer
+from pymodbus.simulator import DataType, SimData, SimDevice
+
+from kronoterm_voice_actions.wyoming.const import MODBUS_SLAVE_ID
+from kronoterm_voice_actions.wyoming.kronoterm_models import (
+    HEATING_LOOPS,
+    RegisterAddress,
+)
+from kronoterm_voice_actions.wyoming.register_codec import REGISTER_SPECS
+
+A = RegisterAddress
+
+# Raw register values of a unit heating on a mild winter day, loops 3 and 4 switched off
+INITIAL_VALUES: dict[RegisterAddress, int] = {
+    A.SYSTEM_STATUS: 1,
+    A.OPERATING_MODE: 0,
+    A.OPERATING_REGIME: 1,
+    A.PROGRAM_MODE: 0,
+    A.SYSTEM_ON: 1,
+    A.PROGRAM_SELECT: 0,
+    A.DHW_TARGET_TEMP: 480,
+    A.DHW_CURRENT_TARGET_TEMP: 480,
+    A.DHW_MODE_SELECT: 1,
+    A.DHW_SCHEDULE_STATUS: 1,
+    A.LOOP_1_MODE_SELECT: 1,
+    A.LOOP_1_SCHEDULE_STATUS: 1,
+    A.LOOP_1_TARGET_ROOM_TEMP: 215,
+    A.LOOP_1_CURRENT_TARGET_ROOM_TEMP: 215,
+    A.LOOP_2_MODE_SELECT: 2,
+    A.LOOP_2_SCHEDULE_STATUS: 2,
+    A.LOOP_2_TARGET_ROOM_TEMP: 210,
+    A.LOOP_2_CURRENT_TARGET_ROOM_TEMP: 200,
+    A.LOOP_3_ROOM_TARGET_TEMP: 200,
+    A.LOOP_3_TARGET_ROOM_TEMP: 5000,
+    A.LOOP_4_ROOM_TARGET_TEMP: 200,
+    A.LOOP_4_TARGET_ROOM_TEMP: 5000,
+    A.HP_INLET_TEMP: 302,
+    A.DHW_TEMP: 465,
+    A.OUTSIDE_TEMP: 52,
+    A.HP_OUTLET_TEMP: 345,
+    A.EVAPORATING_TEMP: -31,
+    A.COMPRESSOR_TEMP: 612,
+    A.LOOP_1_TEMP_SENSOR: 321,
+    A.LOOP_2_TEMP_SENSOR: 298,
+    A.LOOP_1_CURRENT_TARGET_TEMP: 330,
+    A.CURRENT_ELECTRIC_POWER: 1100,
+    A.LOOP_1_THERMOSTAT_SETPOINT: 215,
+    A.LOOP_2_THERMOSTAT_SETPOINT: 210,
+    A.BUFFER_CURVE_POINT1: 350,
+    A.LOOP_1_CURVE_POINT1: 350,
+    A.LOOP_2_CURVE_POINT1: 320,
+    A.BUFFER_CURVE_POINT2: 250,
+    A.LOOP_1_CURVE_POINT2: 250,
+    A.LOOP_2_CURVE_POINT2: 240,
+    A.THERMAL_DISINF_TEMP_SET: 650,
+    A.THERMAL_DISINF_PERIOD: 7,
+    A.THERMAL_DISINF_START_MIN: 120,
+    A.COMPRESSOR_STATUS: 0b1,
+    A.HEAT_SYSTEM_PRESSURE_SETPOINT: 12,
+    A.HEAT_SYSTEM_PRESSURE: 15,
+    A.CURRENT_HP_LOAD: 45,
+    A.CURRENT_POWER_CONSUMPTION: 4200,
+    A.ENERGY_ELECTRIC_LOW: 10532,
+    A.ENERGY_HEAT_LOW: 41377,
+    A.COP: 382,
+    A.SCOP: 412,
+}
+
+# Setpoint ranges in °C, writes outside them are clamped
+SETPOINT_LIMITS: dict[RegisterAddress, tuple[float, float]] = {
+    A.DHW_TARGET_TEMP: (10.0, 60.0),
+    **{loop.target_room_temp: (10.0, 30.0) for loop in HEATING_LOOPS.values()},
+}
+
+# Enum settings, writes outside them are clamped
+SELECT_LIMITS: dict[RegisterAddress, tuple[int, int]] = {
+    A.PROGRAM_SELECT: (0, 2),
+    A.DHW_MODE_SELECT: (0, 2),
+    **{loop.mode_select: (0, 2) for loop in HEATING_LOOPS.values()},
+}
+
+# Registers the heat pump answers for, unknown ones in between read as 0
+ADDRESS_RANGE = range(2000, 2400)
+
+OFF_SETPOINT = 5000
+
+
+class KronotermSimulator:
+    """
+    Register map of a simulated heat pump, served by a pymodbus TCP server with RTU framing.
+    The map is held here and handed to pymodbus through the action of its SimDevice, which pymodbus calls with the
+    request address, the register address minus one. Requests to other device ids go unanswered, like on the bus.
+    """
+
+    def __init__(
+        self,
+        values: dict[RegisterAddress, int] | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        seed: int | None = None,
+        slave: int = MODBUS_SLAVE_ID,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.slave = slave
+        self.reads = 0
+        self.writes = 0
+        self.errors = 0
+        self.dropped = 0
+        self._random = random.Random(seed)
+        self._registers = dict.fromkeys(ADDRESS_RANGE, 0)
+        for address, value in (INITIAL_VALUES if values is None else values).items():
+            self._registers[address.to_int()] = value & 0xFFFF
+        self._server: ModbusTcpServer | None = None
+
+    def __getitem__(self, address: RegisterAddress) -> int:
+        """The decoded register value."""
+        return REGISTER_SPECS[address].from_word(self._registers[address.to_int()])
+
+    def __setitem__(self, address: RegisterAddress, value: int):
+        """Sets a register directly, without clamping or side effects."""
+        self._registers[address.to_int()] = value & 0xFFFF
+
+    @property
+    def url(self) -> str:
+        """The pyserial URL to give ModbusConnection as its port."""
+        if self._server is None:
+            raise RuntimeError("The simulator is not running")
+        host, port = self._server.transport.sockets[0].getsockname()[:2]
+        return f"socket://{host}:{port}"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Starts serving, port 0 picks a free port. Returns the URL to connect to."""
+        first = ADDRESS_RANGE.start - 1
+        devices = [
+            SimDevice(
+                self.slave,
+                simdata=SimData(first, count=len(ADDRESS_RANGE), datatype=DataType.REGISTERS),
+                action=self._action,
+            ),
+            # Device id 0 stands for every other id, its action leaves any request unanswered
+            SimDevice(0, simdata=SimData(0, count=0x10000, datatype=DataType.REGISTERS), action=self._no_device),
+        ]
+        self._server = ModbusTcpServer(devices, framer=FramerType.RTU, address=(host, port), ignore_missing_devices=True)
+        await self._server.serve_forever(background=True)
+        return self.url
+
+    async def stop(self):
+        if self._server is not None:
+            await self._server.shutdown()
+            self._server = None
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def _answer(self) -> ExcCodes | None:
+        """Delays the answer and decides on injected faults."""
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self._random.random() < self.drop_rate:
+            self.dropped += 1
+            # With ignore_missing_devices the server sends no response
+            raise NoSuchIdException("Dropped request")
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            return ExcCodes.DEVICE_BUSY
+        return None
+
+    async def _action(
+        self,
+        function_code: int,
+        start_address: int,
+        address: int,
+        count: int,
+        current_registers: list[int],
+        set_values: list[int] | None,
+    ) -> ExcCodes | None:
+        """
+        Answers from the register map. Reads copy it into the registers pymodbus responds with, writes are applied
+        to it and replaced with the words the unit keeps. Function code 6 reads the written register back, that is
+        part of the write.
+        """
+        if function_code == 3:
+            self.reads += 1
+        elif set_values is not None:
+            self.writes += 1
+        if (function_code == 3 or set_values is not None) and (fault := await self._answer()):
+            return fault
+
+        registers = range(address + 1, address + 1 + count)
+        if set_values is not None:
+            for register, word in zip(registers, set_values):
+                self._write(register, word)
+            set_values[:] = [self._registers[register] for register in registers]
+        else:
+            offset = address - start_address
+            current_registers[offset:offset + count] = [self._registers[register] for register in registers]
+        return None
+
+    async def _no_device(self, *request) -> ExcCodes | None:
+        raise NoSuchIdException("No such device")
+
+    def _write(self, register: int, word: int):
+        try:
+            address = RegisterAddress(register)
+        except ValueError:
+            self._registers[register] = word
+            return
+
+        spec = REGISTER_SPECS[address]
+        value = spec.from_word(word)
+        if address in SETPOINT_LIMITS:
+            low, high = SETPOINT_LIMITS[address]
+            value = spec.from_word(spec.to_word(min(max(spec.scaled(value), low), high)))
+        elif address in SELECT_LIMITS:
+            low, high = SELECT_LIMITS[address]
+            value = min(max(value, low), high)
+
+        self[address] = value
+        self._follow(address, value)
+
+    def _follow(self, address: RegisterAddress, value: int):
+        """Updates the status registers that follow from a written setting."""
+        match address:
+            case A.SYSTEM_ON:
+                self[A.SYSTEM_STATUS] = value
+            case A.PROGRAM_SELECT:
+                self[A.PROGRAM_MODE] = value
+            case A.DHW_QUICK_HEAT_ENABLE:
+                self[A.DHW_QUICK_HEAT] = value
+            case A.DHW_TARGET_TEMP | A.DHW_MODE_SELECT:
+                mode = self[A.DHW_MODE_SELECT]
+                self[A.DHW_SCHEDULE_STATUS] = min(mode, 1)
+                self[A.DHW_CURRENT_TARGET_TEMP] = self[A.DHW_TARGET_TEMP] if mode else OFF_SETPOINT
+
+        for loop in HEATING_LOOPS.values():
+            if address in (loop.mode_select, loop.target_room_temp):
+                mode = self[loop.mode_select]
+                self[loop.schedule_status] = mode
+                self[loop.current_target_room_temp] = self[loop.target_room_temp] if mode else OFF_SETPOINT
+
+
+async def serve(args: argparse.Namespace):
+    simulator = KronotermSimulator(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, drop_rate=args.drop_rate, seed=args.seed
+    )
+    url = await simulator.start(args.host, args.port)
+    print(f"Simulated Kronoterm heat pump (device {simulator.slave}) at {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many more seconds, uniformly")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with an exception")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of requests left unanswered")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
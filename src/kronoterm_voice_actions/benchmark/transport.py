@@ -0,0 +1,100 @@
+# src/kronoterm_voice_actions/benchmark/transport.py
+"""
+Latency of reading the heat pump over the real Modbus transport, against the simulator.
+
+    python -m kronoterm_voice_actions.benchmark.transport [--repeat N] [--latency S] [--jitter S] [--error-rate P]
+
+Scenarios, each with the blocking client in a worker thread and with the asyncio client:
+    register  every register of the snapshot blocks read one request at a time
+    snapshot  MqttClient.read_snapshot, one request per register block
+    voice     a read handler while the coordinator polls the snapshot in the background
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from kronoterm_voice_actions.benchmark.simulator import KronotermSimulator
+from kronoterm_voice_actions.wyoming.bus_scheduler import Priority
+from kronoterm_voice_actions.wyoming.const import MODBUS_SLAVE_ID
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+from kronoterm_voice_actions.wyoming.modbus_connection import (
+    ModbusConnection,
+    ModbusConnectionError,
+)
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.register_snapshot import REGISTER_BLOCKS
+
+
+async def read_registers(client: MqttClient):
+    for block in REGISTER_BLOCKS:
+        for address in range(block.start, block.end):
+            await client.connection.read_holding_registers(address - 1, count=1, slave=MODBUS_SLAVE_ID)
+
+
+async def read_snapshot(client: MqttClient):
+    await client.read_snapshot()
+
+
+async def read_during_poll(client: MqttClient):
+    client.cache.clear()
+    poll = asyncio.create_task(client.read_snapshot(priority=Priority.POLL))
+    await asyncio.sleep(0)
+    await client.read(RegisterAddress.OUTSIDE_TEMP, "outside temperature")
+    await poll
+
+
+SCENARIOS = {"register": read_registers, "snapshot": read_snapshot, "voice": read_during_poll}
+
+
+async def measure(simulator: KronotermSimulator, use_async: bool, repeat: int) -> dict[str, list[float]]:
+    connection = ModbusConnection(simulator.url, use_async=use_async, timeout=1.0)
+    client = MqttClient(connection=connection)
+    timings = {name: [] for name in SCENARIOS}
+    try:
+        for name, scenario in SCENARIOS.items():
+            for _ in range(repeat):
+                started = time.perf_counter()
+                try:
+                    await scenario(client)
+                except ModbusConnectionError:
+                    continue
+                timings[name].append((time.perf_counter() - started) * 1000)
+    finally:
+        connection.close()
+    return timings
+
+
+def print_results(transport: str, timings: dict[str, list[float]]):
+    for name, samples in timings.items():
+        if not samples:
+            print(f"{transport:<7} {name:<9} all requests failed")
+            continue
+        print(
+            f"{transport:<7} {name:<9} median {statistics.median(samples):8.2f} ms"
+            f"  max {max(samples):8.2f} ms  ({len(samples)} runs)"
+        )
+
+
+async def run(args: argparse.Namespace):
+    async with KronotermSimulator(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed
+    ) as simulator:
+        for transport, use_async in (("thread", False), ("asyncio", True)):
+            print_results(transport, await measure(simulator, use_async, args.repeat))
+        print(f"simulator: {simulator.reads} reads, {simulator.writes} writes, {simulator.errors} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds the simulator takes per request")
+    parser.add_argument("--jitter", type=float, default=0.002)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
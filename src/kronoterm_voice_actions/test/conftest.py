@@ -0,0 +1,73 @@
+# src/kronoterm_voice_actions/test/conftest.py
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+from homeassistant.core import HomeAssistant
+
+from kronoterm_voice_actions.benchmark.simulator import KronotermSimulator
+from kronoterm_voice_actions.test.test_register_snapshot import block_response
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+
+try:
+    import pytest_socket
+except ImportError:  # pytest-socket comes with the Home Assistant test plugin
+    pytest_socket = None
+
+
+def bus(function, address, count=None, value=None, slave=None):
+    """Answers block reads like test_register_snapshot and accepts writes."""
+    if count is None:
+        return MagicMock()
+    return block_response(function, address, count, slave)
+
+
+@pytest_asyncio.fixture
+async def hass(tmp_path):
+    hass = HomeAssistant(str(tmp_path))
+    yield hass
+    await hass.async_stop(force=True)
+
+
+@pytest.fixture
+def to_thread():
+    with (
+        patch('kronoterm_voice_actions.wyoming.modbus_connection.pymodbus.client.ModbusSerialClient'),
+        patch('asyncio.to_thread', new_callable=AsyncMock) as mock_to_thread,
+    ):
+        mock_to_thread.side_effect = bus
+        yield mock_to_thread
+
+
+@pytest.fixture
+def MockModbusClient():
+    with patch('kronoterm_voice_actions.wyoming.modbus_connection.pymodbus.client.ModbusSerialClient') as mock_class:
+        yield mock_class
+
+
+@pytest_asyncio.fixture
+async def client(MockModbusClient):
+    """A client on the mocked serial port, closed after the test so its idle timer does not outlive it."""
+    client = MqttClient(usb_port=0)
+    yield client
+    client.connection.close()
+
+
+@pytest.fixture
+def loopback_sockets():
+    """Lets the test open sockets to 127.0.0.1, which pytest-socket blocks under the Home Assistant test plugin."""
+    if pytest_socket is None:
+        yield
+        return
+    pytest_socket.enable_socket()
+    pytest_socket.socket_allow_hosts(["127.0.0.1"])
+    yield
+    pytest_socket.disable_socket(allow_unix_socket=True)
+
+
+@pytest_asyncio.fixture
+async def simulator(loopback_sockets):
+    """A simulated heat pump served on the loopback interface."""
+    async with KronotermSimulator(seed=0) as simulator:
+        yield simulator
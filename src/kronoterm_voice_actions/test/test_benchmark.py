@@ -0,0 +1,39 @@
+# src/kronoterm_voice_actions/test/test_benchmark.py
+
+import json
+
+import pytest
+
+from kronoterm_voice_actions.benchmark import matcher as benchmark
+from kronoterm_voice_actions.wyoming import scorer
+
+backends = [scorer.DIFFLIB]
+if scorer.RAPIDFUZZ is not None:
+    backends.append(scorer.RAPIDFUZZ)
+
+
+def test_corpus_covers_every_handler():
+    samples = benchmark.load_corpus()
+    assert {sample.handler for sample in samples} == set(benchmark.handler_names().values())
+    assert {sample.kind for sample in samples} == {"clean", "noisy"}
+
+
+def test_corpus_is_reproducible():
+    assert benchmark.generate_corpus() == benchmark.load_corpus()
+
+
+@pytest.mark.parametrize("backend", backends, ids=lambda backend: backend.name)
+def test_accuracy_does_not_regress(backend):
+    baseline = json.loads(benchmark.BASELINE_PATH.read_text(encoding="utf-8"))[backend.name]
+    results = benchmark.evaluate(benchmark.load_corpus(), backend)
+
+    # Latency depends on the machine, it is checked by the benchmark job instead
+    regressions = benchmark.compare(results, baseline, latency_tolerance=float("inf"))
+    assert not regressions
+
+
+def test_compare_reports_regressions():
+    result = benchmark.StageResult(p50=10.0, p95=40.0, p99=50.0, throughput=1000.0, accuracy=0.9)
+    baseline = {"match": {"p50": 10.0, "p95": 10.0, "p99": 20.0, "throughput": 1000.0, "accuracy": 0.95}}
+    regressions = benchmark.compare({"match": result}, baseline, latency_tolerance=3.0)
+    assert len(regressions) == 2
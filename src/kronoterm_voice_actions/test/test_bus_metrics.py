@@ -0,0 +1,128 @@
+# src/kronoterm_voice_actions/test/test_bus_metrics.py
+
+from unittest.mock import MagicMock
+
+import pytest
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+from kronoterm_voice_actions.wyoming.bus_metrics import (
+    BusMetrics,
+    LatencyHistogram,
+    Outcome,
+    frame_bytes,
+)
+from kronoterm_voice_actions.wyoming.const import DOMAIN
+from kronoterm_voice_actions.wyoming.coordinator import KronotermCoordinator
+from kronoterm_voice_actions.wyoming.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+from kronoterm_voice_actions.wyoming.modbus_connection import (
+    ModbusConnection,
+    ModbusConnectionError,
+)
+from kronoterm_voice_actions.wyoming.models import DomainDataItem
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.register_snapshot import REGISTER_BLOCKS
+from kronoterm_voice_actions.wyoming.sensor import BUS_SENSORS, KronotermBusSensor
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    for seconds in [0.003] * 90 + [0.15] * 9 + [3.0]:
+        histogram.add(seconds)
+
+    assert histogram.count == 100
+    assert histogram.buckets[0] == 90
+    assert histogram.quantile(0.5) == 5
+    assert histogram.quantile(0.95) == 200
+    assert histogram.quantile(1.0) == 3000
+    assert histogram.as_dict()["buckets_ms"][">2000"] == 1
+
+
+def test_frame_bytes():
+    assert frame_bytes("read_holding_registers", {"count": 28}) == (8, 61)
+    assert frame_bytes("write_register", {"value": 1}) == (8, 8)
+    assert frame_bytes("write_registers", {"values": [1, 2, 3]}) == (15, 8)
+
+
+def test_outcome_of_error():
+    assert Outcome.of_error(ModbusIOException("No response received")) is Outcome.TIMEOUT
+    assert Outcome.of_error(ModbusIOException("CRC mismatch")) is Outcome.CRC
+    assert Outcome.of_error(ConnectionException("port gone")) is Outcome.ERROR
+
+
+def test_utilization_window():
+    now = [100.0]
+    metrics = BusMetrics(clock=lambda: now[0])
+    now[0] = 110.0
+    metrics.record_transaction("read_holding_registers", {"count": 1}, 2.0, Outcome.OK)
+    assert metrics.utilization == pytest.approx(0.2)
+
+    now[0] = 1000.0
+    metrics.record_transaction("write_register", {}, 3.0, Outcome.EXCEPTION, exception_code=6)
+    assert metrics.utilization == pytest.approx(0.01)
+    assert metrics.bytes_sent == 16
+    assert metrics.bytes_received == 7 + 5
+    assert metrics.exception_codes == {6: 1}
+    assert metrics.errors == 1
+
+
+@pytest.mark.asyncio
+async def test_transport_is_instrumented(simulator):
+    connection = ModbusConnection(simulator.url, use_async=True, retries=1, timeout=0.2)
+    client = MqttClient(connection=connection)
+
+    await client.read(RegisterAddress.OUTSIDE_TEMP)
+    await client.write(RegisterAddress.SYSTEM_ON, 1)
+    simulator.error_rate = 1.0
+    response = await connection.read_holding_registers(2101, count=1, slave=20)
+    assert response.isError()
+    simulator.error_rate, simulator.drop_rate = 0.0, 1.0
+    with pytest.raises(ModbusConnectionError):
+        await connection.read_holding_registers(2102, count=1, slave=20)
+    connection.close()
+
+    metrics = connection.metrics
+    assert metrics.transactions == 5
+    assert metrics.outcomes[Outcome.OK] == 2
+    assert metrics.outcomes[Outcome.EXCEPTION] == 1
+    assert metrics.outcomes[Outcome.TIMEOUT] == 2
+    assert metrics.exception_codes == {6: 1}
+    assert metrics.retries == 1
+    assert metrics.register_latency[RegisterAddress.OUTSIDE_TEMP].count == 1
+    assert metrics.register_latency[RegisterAddress.SYSTEM_ON].count == 1
+    assert metrics.bytes_sent == 5 * 8
+    assert metrics.bytes_received == 7 + 8 + 5
+
+
+@pytest.mark.asyncio
+async def test_diagnostics_and_sensors(hass, to_thread, client):
+    coordinator = KronotermCoordinator(hass, client)
+    item = DomainDataItem(entry_data={"type": "custom_agent"}, client=client, coordinator=coordinator)
+    hass.data[DOMAIN] = {"entry": item}
+    entry = MagicMock(entry_id="entry", data={"type": "custom_agent", "password": "secret"})
+
+    client.connection.metrics.record_transaction("read_holding_registers", {"count": 28}, 0.04, Outcome.OK)
+    client.connection.metrics.record_transaction("read_holding_registers", {"count": 1}, 0.2, Outcome.TIMEOUT)
+    await coordinator.async_refresh()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["entry_data"]["password"] == "**REDACTED**"
+    # The poll's block reads are counted too
+    assert diagnostics["bus"]["outcomes"] == {
+        "ok": 1 + len(REGISTER_BLOCKS), "timeout": 1, "crc": 0, "exception": 0, "error": 0,
+    }
+    assert diagnostics["scheduler"]["transactions"]["POLL"] == len(REGISTER_BLOCKS)
+    assert diagnostics["coordinator"]["last_update_success"]
+
+    sensors = {
+        description.key: KronotermBusSensor(coordinator, entry, description) for description in BUS_SENSORS
+    }
+    assert sensors["bus_timeouts"].native_value == 1
+    metrics = client.connection.metrics
+    assert sensors["bus_bytes"].native_value == metrics.bytes_sent + metrics.bytes_received
+    assert sensors["bus_latency_p95"].native_value == 200
+    assert sensors["bus_timeouts"].unique_id == "entry-bus_timeouts"
+    assert not sensors["bus_timeouts"].entity_registry_enabled_default
+    await coordinator.async_shutdown()
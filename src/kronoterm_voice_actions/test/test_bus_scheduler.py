@@ -0,0 +1,139 @@
+# src/kronoterm_voice_actions/test/test_bus_scheduler.py
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from kronoterm_voice_actions.wyoming.bus_scheduler import (
+    BusScheduler,
+    BusTicket,
+    Priority,
+)
+from kronoterm_voice_actions.wyoming.modbus_connection import ModbusConnection
+
+pytestmark = pytest.mark.asyncio
+
+
+async def transaction(scheduler: BusScheduler, priority: Priority, name: str, order: list[str], hold: float = 0.0):
+    async with scheduler.slot(priority):
+        order.append(name)
+        await asyncio.sleep(hold)
+
+
+async def test_waiting_transactions_are_served_by_priority():
+    scheduler = BusScheduler(inter_frame_delay=0)
+    order = []
+
+    first = asyncio.create_task(transaction(scheduler, Priority.POLL, "poll 1", order, hold=0.02))
+    await asyncio.sleep(0)
+    tasks = [
+        asyncio.create_task(transaction(scheduler, priority, name, order))
+        for priority, name in [
+            (Priority.POLL, "poll 2"),
+            (Priority.VOICE_READ, "read 1"),
+            (Priority.VOICE_WRITE, "write"),
+            (Priority.VOICE_READ, "read 2"),
+        ]
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.depth == 4
+
+    await asyncio.gather(first, *tasks)
+
+    assert order == ["poll 1", "write", "read 1", "read 2", "poll 2"]
+    assert scheduler.depth == 0
+    assert not scheduler.busy
+
+
+async def test_inter_frame_delay():
+    scheduler = BusScheduler(inter_frame_delay=0.02)
+    started = []
+
+    async def mark():
+        async with scheduler.slot():
+            started.append(time.monotonic())
+
+    await asyncio.gather(mark(), mark(), mark())
+
+    assert started[1] - started[0] >= 0.019
+    assert started[2] - started[1] >= 0.019
+
+
+async def test_cancelled_waiter_is_skipped():
+    scheduler = BusScheduler(inter_frame_delay=0)
+    order = []
+
+    first = asyncio.create_task(transaction(scheduler, Priority.POLL, "first", order, hold=0.01))
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(transaction(scheduler, Priority.VOICE_WRITE, "cancelled", order))
+    waiting = asyncio.create_task(transaction(scheduler, Priority.POLL, "waiting", order))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    await asyncio.gather(first, waiting)
+    assert order == ["first", "waiting"]
+    assert not scheduler.busy
+
+
+async def test_promoted_waiter_is_served_at_its_new_priority():
+    scheduler = BusScheduler(inter_frame_delay=0)
+    order = []
+
+    async def promoted_transaction(ticket: BusTicket):
+        async with scheduler.slot(ticket=ticket):
+            order.append("promoted")
+
+    first = asyncio.create_task(transaction(scheduler, Priority.POLL, "first", order, hold=0.01))
+    await asyncio.sleep(0)
+    poll = asyncio.create_task(transaction(scheduler, Priority.POLL, "poll", order))
+    ticket = BusTicket(Priority.POLL)
+    promoted = asyncio.create_task(promoted_transaction(ticket))
+    read = asyncio.create_task(transaction(scheduler, Priority.VOICE_READ, "read", order))
+    await asyncio.sleep(0)
+    scheduler.promote(ticket, Priority.VOICE_READ)
+    scheduler.promote(ticket, Priority.POLL)
+    assert scheduler.depth == 3
+
+    await asyncio.gather(first, poll, promoted, read)
+    # Within its new priority the promoted transaction queues from the time it was promoted
+    assert order == ["first", "read", "promoted", "poll"]
+    assert scheduler.stats().transactions[Priority.VOICE_READ] == 2
+
+
+async def test_wait_stats():
+    scheduler = BusScheduler(inter_frame_delay=0)
+    order = []
+    await asyncio.gather(
+        transaction(scheduler, Priority.POLL, "poll", order, hold=0.02),
+        transaction(scheduler, Priority.VOICE_READ, "read", order),
+    )
+
+    stats = scheduler.stats()
+    assert stats.transactions[Priority.POLL] == stats.transactions[Priority.VOICE_READ] == 1
+    # The read waited out the held poll, which itself started at once
+    assert stats.max_wait[Priority.VOICE_READ] > max(stats.max_wait[Priority.POLL], 0.01)
+    assert stats.mean_wait(Priority.VOICE_READ) == stats.total_wait[Priority.VOICE_READ]
+    assert stats.mean_wait(Priority.VOICE_WRITE) == 0
+    assert scheduler.last_wait == stats.max_wait[Priority.VOICE_READ]
+
+
+@patch('kronoterm_voice_actions.wyoming.modbus_connection.pymodbus.client.ModbusSerialClient')
+async def test_connection_schedules_calls(MockModbusClient):
+    connection = ModbusConnection("/dev/ttyUSB0", inter_frame_delay=0)
+    calls = []
+
+    def read(name):
+        time.sleep(0.01)
+        calls.append(name)
+
+    await asyncio.gather(
+        connection.call(read, "poll", priority=Priority.POLL),
+        connection.call(read, "poll 2", priority=Priority.POLL),
+        connection.call(read, "write", priority=Priority.VOICE_WRITE),
+    )
+
+    assert calls == ["poll", "write", "poll 2"]
+    assert connection.scheduler.stats().transactions[Priority.POLL] == 2
+    connection.close()
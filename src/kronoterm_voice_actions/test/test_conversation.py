@@ -0,0 +1,82 @@
+# src/kronoterm_voice_actions/test/test_conversation.py
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+
+from kronoterm_voice_actions.wyoming.const import DOMAIN
+from kronoterm_voice_actions.wyoming.conversation import WyomingConversationEntity
+from kronoterm_voice_actions.wyoming.coordinator import KronotermCoordinator
+from kronoterm_voice_actions.wyoming.match_executor import MatchExecutor
+from kronoterm_voice_actions.wyoming.models import DomainDataItem
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def item(hass, to_thread):
+    client = MqttClient(usb_port=0)
+    item = DomainDataItem(
+        entry_data={},
+        client=client,
+        coordinator=KronotermCoordinator(hass, client),
+        match_executor=MatchExecutor(timeout=10.0),
+    )
+    hass.data[DOMAIN] = {"entry": item}
+    yield item
+    await item.async_shutdown()
+
+
+def user_input(text: str, device_id: str | None = None):
+    return MagicMock(text=text, conversation_id="conversation", language="sl", device_id=device_id)
+
+
+async def test_commands_share_the_entry_client(hass, item, to_thread):
+    entity = WyomingConversationEntity(MagicMock(entry_id="entry", title="Kronoterm"), hass)
+
+    with patch('kronoterm_voice_actions.wyoming.conversation.MqttClient') as new_client:
+        first = await entity.async_process(user_input("kakšna je trenutna želena temperatura sanitarne vode"))
+        second = await entity.async_process(user_input("kakšna je temperatura sanitarne vode"))
+
+    new_client.assert_not_called()
+    assert first.response.speech["plain"]["speech"].startswith("Trenutna želena temperatura sanitarne vode")
+    assert second.response.speech["plain"]["speech"].startswith("Trenutna temperatura sanitarne vode")
+    # Registers read for the commands stay cached on the shared client
+    assert len(item.client.cache) > 0
+
+
+async def test_shutdown_closes_the_entry_resources(item):
+    with patch.object(item.client.connection, 'close') as close:
+        await item.async_shutdown()
+
+    close.assert_called_once()
+    assert item.match_executor._executor._shutdown
+
+
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.read_temperature', new_callable=AsyncMock)
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.write_temperature', new_callable=AsyncMock)
+async def test_clamped_setpoint_is_announced_on_the_satellite(mock_write_temp, mock_read_temp, hass, item):
+    mock_write_temp.return_value = 75.0
+    mock_read_temp.return_value = 60.0
+    item.client.optimistic = True
+    item.client.create_background_task = hass.async_create_background_task
+    announcements = []
+
+    async def announce(call):
+        announcements.append((call.data["message"], call.data["device_id"]))
+
+    hass.services.async_register("assist_satellite", "announce", announce)
+    entity = WyomingConversationEntity(MagicMock(entry_id="entry", title="Kronoterm"), hass)
+
+    result = await entity.async_process(
+        user_input("nastavi želeno temperaturo sanitarne vode na petinsedemdeset stopinj", device_id="satellite")
+    )
+    await item.client.wait_for_verifications()
+
+    assert result.response.speech["plain"]["speech"] == "Želena temperatura sanitarne vode nastavljena na 75 stopinj."
+    assert len(announcements) == 1
+    message, device_id = announcements[0]
+    assert "je previsoka" in message
+    assert device_id == "satellite"
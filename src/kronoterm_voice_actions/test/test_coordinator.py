@@ -0,0 +1,96 @@
+# src/kronoterm_voice_actions/test/test_coordinator.py
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+
+from kronoterm_voice_actions.wyoming.coordinator import KronotermCoordinator
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+from kronoterm_voice_actions.wyoming.modbus_connection import ModbusConnectionError
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.register_snapshot import (
+    REGISTER_BLOCKS,
+    RegisterSnapshot,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def coordinator(hass, to_thread):
+    coordinator = KronotermCoordinator(hass, MqttClient(usb_port=0))
+    yield coordinator
+    await coordinator.async_shutdown()
+    coordinator.client.connection.close()
+
+
+async def test_poll_reads_blocks(coordinator, to_thread):
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert to_thread.call_count == len(REGISTER_BLOCKS)
+    assert len(coordinator.data) == len(RegisterAddress)
+    assert coordinator.client.coordinator is coordinator
+
+
+async def test_handlers_answer_from_memory(coordinator, to_thread):
+    await coordinator.async_refresh()
+    to_thread.reset_mock()
+
+    assert await coordinator.client.get_outside_temp() == "Trenutna zunanja temperatura je -5.2 stopinj"
+    assert await coordinator.client.get_program_mode()
+    to_thread.assert_not_called()
+
+
+async def test_stale_snapshot_is_not_used(coordinator, to_thread):
+    coordinator.data = RegisterSnapshot({RegisterAddress.OUTSIDE_TEMP: 100}, taken_at=0.0)
+    assert coordinator.value(RegisterAddress.OUTSIDE_TEMP) is None
+
+    await coordinator.async_ensure_fresh()
+    assert coordinator.value(RegisterAddress.OUTSIDE_TEMP) == -52
+
+    to_thread.reset_mock()
+    await coordinator.async_ensure_fresh()
+    to_thread.assert_not_called()
+
+
+async def test_invalidate_drops_dependents(coordinator):
+    await coordinator.async_refresh()
+    coordinator.async_request_refresh = AsyncMock()
+
+    coordinator.invalidate(RegisterAddress.LOOP_2_MODE_SELECT)
+
+    assert coordinator.value(RegisterAddress.LOOP_2_MODE_SELECT) is None
+    assert coordinator.value(RegisterAddress.LOOP_2_SCHEDULE_STATUS) is None
+    assert coordinator.value(RegisterAddress.OUTSIDE_TEMP) == -52
+    coordinator.async_request_refresh.assert_called_once()
+
+
+async def test_write_refreshes(hass, coordinator, to_thread):
+    await coordinator.async_refresh()
+    to_thread.reset_mock()
+
+    coordinator.client.coordinator = MagicMock(wraps=coordinator)
+    await coordinator.client.set_loop_operating_mode(2, 0)
+    await hass.async_block_till_done()
+
+    coordinator.client.coordinator.invalidate.assert_called_once_with(RegisterAddress.LOOP_2_MODE_SELECT)
+    assert to_thread.call_count == 1 + len(REGISTER_BLOCKS)
+    assert coordinator.value(RegisterAddress.LOOP_2_MODE_SELECT) is not None
+
+
+async def test_failed_poll(coordinator, to_thread):
+    to_thread.side_effect = ModbusConnectionError("no answer")
+    await coordinator.async_refresh()
+
+    assert not coordinator.last_update_success
+    assert coordinator.value(RegisterAddress.OUTSIDE_TEMP) is None
+
+
+async def test_start_polling_schedules_refreshes(coordinator):
+    stop = coordinator.async_start_polling()
+    assert coordinator._unsub_refresh is not None
+
+    stop()
+    assert coordinator._unsub_refresh is None
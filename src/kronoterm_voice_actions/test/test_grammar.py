@@ -0,0 +1,112 @@
+# src/kronoterm_voice_actions/test/test_grammar.py
+
+import pickle
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from kronoterm_voice_actions.test.test_matcher import commands
+from kronoterm_voice_actions.wyoming import matcher
+from kronoterm_voice_actions.wyoming.grammar import LOOP_SLOT, Grammar
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.scorer import get_scorer
+
+grammar = MqttClient.command_grammar
+
+
+def test_grammar_expands_to_every_template():
+    assert set(grammar.commands) == set(commands)
+    assert len(grammar) < len(grammar.commands) / 1.5
+
+
+def test_grammar_commands():
+    command = grammar.commands["nastavi delovanje tretjega ogrevalnega kroga na delovanje po urniku"]
+    assert command.handler is MqttClient.set_loop_operating_mode
+    assert command.args == (3, 2)
+    assert command.label == "set_loop_operating_mode(3, 2)"
+    assert grammar.commands["vklopi sistem"].label == "turn_system_on"
+
+
+def test_duplicate_skeletons_are_rejected():
+    with pytest.raises(ValueError):
+        Grammar({"izklopi krog {loop}": print, "izklopi krog {loop_nom}": print})
+
+
+def test_grammar_is_a_value():
+    copy = pickle.loads(pickle.dumps(grammar))
+    assert copy == grammar
+    assert hash(copy) == hash(grammar)
+
+
+def test_resolve_slots():
+    text, values = grammar.resolve("izklopi ogrevalni krog tri", get_scorer())
+    assert text == f"izklopi ogrevalni krog {LOOP_SLOT.placeholder}"
+    assert values == {"loop": 3}
+
+    text, values = grammar.resolve("izklopi drugga ogrevalni krog", get_scorer())
+    assert values == {"loop": 2}
+
+    assert grammar.resolve("vklopi sistem", get_scorer()) == ("vklopi sistem", {})
+
+
+def test_expand_garbled_slot():
+    skeleton = f"izklopi ogrevalni krog {LOOP_SLOT.placeholder}"
+    assert grammar.expand(skeleton, {"loop": 4}, "", get_scorer()) == "izklopi ogrevalni krog štiri"
+    assert grammar.expand(skeleton, {}, "izklopi ogrevalni krog štrj", get_scorer()) == "izklopi ogrevalni krog štiri"
+
+
+@pytest.mark.parametrize("text, expected, param", [
+    ("vklopi sistem", "vklopi sistem", None),
+    ("izklopi drugi ogrevalni krog", "izklopi drugi ogrevalni krog", None),
+    ("izklopi ogrevalni krog 4", "izklopi ogrevalni krog štiri", None),
+    ("nastavi temperaturo prostora dva na dvaindvajset stopinj", "nastavi temperaturo prostora dva na <temperature> stopinj", 22.0),
+    ("nastavi želeno temperaturo prostora tretjega kroga na 21.5 stopinj",
+     "nastavi želeno temperaturo prostora tretjega kroga na <temperature> stopinj", 21.5),
+    ("vklopi delovanje po urniku na četrtem ogrevalnem krogu", "vklopi delovanje po urniku na četrtem ogrevalnem krogu", None),
+    ("vklopi prvi ogrevalni krog na enaindvajset stopinj", "vklopi prvi ogrevalni krog na <temperature> stopinj", 21.0),
+])
+def test_match_command_with_grammar(text, expected, param):
+    assert matcher.match_command(text, grammar) == (expected, param)
+
+
+def test_grammar_matches_like_templates():
+    flat = matcher.CommandIndex(commands)
+    index = matcher.CommandIndex(grammar)
+    assert len(index) == len(grammar)
+    for command in commands:
+        text = command.replace("<temperature>", "20")
+        assert index.match(text) == flat.match(text)
+
+
+def test_match_batch_with_grammar():
+    texts = ["izklopi ogrevalni krog dva", "nastavi temperaturo prostora štiri na 20 stopinj", "vrabec na strehi"]
+    result = matcher.match_commands(texts, grammar)
+    assert list(result.actions) == [
+        "izklopi ogrevalni krog dva", "nastavi temperaturo prostora štiri na <temperature> stopinj", None
+    ]
+    assert result.parameters[1] == 20.0
+
+
+@pytest.mark.asyncio
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.write', new_callable=AsyncMock)
+async def test_invoke_parameterized_handler(mock_write):
+    client = MqttClient(usb_port=0)
+    response = await client.invoke_kronoterm_action("izklopi tretji ogrevalni krog", None)
+
+    mock_write.assert_called_once_with(RegisterAddress.LOOP_3_MODE_SELECT, 0)
+    assert response == "Tretji ogrevalni krog izklopljen."
+
+
+@pytest.mark.asyncio
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.read_temperature', new_callable=AsyncMock)
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.write_temperature', new_callable=AsyncMock)
+async def test_invoke_parameterized_handler_with_temperature(mock_set_temp, mock_read_temp):
+    mock_set_temp.return_value = mock_read_temp.return_value = 22.0
+    client = MqttClient(usb_port=0)
+    response = await client.invoke_kronoterm_action(
+        "nastavi temperaturo prostora dva na <temperature> stopinj", 22.0
+    )
+
+    mock_set_temp.assert_called_once_with(RegisterAddress.LOOP_2_TARGET_ROOM_TEMP, 22.0)
+    assert "prostora drugega kroga nastavljena na 22 stopinj" in response
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from kronoterm_voice_actions.wyoming import match_executor
+from kronoterm_voice_actions.wyoming.match_executor import (
+    MatchExecutor,
+    MatchTimeoutError,
+)
+from kronoterm_voice_actions.wyoming.matcher import get_lexicon, match_command
+
+pytestmark = pytest.mark.asyncio
+
+COMMANDS = ("vklopi sistem", "izklopi sistem", "nastavi temperaturo sanitarne vode na")
+
+
+async def test_executor_matches_like_match_command():
+    # The first match builds the lexicon, which may take longer than the default deadline on a busy machine
+    executor = MatchExecutor(timeout=10.0)
+    try:
+        for text in ("vklopi sistem", "izklopi sistem", "nastavi temperaturo sanitarne vode na 45 °C"):
+            assert await executor.match(text, COMMANDS) == match_command(text, COMMANDS)
+    finally:
+        executor.shutdown(wait=True)
+
+
+async def test_executor_matches_off_the_event_loop(monkeypatch):
+    loop_thread = threading.get_ident()
+    worker_threads = []
+
+    def recording_match(text, commands, scorer=None):
+        worker_threads.append(threading.get_ident())
+        return match_command(text, commands, scorer)
+
+    monkeypatch.setattr(match_executor, "match_command", recording_match)
+    executor = MatchExecutor()
+    try:
+        await executor.match("vklopi sistem", COMMANDS)
+    finally:
+        executor.shutdown(wait=True)
+
+    assert worker_threads and worker_threads[0] != loop_thread
+
+
+async def test_executor_reports_timing(monkeypatch):
+    def slow_match(text, commands, scorer=None):
+        time.sleep(0.05)
+        return "vklopi sistem", None
+
+    monkeypatch.setattr(match_executor, "match_command", slow_match)
+    executor = MatchExecutor()
+    try:
+        match, timing = await executor.match_timed("vklopi sistem", COMMANDS)
+    finally:
+        executor.shutdown(wait=True)
+
+    assert match == ("vklopi sistem", None)
+    assert timing.compute >= 0.04
+    assert timing.queued >= 0
+    assert timing.total == pytest.approx(timing.queued + timing.compute)
+
+
+async def test_executor_deadline(monkeypatch):
+    released = threading.Event()
+
+    def slow_match(text, commands, scorer=None):
+        released.wait(5.0)
+        return "vklopi sistem", None
+
+    monkeypatch.setattr(match_executor, "match_command", slow_match)
+    executor = MatchExecutor(timeout=0.02)
+    try:
+        with pytest.raises(MatchTimeoutError):
+            await executor.match("vklopi sistem", COMMANDS)
+    finally:
+        # The worker keeps running the timed out request until it returns
+        released.set()
+        executor.shutdown(wait=True)
+
+
+async def test_executor_warm_up():
+    get_lexicon.cache_clear()
+    executor = MatchExecutor()
+    try:
+        await executor.warm_up(COMMANDS)
+    finally:
+        executor.shutdown(wait=True)
+
+    assert get_lexicon.cache_info().currsize == 1
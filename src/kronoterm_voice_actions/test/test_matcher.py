@@ -1,6 +1,9 @@
 # src/kronoterm_voice_actions/test/test_matcher.py
 
-from kronoterm_voice_actions.wyoming import matcher
+import difflib
+
+from kronoterm_voice_actions.wyoming import matcher, scorer
+from kronoterm_voice_actions.wyoming.ngram_index import NgramIndex, char_ngrams
 import pytest
 
 # Manually extracted commands from mqtt_client.py
@@ -72,7 +75,11 @@ commands = [
     "vklopi delovanje po urniku na ogrevalnem krogu štiri",
     "vklopi delovanje po urniku na četrtem ogrevalnem krogu", "kakšen je status delovanja četrtega ogrevalnega kroga",
     "kakšen je status delovanja ogrevalnega kroga štiri", "kakšna je temperatura ogrevalnega kroga štiri",
-    "kakšna je temperatura četrtega ogrevalnega kroga"
+    "kakšna je temperatura četrtega ogrevalnega kroga",
+    "vklopi ogrevalni krog ena na <temperature> stopinj", "vklopi prvi ogrevalni krog na <temperature> stopinj",
+    "vklopi ogrevalni krog dva na <temperature> stopinj", "vklopi drugi ogrevalni krog na <temperature> stopinj",
+    "vklopi ogrevalni krog tri na <temperature> stopinj", "vklopi tretji ogrevalni krog na <temperature> stopinj",
+    "vklopi ogrevalni krog štiri na <temperature> stopinj", "vklopi četrti ogrevalni krog na <temperature> stopinj",
 ]
 
 # Test slovenian_word_to_number_strict
@@ -167,4 +174,147 @@ def test_match_command_botched():
 
     action, param = matcher.match_command("uklopi sstm", commands)
     assert action == "vklopi sistem"
-    assert param is None
\ No newline at end of file
+    assert param is None
+
+# Test CommandIndex
+def test_command_index_matches_difflib():
+    index = matcher.CommandIndex(commands, scorer=scorer.DIFFLIB, shortlist_size=None)
+    for text in ["kšna je tempertura sanitarne oude", "prosim vklopi sistem zdaj", "uklopi sstm",
+                 "kakšen je status delovanja drugega kroga", "vrabec na strehi in kamen v roki"]:
+        expected = difflib.get_close_matches(text, commands, n=1, cutoff=0.65)
+        result = index.best_template(text)
+        assert (result[0] if result else None) == (expected[0] if expected else None)
+
+
+def test_command_index_match():
+    index = matcher.CommandIndex(commands)
+    assert len(index) == len(commands)
+    assert index.match("Vklopi   sistem") == ("vklopi sistem", None)
+
+    action, param = index.match("nastavi temperaturo prostora tri na 19 stopinj")
+    assert action == "nastavi temperaturo prostora tri na <temperature> stopinj"
+    assert param == 19.0
+
+    with pytest.raises(ValueError):
+        index.match("vrabec na strehi in kamen v roki")
+
+
+def test_ngram_index():
+    assert char_ngrams("eco") == {" ec", "eco", "co "}
+
+    index = NgramIndex(["vklopi sistem", "izklopi sistem", "nastavi eco režim"], max_df=1.0)
+    candidates, stats = index.shortlist("uklopi sstm", limit=2)
+    assert candidates == [0, 1]
+    assert stats.candidates == 2 and stats.pruned == 1
+    assert stats.pruned_ratio == 1 / 3
+
+    candidates, _ = index.shortlist("xyz", limit=2)
+    assert candidates == []
+
+
+def test_command_index_shortlist():
+    index = matcher.CommandIndex(commands, scorer=scorer.DIFFLIB, shortlist_size=10)
+    candidates = index.shortlist("kakšna je temperatura sanitarne vode")
+    assert len(candidates) == 10
+    assert commands.index("kakšna je temperatura sanitarne vode") in candidates
+    assert index.last_shortlist.total == len(commands)
+    assert index.last_shortlist.pruned == len(commands) - 10
+
+    assert index.best_template("kšna je tempertura sanitarne oude")[0] == "kakšna je temperatura sanitarne vode"
+    assert index.best_template("uklopi sstm")[0] == "vklopi sistem"
+
+
+def test_compile_commands_is_reused():
+    assert matcher.compile_commands(tuple(commands)) is matcher.compile_commands(tuple(commands))
+
+
+# Test the match cache
+def test_match_cache():
+    index = matcher.CommandIndex(commands, cache_size=2)
+    assert index.match("vklopi sistem") == ("vklopi sistem", None)
+    assert index.match("  Vklopi Sistem ") == ("vklopi sistem", None)
+    info = index.cache_info()
+    assert (info.hits, info.misses, info.size, info.maxsize) == (1, 1, 1, 2)
+
+    with pytest.raises(ValueError):
+        index.match("vrabec na strehi in kamen v roki")
+    with pytest.raises(ValueError):
+        index.match("vrabec na strehi in kamen v roki")
+    assert index.cache_info().hits == 2
+
+    index.match("izklopi sistem")
+    assert index.cache_info().size == 2  # least recently used entry was evicted
+
+    index.set_templates(commands)
+    assert index.cache_info().size == 2  # same templates, cache stays valid
+
+    index.set_templates(["vklopi sistem", "izklopi sistem"])
+    assert index.cache_info() == matcher.CacheInfo(hits=0, misses=0, size=0, maxsize=2)
+    assert index.match("izklopi sistem") == ("izklopi sistem", None)
+
+
+def test_match_cache_skips_processing(monkeypatch):
+    index = matcher.CommandIndex(commands)
+    assert index.match("nastavi temperaturo prostora tri na devetnajst stopinj")[1] == 19.0
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached match should not be processed again")
+
+    monkeypatch.setattr(matcher, "prepare_text", fail)
+    assert index.match("nastavi temperaturo prostora tri na devetnajst stopinj")[1] == 19.0
+
+
+# Test the single-pass numeral parser against the multi-pass reference
+@pytest.mark.parametrize("text", [
+    "nastavi temperaturo na dvajset stopinj",
+    "nastavi na pet in dvajset stopinj",
+    "dve celih pet",
+    "endvajst cela pet in dvajset",
+    "pet in dvajset celih tri in trideset",
+    "ena in dva in tri",
+    "dve celih celih pet",
+    "pet in",
+    "pet celih",
+    "25,5 in 3!",
+    "nič , 5 . 3",
+    "prosim te nastavi mi temperturo za sanitarno vodo na 45 stopinj",
+    "",
+])
+def test_single_pass_numerals_match_multipass(text):
+    for backend in (scorer.DIFFLIB, scorer.get_scorer()):
+        assert matcher.replace_numbers_with_digits(text, backend) == matcher.replace_numbers_with_digits_multipass(text, backend)
+
+
+# Test the numeral lexicon against the reference scan
+def test_numeral_lexicon_matches_scan():
+    words = list(matcher.numeral_forms()) + [
+        "dvaset", "endvajst", "dvaindvajst", "petindvaset", "štirnajst", "sedemdest", "trjeset", "devetindevedeset",
+        "temperaturo", "nastavi", "prostora", "stopinj", "sanitarne", "kroga", "celih", "osm",
+    ]
+    for backend in (scorer.DIFFLIB, scorer.get_scorer()):
+        lexicon = matcher.NumeralLexicon(backend)
+        for word in words:
+            assert lexicon.lookup(word) == matcher.slovenian_word_to_number_scan(word, backend), word
+
+
+def test_numeral_lexicon_is_precomputed():
+    lexicon = matcher.NumeralLexicon(scorer.DIFFLIB)
+    assert lexicon.entries["petindvajset"] == "25.0"
+    assert lexicon.entries["dvajset"] == "20.0"
+    assert "prostora" not in lexicon.entries
+
+    # The deletion neighbourhood is precomputed for difflib as well
+    assert lexicon.entries["dvaset"] == "20.0"
+
+    assert lexicon.lookup("prostora") is None
+    assert "prostora" in lexicon.memo
+    assert not lexicon.may_end_with_tens("prostora")
+    assert lexicon.may_end_with_tens("dvaset")
+
+
+def test_numeral_lexicon_memo_is_lru():
+    lexicon = matcher.NumeralLexicon(scorer.get_scorer(), max_entries=2)
+    for word in ("prostora", "kroga", "prostora", "stopinj"):
+        lexicon.lookup(word)
+
+    assert list(lexicon.memo) == ["prostora", "stopinj"]
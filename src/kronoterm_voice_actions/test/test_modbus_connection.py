@@ -0,0 +1,310 @@
+# src/kronoterm_voice_actions/test/test_modbus_connection.py
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from pymodbus.exceptions import ModbusIOException
+
+from kronoterm_voice_actions.wyoming.bus_scheduler import Priority
+from kronoterm_voice_actions.wyoming.modbus_connection import (
+    ModbusConnection,
+    ModbusConnectionError,
+    RegisterWrite,
+)
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def serial_client():
+    with patch('kronoterm_voice_actions.wyoming.modbus_connection.pymodbus.client.ModbusSerialClient') as mock_class:
+        client = mock_class.return_value
+        client.connect = MagicMock(return_value=True)
+        client.close = MagicMock()
+        client.connected = True
+        yield client
+
+
+async def test_connection_is_reused(serial_client):
+    connection = ModbusConnection("/dev/ttyUSB0")
+    read = MagicMock(return_value="response")
+
+    assert await connection.call(read, 1, count=1) == "response"
+    assert await connection.call(read, 2, count=1) == "response"
+
+    serial_client.connect.assert_called_once()
+    serial_client.close.assert_not_called()
+    assert read.call_count == 2
+    connection.close()
+
+
+async def test_reopens_after_failure(serial_client):
+    connection = ModbusConnection("/dev/ttyUSB0")
+    read = MagicMock(side_effect=[ModbusIOException("no response"), "response"])
+
+    assert await connection.call(read) == "response"
+
+    assert serial_client.connect.call_count == 2
+    serial_client.close.assert_called_once()
+    assert connection.failure_count == 1
+    connection.close()
+
+
+async def test_gives_up_after_retries(serial_client):
+    connection = ModbusConnection("/dev/ttyUSB0", retries=2)
+    read = MagicMock(side_effect=OSError("device disconnected"))
+
+    with pytest.raises(ModbusConnectionError):
+        await connection.call(read)
+
+    assert read.call_count == 3
+    assert not connection.is_open
+
+
+async def test_port_cannot_be_opened(serial_client):
+    serial_client.connect.return_value = False
+    connection = ModbusConnection("/dev/ttyUSB0")
+
+    with pytest.raises(ModbusConnectionError):
+        await connection.call(MagicMock())
+
+
+async def test_closes_when_idle(serial_client):
+    connection = ModbusConnection("/dev/ttyUSB0", idle_timeout=0.01)
+    await connection.call(MagicMock())
+    assert connection.is_open
+
+    await asyncio.sleep(0.05)
+
+    assert not connection.is_open
+    serial_client.close.assert_called_once()
+
+
+async def test_health_check(serial_client):
+    connection = ModbusConnection("/dev/ttyUSB0")
+    serial_client.read_holding_registers.return_value.isError.return_value = False
+    assert await connection.health_check(1999, slave=20)
+
+    serial_client.read_holding_registers.side_effect = ModbusIOException("no response")
+    assert not await connection.health_check(1999, slave=20)
+
+
+@pytest.fixture
+def async_serial_client():
+    with patch('kronoterm_voice_actions.wyoming.modbus_connection.pymodbus.client.AsyncModbusSerialClient') as mock_class:
+        client = mock_class.return_value
+        client.connect = AsyncMock(return_value=True)
+        client.close = MagicMock()
+        client.connected = True
+        yield client
+
+
+async def test_async_transport_skips_executor(async_serial_client):
+    connection = ModbusConnection("/dev/ttyUSB0", use_async=True)
+    read = AsyncMock(return_value="response")
+
+    with patch('asyncio.to_thread', new_callable=AsyncMock) as mock_to_thread:
+        assert await connection.call(read, 1, count=1) == "response"
+        assert await connection.call(read, 2, count=1) == "response"
+
+    mock_to_thread.assert_not_called()
+    async_serial_client.connect.assert_awaited_once()
+    assert read.await_count == 2
+    connection.close()
+    async_serial_client.close.assert_called_once()
+
+
+async def test_async_transport_reopens_after_failure(async_serial_client):
+    connection = ModbusConnection("/dev/ttyUSB0", use_async=True)
+    read = AsyncMock(side_effect=[ModbusIOException("no response"), "response"])
+
+    assert await connection.call(read) == "response"
+
+    assert async_serial_client.connect.await_count == 2
+    assert connection.failure_count == 1
+    connection.close()
+
+
+async def test_async_health_check(async_serial_client):
+    async_serial_client.read_holding_registers = AsyncMock()
+    async_serial_client.read_holding_registers.return_value.isError = MagicMock(return_value=False)
+    connection = ModbusConnection("/dev/ttyUSB0", use_async=True)
+
+    assert await connection.health_check(1999, slave=20)
+    async_serial_client.read_holding_registers.assert_awaited_once_with(1999, count=1, slave=20)
+    connection.close()
+
+
+def slow_read(address, count, slave):
+    time.sleep(0.02)
+    return [address] * count
+
+
+async def test_concurrent_reads_are_coalesced(serial_client):
+    serial_client.read_holding_registers = MagicMock(side_effect=slow_read)
+    connection = ModbusConnection("/dev/ttyUSB0", inter_frame_delay=0)
+
+    results = await asyncio.gather(
+        connection.read_holding_registers(2102, count=1, slave=20),
+        connection.read_holding_registers(2102, count=1, slave=20),
+        connection.read_holding_registers(2000, count=28, slave=20),
+        connection.read_holding_registers(2102, count=1, slave=20),
+    )
+
+    assert results[0] is results[1] is results[3]
+    assert results[2] == [2000] * 28
+    assert serial_client.read_holding_registers.call_count == 2
+    assert connection.coalesced_count == 2
+
+    # Completed reads are not reused
+    await connection.read_holding_registers(2102, count=1, slave=20)
+    assert serial_client.read_holding_registers.call_count == 3
+    connection.close()
+
+
+async def test_voice_read_promotes_a_shared_poll_read(serial_client):
+    order = []
+
+    def read(address, count, slave):
+        time.sleep(0.01)
+        order.append(address)
+        return [address] * count
+
+    serial_client.read_holding_registers = MagicMock(side_effect=read)
+    connection = ModbusConnection("/dev/ttyUSB0", inter_frame_delay=0)
+
+    polls = [
+        asyncio.create_task(connection.read_holding_registers(address, count=1, slave=20, priority=Priority.POLL))
+        for address in (2000, 2010, 2102)
+    ]
+    await asyncio.sleep(0)
+    voice = await connection.read_holding_registers(2102, count=1, slave=20)
+    await asyncio.gather(*polls)
+
+    assert voice == [2102]
+    assert order == [2000, 2102, 2010]
+    assert serial_client.read_holding_registers.call_count == 3
+    connection.close()
+
+
+async def test_cancelled_caller_does_not_cancel_shared_read(serial_client):
+    serial_client.read_holding_registers = MagicMock(side_effect=slow_read)
+    connection = ModbusConnection("/dev/ttyUSB0", inter_frame_delay=0)
+
+    first = asyncio.create_task(connection.read_holding_registers(2102, count=1, slave=20))
+    second = asyncio.create_task(connection.read_holding_registers(2102, count=1, slave=20))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == [2102]
+    assert first.cancelled()
+    connection.close()
+
+
+async def test_write_is_not_answered_by_earlier_read(serial_client):
+    serial_client.read_holding_registers = MagicMock(side_effect=slow_read)
+    connection = ModbusConnection("/dev/ttyUSB0", inter_frame_delay=0)
+
+    before = asyncio.create_task(connection.read_holding_registers(2012, count=1, slave=20))
+    await asyncio.sleep(0)
+    await asyncio.gather(
+        connection.write_register(2012, 1, slave=20),
+        connection.read_holding_registers(2012, count=1, slave=20),
+    )
+    await before
+
+    assert serial_client.read_holding_registers.call_count == 2
+    assert connection.coalesced_count == 0
+    connection.close()
+
+
+async def test_concurrent_voice_queries_share_a_read(serial_client):
+    response = MagicMock()
+    response.registers = [-52 & 0xFFFF]
+    serial_client.read_holding_registers = MagicMock(side_effect=lambda *args, **kwargs: time.sleep(0.02) or response)
+    client = MqttClient(connection=ModbusConnection("/dev/ttyUSB0", inter_frame_delay=0))
+
+    answers = await asyncio.gather(client.get_outside_temp(), client.get_outside_temp())
+
+    assert answers[0] == answers[1] == "Trenutna zunanja temperatura je -5.2 stopinj"
+    serial_client.read_holding_registers.assert_called_once()
+    client.connection.close()
+
+
+def echo_write(address, value, slave):
+    time.sleep(0.02)
+    return (address, value)
+
+
+async def test_writes_behind_a_pending_write_are_coalesced(serial_client):
+    serial_client.write_register = MagicMock(side_effect=echo_write)
+    connection = ModbusConnection("/dev/ttyUSB0", inter_frame_delay=0, write_window=0.05)
+
+    async def write(value, after):
+        await asyncio.sleep(after)
+        return await connection.write_register(2187, value, slave=20)
+
+    results = await asyncio.gather(write(220, 0), write(225, 0.01), connection.write_register(2188, 2, slave=20), write(215, 0.01))
+
+    # The first write goes out right away, the ones arriving while it is in flight follow as one write of the last value
+    assert [args.kwargs["value"] for args in serial_client.write_register.call_args_list if args.args == (2187,)] == [220, 215]
+    assert results[0] == RegisterWrite((2187, 220), 220)
+    assert results[1] == results[3] == RegisterWrite((2187, 215), 215)
+    assert serial_client.write_register.call_count == 3
+    assert connection.coalesced_write_count == 1
+
+    # A write after the others landed goes out on its own
+    assert await connection.write_register(2187, 210, slave=20) == RegisterWrite((2187, 210), 210)
+    assert serial_client.write_register.call_count == 4
+    connection.close()
+
+
+async def test_writes_within_the_window_are_coalesced(serial_client):
+    serial_client.write_register = MagicMock(side_effect=echo_write)
+    connection = ModbusConnection("/dev/ttyUSB0", inter_frame_delay=0, write_window=0.2)
+
+    start = time.monotonic()
+    assert await connection.write_register(2187, 220, slave=20) == RegisterWrite((2187, 220), 220)
+    assert time.monotonic() - start < 0.15
+    # Both arrive after the first write landed but within the window, and go out together once it has passed
+    results = await asyncio.gather(
+        connection.write_register(2187, 225, slave=20), connection.write_register(2187, 215, slave=20)
+    )
+
+    assert results[0] == results[1] == RegisterWrite((2187, 215), 215)
+    assert [args.kwargs["value"] for args in serial_client.write_register.call_args_list] == [220, 215]
+    assert connection.coalesced_write_count == 1
+    connection.close()
+
+
+async def test_writes_without_a_window_go_out_right_away(serial_client):
+    serial_client.write_register = MagicMock(side_effect=echo_write)
+    connection = ModbusConnection("/dev/ttyUSB0", inter_frame_delay=0)
+
+    results = await asyncio.gather(*(connection.write_register(2187, value, slave=20) for value in (220, 225, 215)))
+
+    assert results == [RegisterWrite((2187, value), value) for value in (220, 225, 215)]
+    assert [args.kwargs["value"] for args in serial_client.write_register.call_args_list] == [220, 225, 215]
+    assert connection.coalesced_write_count == 0
+    connection.close()
+
+
+async def test_cancelled_writer_does_not_cancel_coalesced_write(serial_client):
+    serial_client.write_register = MagicMock(side_effect=echo_write)
+    connection = ModbusConnection("/dev/ttyUSB0", inter_frame_delay=0, write_window=0.05)
+
+    first = asyncio.create_task(connection.write_register(2023, 450, slave=20))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(connection.write_register(2023, 480, slave=20))
+    third = asyncio.create_task(connection.write_register(2023, 500, slave=20))
+    await asyncio.sleep(0)
+    second.cancel()
+
+    assert await third == RegisterWrite((2023, 500), 500)
+    assert (await first).value == 450
+    assert second.cancelled()
+    assert [args.kwargs["value"] for args in serial_client.write_register.call_args_list] == [450, 500]
+    connection.close()
@@ -5,15 +5,16 @@ import asyncio
 from unittest.mock import patch, MagicMock, AsyncMock
 
 # Adjust the import path based on your project structure
-from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.modbus_connection import ModbusConnectionError
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient, follow_up_announcer
 from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
 from kronoterm_voice_actions.wyoming.const import MODBUS_SLAVE_ID
 
 # Mark all tests in this module to use asyncio
 pytestmark = pytest.mark.asyncio
 
-@patch('kronoterm_voice_actions.wyoming.mqtt_client.pymodbus.client.ModbusSerialClient')
-async def test_read_temperature(MockModbusClient):
+
+async def test_read_temperature(MockModbusClient, client):
     """Tests reading a temperature value."""
     mock_instance = MockModbusClient.return_value
     mock_instance.connect = MagicMock()
@@ -25,7 +26,6 @@ async def test_read_temperature(MockModbusClient):
     with patch('asyncio.to_thread', new_callable=AsyncMock) as mock_to_thread:
         mock_to_thread.return_value = mock_response
 
-        client = MqttClient(usb_port=0)
         temperature = await client.read_temperature(RegisterAddress.OUTSIDE_TEMP, "Outside")
 
     assert temperature == 25.5
@@ -37,12 +37,11 @@ async def test_read_temperature(MockModbusClient):
     assert mock_to_thread.call_args.kwargs['count'] == 1
     assert mock_to_thread.call_args.kwargs['slave'] == MODBUS_SLAVE_ID
     
-    # FIX 1: close() is called by read() and then again by read_temperature()
-    assert mock_instance.close.call_count == 2
+    # The connection stays open for the next request
+    mock_instance.close.assert_not_called()
 
 
-@patch('kronoterm_voice_actions.wyoming.mqtt_client.pymodbus.client.ModbusSerialClient')
-async def test_read_direct(MockModbusClient):
+async def test_read_direct(MockModbusClient, client):
     """Tests the base read method."""
     mock_instance = MockModbusClient.return_value
     mock_instance.connect = MagicMock()
@@ -52,7 +51,6 @@ async def test_read_direct(MockModbusClient):
 
     with patch('asyncio.to_thread', new_callable=AsyncMock) as mock_to_thread:
         mock_to_thread.return_value = mock_response
-        client = MqttClient(usb_port=0)
         status = await client.read(RegisterAddress.SYSTEM_STATUS)
 
     assert status == 1
@@ -62,11 +60,10 @@ async def test_read_direct(MockModbusClient):
     assert mock_to_thread.call_args.args[1] == RegisterAddress.SYSTEM_STATUS.to_int() - 1
     assert mock_to_thread.call_args.kwargs['count'] == 1
     assert mock_to_thread.call_args.kwargs['slave'] == MODBUS_SLAVE_ID
-    mock_instance.close.assert_called_once()
+    mock_instance.close.assert_not_called()
 
 
-@patch('kronoterm_voice_actions.wyoming.mqtt_client.pymodbus.client.ModbusSerialClient')
-async def test_write_direct(MockModbusClient):
+async def test_write_direct(MockModbusClient, client):
     """Tests the base write method."""
     mock_instance = MockModbusClient.return_value
     mock_instance.connect = MagicMock()
@@ -75,7 +72,6 @@ async def test_write_direct(MockModbusClient):
 
     with patch('asyncio.to_thread', new_callable=AsyncMock) as mock_to_thread:
         mock_to_thread.return_value = None 
-        client = MqttClient(usb_port=0)
         await client.write(RegisterAddress.SYSTEM_ON, 1) # Turn system ON
 
     mock_instance.connect.assert_called_once()
@@ -85,20 +81,45 @@ async def test_write_direct(MockModbusClient):
     assert mock_to_thread.call_args.args[1] == RegisterAddress.SYSTEM_ON.to_int() - 1
     assert mock_to_thread.call_args.kwargs['value'] == 1
     assert mock_to_thread.call_args.kwargs['slave'] == MODBUS_SLAVE_ID
-    mock_instance.close.assert_called_once()
+    mock_instance.close.assert_not_called()
 
 
-@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.set_temperature', new_callable=AsyncMock)
-async def test_set_dhw_target_temp(mock_set_temp):
-    """Tests setting the DHW temperature by mocking set_temperature."""
-    mock_set_temp.return_value = 45.0 
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.read_temperature', new_callable=AsyncMock)
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.write_temperature', new_callable=AsyncMock)
+async def test_set_dhw_target_temp(mock_write_temp, mock_read_temp):
+    """Tests setting the DHW temperature by mocking the write and the read-back."""
+    mock_write_temp.return_value = 45.0
+    mock_read_temp.return_value = 45.0
 
     client = MqttClient(usb_port=0) 
     
     response = await client.set_dhw_target_temperature(45.0)
 
-    mock_set_temp.assert_called_once_with(RegisterAddress.DHW_TARGET_TEMP, 45.0)
+    mock_write_temp.assert_called_once_with(RegisterAddress.DHW_TARGET_TEMP, 45.0)
     assert "nastavljena na 45 stopinj" in response
+    assert "previsoka" not in response
+
+
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.read_temperature', new_callable=AsyncMock)
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.write_temperature', new_callable=AsyncMock)
+async def test_setpoint_replaced_by_newer_command(mock_write_temp, mock_read_temp):
+    """A setpoint a newer command replaced is not reported as clamped, only a clamped written value is."""
+    mock_write_temp.return_value = 50.0
+    mock_read_temp.return_value = 50.0
+    client = MqttClient(usb_port=0)
+
+    response = await client.set_dhw_target_temperature(45.0)
+
+    assert response.startswith("Novejši ukaz je temperaturo popravil na 50 stopinj.")
+    assert "previsoka" not in response and "prenizka" not in response
+    assert response.endswith("nastavljena na 50 stopinj.")
+
+    mock_write_temp.return_value = 80.0
+    mock_read_temp.return_value = 60.0
+    response = await client.set_dhw_target_temperature(75.0)
+
+    assert "popravil na 80 stopinj" in response
+    assert "Izbrana temperatura 80 stopinj je previsoka" in response
 
 
 @patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.read', new_callable=AsyncMock)
@@ -121,4 +142,83 @@ async def test_get_system_status_off(mock_read):
     response = await client.get_system_status()
 
     mock_read.assert_called_once_with(RegisterAddress.SYSTEM_STATUS)
-    assert response == "Sistem je izklopljen."
\ No newline at end of file
+    assert response == "Sistem je izklopljen."
+
+def create_background_task(coroutine, name):
+    return asyncio.get_running_loop().create_task(coroutine, name=name)
+
+
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.read_temperature', new_callable=AsyncMock)
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.write_temperature', new_callable=AsyncMock)
+async def test_optimistic_setpoint_announces_clamping(mock_write_temp, mock_read_temp):
+    """Answers once the value is written and announces the clamped one after the read-back."""
+    read_back = asyncio.Event()
+
+    async def read_temperature(addr):
+        await read_back.wait()
+        return 60.0
+
+    mock_write_temp.return_value = 75.0
+    mock_read_temp.side_effect = read_temperature
+    announce = AsyncMock()
+    client = MqttClient(usb_port=0, optimistic=True, create_background_task=create_background_task)
+
+    follow_up_announcer.set(announce)
+    response = await client.set_dhw_target_temperature(75.0)
+
+    assert response == "Želena temperatura sanitarne vode nastavljena na 75 stopinj."
+    mock_write_temp.assert_awaited_once_with(RegisterAddress.DHW_TARGET_TEMP, 75.0)
+    announce.assert_not_called()
+    read_back.set()
+    await client.wait_for_verifications()
+
+    announce.assert_awaited_once()
+    assert "je previsoka" in announce.await_args.args[0]
+    assert announce.await_args.args[0].endswith("nastavljena na 60 stopinj.")
+
+
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.read_temperature', new_callable=AsyncMock)
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.write_temperature', new_callable=AsyncMock)
+async def test_optimistic_setpoint_announcements(mock_write_temp, mock_read_temp, caplog):
+    """Nothing is announced when the written value was accepted, a failed write fails the command itself."""
+    announce = AsyncMock()
+    client = MqttClient(usb_port=0, optimistic=True, create_background_task=create_background_task)
+    follow_up_announcer.set(announce)
+
+    mock_write_temp.return_value = mock_read_temp.return_value = 21.5
+    await client.set_loop_room_target_temp(1, 21.5)
+    await client.wait_for_verifications()
+    announce.assert_not_called()
+
+    # A newer command replaced the value, which is part of the answer
+    response = await client.set_loop_room_target_temp(1, 21.0)
+    await client.wait_for_verifications()
+    assert response.startswith("Novejši ukaz je temperaturo popravil na 21.5 stopinj.")
+    announce.assert_not_called()
+
+    # A failed read-back is logged, whatever the error
+    mock_read_temp.side_effect = ValueError("bad register")
+    await client.set_loop_room_target_temp(1, 21.5)
+    await client.wait_for_verifications()
+    announce.assert_not_called()
+    assert "Verifying" in caplog.text
+
+    mock_write_temp.side_effect = ModbusConnectionError("no answer")
+    with pytest.raises(ModbusConnectionError):
+        await client.set_loop_room_target_temp(1, 22.0)
+    assert not client._verifications
+
+
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.read_temperature', new_callable=AsyncMock)
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.write_temperature', new_callable=AsyncMock)
+async def test_optimistic_setpoint_without_announcer_waits(mock_write_temp, mock_read_temp):
+    """Without a way to announce a correction the answer waits for the read-back."""
+    mock_write_temp.return_value = 75.0
+    mock_read_temp.return_value = 60.0
+    client = MqttClient(usb_port=0, optimistic=True, create_background_task=create_background_task)
+
+    response = await client.set_dhw_target_temperature(75.0)
+
+    assert "je previsoka" in response
+    mock_write_temp.assert_awaited_once()
+    mock_read_temp.assert_awaited_once()
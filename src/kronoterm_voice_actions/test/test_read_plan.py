@@ -0,0 +1,118 @@
+# src/kronoterm_voice_actions/test/test_read_plan.py
+
+import itertools
+import random
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from kronoterm_voice_actions.test.test_register_snapshot import block_response
+from kronoterm_voice_actions.wyoming.kronoterm_models import (
+    HEATING_LOOPS,
+    RegisterAddress,
+)
+from kronoterm_voice_actions.wyoming.read_plan import ReadPlanner, plan_reads
+from kronoterm_voice_actions.wyoming.register_snapshot import (
+    MAX_BLOCK_SIZE,
+    RegisterBlock,
+)
+
+
+def brute_force_cost(wanted: list[int], gap_cost: float, max_block_size: int) -> float:
+    """Cheapest split of the sorted registers into consecutive runs, trying every split."""
+    best = float("inf")
+    for cuts in itertools.product([False, True], repeat=len(wanted) - 1):
+        cost, first = 0.0, 0
+        for i, cut in enumerate([*cuts, True]):
+            if cut:
+                span = wanted[i] - wanted[first] + 1
+                if span > max_block_size:
+                    break
+                cost += 1 + gap_cost * (span - (i + 1 - first))
+                first = i + 1
+        else:
+            best = min(best, cost)
+    return best
+
+
+def covers(plan, addresses) -> bool:
+    return all(any(address.to_int() in block for block in plan) for address in addresses)
+
+
+def test_full_register_map():
+    plan = plan_reads(RegisterAddress)
+    assert covers(plan, RegisterAddress)
+    assert all(block.count <= MAX_BLOCK_SIZE for block in plan)
+    assert len(plan) == 5
+    assert plan.blocks[0] == RegisterBlock(2000, 80)
+    assert plan.blocks[-1] == RegisterBlock(2301, 72)
+
+
+def test_gap_cost_trades_requests_for_unused_registers():
+    free = plan_reads(RegisterAddress, gap_cost=0)
+    cheap = plan_reads(RegisterAddress, gap_cost=0.02)
+    expensive = plan_reads(RegisterAddress, gap_cost=1)
+
+    # Only the 125 register limit splits reads when gaps are free
+    assert len(free) == 3
+    assert len(free) <= len(cheap) < len(expensive)
+    assert free.unused >= cheap.unused > expensive.unused
+    assert all(covers(plan, RegisterAddress) for plan in (free, cheap, expensive))
+
+
+def test_voice_query():
+    loop = HEATING_LOOPS[2]
+    plan = plan_reads([loop.temp_sensor])
+    assert plan.blocks == (RegisterBlock(loop.temp_sensor.to_int(), 1),)
+
+    # Neighbouring registers are read together
+    addresses = [loop.current_target_room_temp, loop.schedule_status, loop.temp_sensor]
+    plan = plan_reads(addresses)
+    assert plan.blocks == (
+        RegisterBlock(loop.current_target_room_temp.to_int(), 4), RegisterBlock(loop.temp_sensor.to_int(), 1)
+    )
+
+
+def test_empty_plan():
+    assert len(plan_reads([])) == 0
+
+
+def test_block_size_limit():
+    plan = plan_reads([2000, 2010, 2020, 2030], gap_cost=0, max_block_size=15)
+    assert plan.blocks == (RegisterBlock(2000, 11), RegisterBlock(2020, 11))
+
+    with pytest.raises(ValueError):
+        ReadPlanner(max_block_size=126)
+
+
+def test_prefers_fewer_requests_on_equal_cost():
+    # Reading the 20 registers in between costs as much as a second request
+    assert len(plan_reads([2000, 2021], gap_cost=0.05)) == 1
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_plan_is_optimal(seed):
+    rng = random.Random(seed)
+    addresses = rng.sample(list(RegisterAddress), rng.randint(2, 12))
+    gap_cost = rng.choice([0.0, 0.03, 0.05, 0.2, 1.0])
+    max_block_size = rng.choice([10, 40, MAX_BLOCK_SIZE])
+
+    plan = plan_reads(addresses, gap_cost, max_block_size)
+    wanted = sorted(address.to_int() for address in addresses)
+
+    assert covers(plan, addresses)
+    assert all(block.count <= max_block_size for block in plan)
+    assert plan.cost == pytest.approx(brute_force_cost(wanted, gap_cost, max_block_size))
+
+
+@pytest.mark.asyncio
+async def test_read_registers(client):
+    addresses = [RegisterAddress.SYSTEM_STATUS, RegisterAddress.OUTSIDE_TEMP, RegisterAddress.DHW_TEMP]
+    with patch('asyncio.to_thread', new_callable=AsyncMock) as mock_to_thread:
+        mock_to_thread.side_effect = block_response
+        snapshot = await client.read_registers(addresses)
+
+    assert mock_to_thread.call_count == len(plan_reads(addresses))
+    assert snapshot[RegisterAddress.SYSTEM_STATUS] == RegisterAddress.SYSTEM_STATUS.to_int()
+    assert snapshot.temperature(RegisterAddress.OUTSIDE_TEMP) == -5.2
+    assert RegisterAddress.DHW_TEMP in snapshot
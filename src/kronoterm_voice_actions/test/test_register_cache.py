@@ -0,0 +1,118 @@
+# src/kronoterm_voice_actions/test/test_register_cache.py
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from kronoterm_voice_actions.test.test_register_snapshot import block_response
+from kronoterm_voice_actions.wyoming.kronoterm_models import (
+    HEATING_LOOPS,
+    RegisterAddress,
+)
+from kronoterm_voice_actions.wyoming.register_cache import (
+    CONFIGURATION_MAX_AGE,
+    DEFAULT_MAX_AGE,
+    RegisterCache,
+)
+from kronoterm_voice_actions.wyoming.register_snapshot import RegisterSnapshot
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_freshness_policies(clock):
+    cache = RegisterCache(clock=clock)
+    assert cache.max_age(RegisterAddress.OUTSIDE_TEMP) == DEFAULT_MAX_AGE
+    for address in (RegisterAddress.PROGRAM_MODE, RegisterAddress.LOOP_2_MODE_SELECT,
+                    RegisterAddress.LOOP_3_CURVE_POINT2, RegisterAddress.SCOP):
+        assert cache.max_age(address) == CONFIGURATION_MAX_AGE
+
+    cache.put(RegisterAddress.OUTSIDE_TEMP, 52)
+    cache.put(RegisterAddress.PROGRAM_MODE, 1)
+    clock.now += DEFAULT_MAX_AGE + 1
+
+    assert cache.get(RegisterAddress.OUTSIDE_TEMP) is None
+    assert cache.get(RegisterAddress.PROGRAM_MODE) == 1
+
+    clock.now += CONFIGURATION_MAX_AGE
+    assert cache.get(RegisterAddress.PROGRAM_MODE) is None
+    assert cache.stats().expired == 2
+
+
+def test_custom_max_ages(clock):
+    cache = RegisterCache({RegisterAddress.OUTSIDE_TEMP: 60}, default_max_age=0, clock=clock)
+    cache.put(RegisterAddress.OUTSIDE_TEMP, 52)
+    cache.put(RegisterAddress.PROGRAM_MODE, 1)
+    clock.now += 30
+
+    assert cache.get(RegisterAddress.OUTSIDE_TEMP) == 52
+    assert cache.get(RegisterAddress.PROGRAM_MODE) is None
+
+
+def test_invalidate_dependents(clock):
+    loop = HEATING_LOOPS[3]
+    cache = RegisterCache(clock=clock)
+    cache.put_snapshot(RegisterSnapshot({loop.mode_select: 1, loop.schedule_status: 1, loop.temp_sensor: 215}))
+
+    cache.invalidate(loop.mode_select)
+
+    assert cache.get(loop.mode_select) is None
+    assert cache.get(loop.schedule_status) is None
+    assert cache.get(loop.temp_sensor) == 215
+    assert cache.stats().invalidations == 2
+
+
+def test_hit_rate(clock):
+    cache = RegisterCache(clock=clock)
+    assert cache.stats().hit_rate == 0
+
+    cache.put(RegisterAddress.SCOP, 412)
+    values, missing = cache.get_many([RegisterAddress.SCOP, RegisterAddress.COP, RegisterAddress.SCOP])
+    assert values == {RegisterAddress.SCOP: 412}
+    assert missing == [RegisterAddress.COP]
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+    assert stats.hit_rate == 0.5
+
+    cache.clear()
+    assert cache.stats() == RegisterCache().stats()
+
+
+@pytest.mark.asyncio
+async def test_client_reads_through_cache(client):
+    response = MagicMock()
+    response.registers = [2]
+    with patch('asyncio.to_thread', new_callable=AsyncMock) as mock_to_thread:
+        mock_to_thread.return_value = response
+
+        assert await client.get_program_mode() == await client.get_program_mode()
+        assert mock_to_thread.call_count == 1
+
+        await client.set_regime_normal()
+        await client.get_program_mode()
+
+    # write, then a fresh read since writing PROGRAM_SELECT changes PROGRAM_MODE
+    assert mock_to_thread.call_count == 3
+    assert client.cache.stats().hits == 1
+
+
+@pytest.mark.asyncio
+async def test_read_registers_skips_cached(client):
+    with patch('asyncio.to_thread', new_callable=AsyncMock) as mock_to_thread:
+        mock_to_thread.side_effect = block_response
+        await client.read_snapshot()
+        snapshot = await client.read_registers([RegisterAddress.PROGRAM_MODE, RegisterAddress.OUTSIDE_TEMP])
+
+    assert mock_to_thread.call_count == 5
+    assert snapshot.temperature(RegisterAddress.OUTSIDE_TEMP) == -5.2
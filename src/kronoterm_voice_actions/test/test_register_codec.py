@@ -0,0 +1,91 @@
+# src/kronoterm_voice_actions/test/test_register_codec.py
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from kronoterm_voice_actions.wyoming.kronoterm_models import (
+    HEATING_LOOPS,
+    RegisterAddress,
+)
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.register_codec import (
+    OFF,
+    REGISTER_SPECS,
+    RegisterSpec,
+)
+from kronoterm_voice_actions.wyoming.register_snapshot import (
+    RegisterBlock,
+    RegisterSnapshot,
+    decode_block,
+)
+
+
+def test_every_register_has_a_spec():
+    assert set(REGISTER_SPECS) == set(RegisterAddress)
+    assert REGISTER_SPECS[RegisterAddress.OUTSIDE_TEMP].unit == "°C"
+    assert REGISTER_SPECS[RegisterAddress.LOOP_2_CURVE_POINT1].divisor == 10
+    assert REGISTER_SPECS[RegisterAddress.SCOP].divisor == 100
+    assert not REGISTER_SPECS[RegisterAddress.COMPRESSOR_STATUS].signed
+    assert REGISTER_SPECS[RegisterAddress.CURRENT_HP_LOAD].unit == "%"
+
+
+@pytest.mark.parametrize("spec, value, word", [
+    (RegisterSpec(divisor=10), 21.5, 215),
+    (RegisterSpec(divisor=10), 22.3, 223),
+    (RegisterSpec(divisor=10), -5.2, 0x10000 - 52),
+    (RegisterSpec(), 2, 2),
+])
+def test_encode_decode(spec, value, word):
+    assert spec.to_word(value) == word
+    assert spec.scaled(spec.from_word(word)) == value
+
+
+def test_labels_and_sentinels():
+    assert REGISTER_SPECS[RegisterAddress.OPERATING_MODE].label(5) == "Mirovanje"
+    assert REGISTER_SPECS[RegisterAddress.OPERATING_MODE].label(6) is None
+    assert REGISTER_SPECS[RegisterAddress.LOOP_3_SCHEDULE_STATUS].label(2) == "ECO"
+    for loop in HEATING_LOOPS.values():
+        assert REGISTER_SPECS[loop.current_target_room_temp].sentinel(5000) == OFF
+    assert REGISTER_SPECS[RegisterAddress.DHW_CURRENT_TARGET_TEMP].sentinel(215) is None
+
+
+def test_block_decoder_applies_signedness():
+    block = RegisterBlock(2318, 12)  # COMPRESSOR_STATUS .. CURRENT_POWER_CONSUMPTION
+    registers = [0xFFFF] * block.count
+    values = decode_block(block, registers)
+
+    assert values[RegisterAddress.COMPRESSOR_STATUS] == 0xFFFF
+    assert values[RegisterAddress.CURRENT_HP_LOAD] == -1
+    assert len(values) == block.count
+
+
+def test_snapshot_values():
+    snapshot = RegisterSnapshot({
+        RegisterAddress.OUTSIDE_TEMP: -52,
+        RegisterAddress.SCOP: 412,
+        RegisterAddress.PROGRAM_MODE: 1,
+    })
+    assert snapshot.temperature(RegisterAddress.OUTSIDE_TEMP) == -5.2
+    assert snapshot.scaled(RegisterAddress.SCOP) == 4.12
+    assert snapshot.label(RegisterAddress.PROGRAM_MODE) == "Generalno delovanje v ECO režimu"
+
+
+@pytest.mark.asyncio
+@patch('kronoterm_voice_actions.wyoming.mqtt_client.MqttClient.read', new_callable=AsyncMock)
+async def test_handlers_use_specs(mock_read):
+    client = MqttClient(usb_port=0)
+
+    mock_read.return_value = 5000
+    assert await client.get_loop_room_target_temp(3) == "Tretji ogrevalni krog je izklopljen."
+    assert await client.get_dhw_target_temperature() == "Sanitarna voda je izklopljena."
+
+    mock_read.return_value = 215
+    assert await client.get_loop_room_target_temp(3) == (
+        "Trenutna želena temperatura prostora tretjega ogrevalnega kroga je 21.5 stopinj."
+    )
+
+    mock_read.return_value = 6
+    assert await client.get_operating_mode() == "Funkcija, ki se izvaja: Neznano."
+    mock_read.return_value = 3
+    assert await client.get_program_mode() == "Trenutno aktiven dodaten program delovanja: Program sušenja estrihov."
@@ -0,0 +1,83 @@
+# src/kronoterm_voice_actions/test/test_register_snapshot.py
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from kronoterm_voice_actions.wyoming.const import MODBUS_SLAVE_ID
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+from kronoterm_voice_actions.wyoming.modbus_connection import ModbusConnectionError
+from kronoterm_voice_actions.wyoming.register_codec import to_signed
+from kronoterm_voice_actions.wyoming.register_snapshot import (
+    MAX_BLOCK_SIZE,
+    REGISTER_BLOCKS,
+    RegisterBlock,
+    blocks_for,
+    decode_block,
+)
+
+
+def block_response(function, start, count, slave):
+    """Every register holds its own address, except the outside temperature which is negative."""
+    response = MagicMock()
+    response.isError.return_value = False
+    response.registers = [
+        0x10000 - 52 if start + 1 + i == RegisterAddress.OUTSIDE_TEMP.to_int() else start + 1 + i
+        for i in range(count)
+    ]
+    return response
+
+
+def test_blocks_cover_every_register():
+    for address in RegisterAddress:
+        assert sum(address.to_int() in block for block in REGISTER_BLOCKS) == 1, address
+
+    assert all(block.count <= MAX_BLOCK_SIZE for block in REGISTER_BLOCKS)
+
+
+def test_to_signed():
+    assert to_signed(255) == 255
+    assert to_signed(0xFFFF) == -1
+    assert to_signed(0x8000) == -32768
+
+
+def test_decode_block():
+    block = RegisterBlock(2000, 28)
+    values = decode_block(block, list(range(2000, 2028)))
+    assert values[RegisterAddress.SYSTEM_STATUS] == RegisterAddress.SYSTEM_STATUS.to_int()
+    assert all(address.to_int() in block for address in values)
+
+    with pytest.raises(ValueError):
+        decode_block(block, [0] * 27)
+
+
+def test_blocks_for():
+    assert blocks_for([RegisterAddress.OUTSIDE_TEMP, RegisterAddress.SYSTEM_STATUS]) == [
+        block for block in REGISTER_BLOCKS
+        if RegisterAddress.OUTSIDE_TEMP.to_int() in block or RegisterAddress.SYSTEM_STATUS.to_int() in block
+    ]
+
+
+@pytest.mark.asyncio
+async def test_read_snapshot(client):
+    with patch('asyncio.to_thread', new_callable=AsyncMock) as mock_to_thread:
+        mock_to_thread.side_effect = lambda function, start, count, slave: block_response(function, start, count, slave)
+        snapshot = await client.read_snapshot()
+
+    assert mock_to_thread.call_count == len(REGISTER_BLOCKS) == 5
+    for call, block in zip(mock_to_thread.call_args_list, REGISTER_BLOCKS):
+        assert call.args[1] == block.start - 1
+        assert call.kwargs == {"count": block.count, "slave": MODBUS_SLAVE_ID}
+
+    assert len(snapshot) == len(RegisterAddress)
+    assert snapshot[RegisterAddress.SYSTEM_STATUS] == RegisterAddress.SYSTEM_STATUS.to_int()
+    assert snapshot.temperature(RegisterAddress.OUTSIDE_TEMP) == -5.2
+    assert snapshot.age >= 0
+
+
+@pytest.mark.asyncio
+async def test_read_snapshot_error_response(client):
+    with patch('asyncio.to_thread', new_callable=AsyncMock) as mock_to_thread:
+        mock_to_thread.return_value = MagicMock(isError=MagicMock(return_value=True))
+        with pytest.raises(ModbusConnectionError):
+            await client.read_snapshot()
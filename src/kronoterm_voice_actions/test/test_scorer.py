@@ -0,0 +1,136 @@
+# src/kronoterm_voice_actions/test/test_scorer.py
+
+import math
+
+import pytest
+
+from kronoterm_voice_actions.test.test_matcher import commands
+from kronoterm_voice_actions.wyoming import matcher, scorer
+
+backends = [scorer.DIFFLIB]
+if scorer.RAPIDFUZZ is not None:
+    backends.append(scorer.RAPIDFUZZ)
+
+
+@pytest.fixture(params=backends, ids=lambda backend: backend.name)
+def backend(request):
+    return request.param
+
+
+def test_default_scorer():
+    expected = scorer.RAPIDFUZZ or scorer.DIFFLIB
+    assert scorer.get_scorer() is expected
+    assert scorer.get_scorer("difflib") is scorer.DIFFLIB
+    with pytest.raises(ValueError):
+        scorer.get_scorer("levenshtein")
+
+
+def test_similarity(backend):
+    assert backend.similarity("dvajset", "dvajset") == 1.0
+    assert backend.similarity("abc", "xyz") == 0.0
+    assert backend.similarity("dvaset", "dvajset") == pytest.approx(12 / 13)
+
+
+def test_extract_one(backend):
+    assert backend.extract_one("dvaset", matcher.compound_number_words_list, cutoff=0.86)[0] == "dvajset"
+    assert backend.extract_one("stopinj", matcher.number_words_list, cutoff=0.86) is None
+
+
+# Same assertions as test_matcher.py, run against every backend
+def test_parse_slovene_number_typos(backend):
+    assert matcher.slovenian_word_to_number("dvaset", backend) == '20.0'
+    assert matcher.slovenian_word_to_number("šestnajst", backend) == '16.0'
+    assert matcher.slovenian_word_to_number("trinajst", backend) == '13.0'
+    assert matcher.slovenian_word_to_number("dvaindvajset", backend) == '22.0'
+    assert matcher.slovenian_word_to_number("endvajst", backend) == '21.0'
+
+
+def test_insert_dots_for_floats(backend):
+    assert matcher.insert_dots_for_floats(["2.0", "celih", "5.0"], backend) == ["2.0", ".", "5.0"]
+    assert matcher.insert_dots_for_floats(["2.0", "cela", "5.0"], backend) == ["2.0", ".", "5.0"]
+    assert matcher.insert_dots_for_floats(["stopinj"], backend) == ["stopinj"]
+
+
+def test_replace_numbers(backend):
+    assert matcher.replace_numbers_with_digits("nastavi temperaturo na dvajset stopinj", backend) == "nastavi temperaturo na 20.0 stopinj"
+    assert matcher.replace_numbers_with_digits("nastavi na pet in dvajset stopinj", backend) == "nastavi na 25.0 stopinj"
+    assert matcher.replace_numbers_with_digits("ena dva tri", backend) == "1.0 2.0 3.0"
+    assert matcher.replace_numbers_with_digits("dve celih pet", backend) == "2.5"
+
+
+@pytest.mark.parametrize("text, expected, param", [
+    ("kakšna je temperatura sanitarne vode", ["kakšna je temperatura sanitarne vode"], None),
+    ("vklopi sistem", ["vklopi sistem"], None),
+    ("kšna je tempertura sanitarne oude", ["kakšna je temperatura sanitarne vode"], None),
+    ("prosim vklopi sistem zdaj", ["vklopi sistem"], None),
+    ("uklopi sstm", ["vklopi sistem"], None),
+    ("nastavi temperaturo prostora ena na 22 stopinj", [
+        "nastavi temperaturo prostora ena na <temperature> stopinj",
+        "nastavi želeno temperaturo prostora prvega kroga na <temperature> stopinj",
+    ], 22.0),
+    ("nastavi temeraturo prostora ena na dvaindvajset stopinj", [
+        "nastavi temperaturo prostora ena na <temperature> stopinj",
+        "nastavi želeno temperaturo prostora prvega kroga na <temperature> stopinj",
+    ], 22.0),
+    ("prosim te nastavi mi temperturo za sanitarno vodo na 45 stopinj", [
+        "nastavi želeno temperaturo sanitarne vode na <temperature> stopinj",
+        "nastavi temperaturo sanitarne vode na <temperature> stopinj",
+        "segrej sanitarno vodo na <temperature> stopinj",
+    ], 45.0),
+    ("nastavi temperaturo prostora dva na endvajst celih pet stopinj", [
+        "nastavi temperaturo prostora dva na <temperature> stopinj",
+    ], 21.5),
+    ("nastavi temperaturo prostora dva na 21.5 stopinj", [
+        "nastavi temperaturo prostora dva na <temperature> stopinj",
+    ], 21.5),
+])
+def test_match_command_parity(backend, text, expected, param):
+    action, parameter = matcher.match_command(text, commands, backend)
+    assert action in expected
+    assert parameter == param
+
+
+def test_match_command_no_match(backend):
+    with pytest.raises(ValueError):
+        matcher.match_command("vrabec na strehi in kamen v roki", commands, backend)
+
+
+def test_backends_agree_on_templates():
+    if scorer.RAPIDFUZZ is None:
+        pytest.skip("rapidfuzz is not installed")
+
+    difflib_index = matcher.CommandIndex(commands, scorer=scorer.DIFFLIB)
+    rapidfuzz_index = matcher.CommandIndex(commands, scorer=scorer.RAPIDFUZZ)
+    for command in commands:
+        text = command.replace("<temperature>", "20")
+        assert difflib_index.best_template(text)[0] == command
+        assert rapidfuzz_index.best_template(text)[0] == command
+
+
+def test_match_commands_batch(backend):
+    texts = [
+        "vklopi sistem",
+        "kšna je tempertura sanitarne oude",
+        "nastavi temperaturo prostora dva na endvajst celih pet stopinj",
+        "vrabec na strehi in kamen v roki",
+        "vklopi sistem",
+    ]
+    result = matcher.match_commands(texts, commands, backend)
+
+    assert len(result) == len(texts)
+    for i, text in enumerate(texts):
+        try:
+            action, parameter = matcher.match_command(text, commands, backend)
+        except ValueError:
+            assert result.actions[i] is None
+            assert result.template_ids[i] == -1
+            assert result.scores[i] < 0.65
+            continue
+
+        assert result.actions[i] == action
+        assert commands[result.template_ids[i]] == action
+        assert result.scores[i] >= 0.65
+        if parameter is None:
+            assert math.isnan(result.parameters[i])
+        else:
+            assert result.parameters[i] == parameter
@@ -0,0 +1,68 @@
+# src/kronoterm_voice_actions/test/test_simulator.py
+
+import pytest
+import pytest_asyncio
+
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+from kronoterm_voice_actions.wyoming.modbus_connection import (
+    ModbusConnection,
+    ModbusConnectionError,
+)
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture(params=[False, True], ids=["thread", "asyncio"])
+async def client(request, simulator):
+    connection = ModbusConnection(simulator.url, use_async=request.param, retries=0, timeout=1.0)
+    yield MqttClient(connection=connection)
+    connection.close()
+
+
+async def test_snapshot_over_the_transport(client):
+    snapshot = await client.read_snapshot()
+
+    assert snapshot.temperature(RegisterAddress.OUTSIDE_TEMP) == 5.2
+    assert snapshot.scaled(RegisterAddress.SCOP) == 4.12
+    assert await client.get_loop_room_target_temp(3) == "Tretji ogrevalni krog je izklopljen."
+
+
+async def test_setpoints_are_clamped(client, simulator):
+    await client.write(RegisterAddress.DHW_TARGET_TEMP, 750)
+    assert simulator[RegisterAddress.DHW_TARGET_TEMP] == 600
+    assert await client.read(RegisterAddress.DHW_CURRENT_TARGET_TEMP, "") == 600
+
+    await client.write(RegisterAddress.LOOP_1_TARGET_ROOM_TEMP, 50)
+    assert simulator[RegisterAddress.LOOP_1_TARGET_ROOM_TEMP] == 100
+
+
+async def test_writes_update_dependent_registers(client, simulator):
+    await client.write(RegisterAddress.LOOP_2_MODE_SELECT, 0)
+    assert simulator[RegisterAddress.LOOP_2_CURRENT_TARGET_ROOM_TEMP] == 5000
+    assert simulator[RegisterAddress.LOOP_2_SCHEDULE_STATUS] == 0
+
+    await client.write(RegisterAddress.SYSTEM_ON, 0)
+    assert simulator[RegisterAddress.SYSTEM_STATUS] == 0
+
+
+async def test_injected_faults(client, simulator):
+    simulator.error_rate = 1.0
+    with pytest.raises(ModbusConnectionError):
+        await client.read_snapshot()
+    assert simulator.errors > 0
+
+    simulator.error_rate, simulator.drop_rate = 0.0, 1.0
+    with pytest.raises(ModbusConnectionError):
+        await client.read_snapshot()
+    assert simulator.dropped > 0
+
+
+async def test_illegal_address(client):
+    result = await client.connection.read_holding_registers(2500, count=1, slave=20)
+    assert result.isError()
+
+
+async def test_other_devices_do_not_answer(client):
+    with pytest.raises(ModbusConnectionError):
+        await client.connection.read_holding_registers(2101, count=1, slave=7)
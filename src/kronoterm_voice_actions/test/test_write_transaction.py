@@ -0,0 +1,81 @@
+# src/kronoterm_voice_actions/test/test_write_transaction.py
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from kronoterm_voice_actions.test.test_register_snapshot import block_response
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+from kronoterm_voice_actions.wyoming.modbus_connection import (
+    ModbusConnection,
+    ModbusConnectionError,
+    RegisterWrite,
+)
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.write_transaction import WriteRun, group_writes
+
+
+def test_group_writes():
+    runs = group_writes({
+        RegisterAddress.PROGRAM_SELECT: 1,
+        RegisterAddress.SYSTEM_ON: 1,
+        RegisterAddress.SYSTEM_TEMP_CORRECTION: 0xFFFB,
+        RegisterAddress.LOOP_1_MODE_SELECT: 2,
+    })
+    assert runs == [WriteRun(2012, (1, 1, 0xFFFB)), WriteRun(2042, (2,))]
+
+    assert group_writes({RegisterAddress.SYSTEM_ON: 1, RegisterAddress.PROGRAM_SELECT: 0}, max_run=1) == [
+        WriteRun(2012, (1,)), WriteRun(2013, (0,)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_transaction_requests():
+    connection = MagicMock()
+    connection.write_register = AsyncMock(return_value=RegisterWrite(None, 2042))
+    connection.write_registers = AsyncMock(return_value=None)
+    connection.read_holding_registers = AsyncMock(
+        side_effect=lambda address, count, slave, priority: block_response(None, address, count, slave)
+    )
+    client = MqttClient(connection=connection)
+    client.cache.put(RegisterAddress.SYSTEM_ON, 0)
+
+    async with client.transaction() as transaction:
+        transaction.write(RegisterAddress.SYSTEM_ON, 2012).write(RegisterAddress.PROGRAM_SELECT, 2013)
+        transaction.write(RegisterAddress.LOOP_1_MODE_SELECT, 2042)
+
+    connection.write_registers.assert_awaited_once_with(2011, [2012, 2013], slave=20)
+    connection.write_register.assert_awaited_once_with(2041, 2042, slave=20, coalesce=False)
+    # One block read verifies all three registers
+    connection.read_holding_registers.assert_awaited_once()
+    assert connection.read_holding_registers.await_args.args == (2011,)
+    assert connection.read_holding_registers.await_args.kwargs["count"] == 31
+    assert transaction.result.ok
+    assert client.cache.get(RegisterAddress.SYSTEM_ON) == 2012
+
+
+@pytest.mark.asyncio
+async def test_transaction_over_the_transport(simulator):
+    connection = ModbusConnection(simulator.url, use_async=True, retries=0, timeout=0.3)
+    client = MqttClient(connection=connection)
+
+    async with client.transaction() as transaction:
+        transaction.write(RegisterAddress.SYSTEM_ON, 0)
+        transaction.write(RegisterAddress.PROGRAM_SELECT, 2)
+        transaction.set_temperature(RegisterAddress.DHW_TARGET_TEMP, 75.0)
+
+    assert simulator[RegisterAddress.SYSTEM_STATUS] == 0
+    assert simulator[RegisterAddress.PROGRAM_MODE] == 2
+    assert transaction.result.rejected == {RegisterAddress.DHW_TARGET_TEMP: 600}
+    assert await client.turn_system_on() == "Vklop sistema uspešen."
+
+    response = await client.turn_loop_on(2, 5.0)
+    assert simulator[RegisterAddress.LOOP_2_MODE_SELECT] == 1
+    assert simulator[RegisterAddress.LOOP_2_TARGET_ROOM_TEMP] == 100
+    assert response.startswith("Izbrana temperatura 5 stopinj je prenizka.")
+    assert response.endswith("Drugi ogrevalni krog vklopljen, želena temperatura prostora nastavljena na 10 stopinj.")
+
+    simulator.error_rate = 1.0
+    with pytest.raises(ModbusConnectionError):
+        await client.transaction().write(RegisterAddress.SYSTEM_ON, 1).commit()
+    connection.close()
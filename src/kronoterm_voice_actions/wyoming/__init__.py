@@ -20,10 +20,14 @@ from .config_flow import (
     ENTRY_TYPE_REMOTE,
 )
 
-from .const import ATTR_SPEAKER, DOMAIN
+from .const import ATTR_SPEAKER, CONF_OPTIMISTIC_RESPONSES, DOMAIN
+from .coordinator import KronotermCoordinator
 from .data import WyomingService
 from .devices import SatelliteDevice
+from .match_executor import MatchExecutor
+from .modbus_connection import WRITE_COALESCING_WINDOW, ModbusConnection
 from .models import DomainDataItem
+from .mqtt_client import MqttClient
 from .websocket_api import async_register_websocket_api
 
 _LOGGER = logging.getLogger(__name__)
@@ -31,6 +35,11 @@ _LOGGER = logging.getLogger(__name__)
 
 CONFIG_SCHEMA = cv.empty_config_schema(DOMAIN)
 
+CUSTOM_AGENT_PLATFORMS = [
+    Platform.CONVERSATION,
+    Platform.SENSOR,
+]
+
 SATELLITE_PLATFORMS = [
     Platform.ASSIST_SATELLITE,
     Platform.BINARY_SENSOR,
@@ -66,11 +75,35 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             entry.entry_id,
         )
 
-        item = DomainDataItem(entry_data=entry.data)
+        connection = ModbusConnection("/dev/ttyUSB0", use_async=True, write_window=WRITE_COALESCING_WINDOW)
+        client = MqttClient(
+            connection=connection,
+            optimistic=entry.options.get(CONF_OPTIMISTIC_RESPONSES, False),
+            create_background_task=hass.async_create_background_task,
+        )
+        coordinator = KronotermCoordinator(hass, client, entry)
+        item = DomainDataItem(
+            entry_data=entry.data,
+            client=client,
+            coordinator=coordinator,
+            match_executor=MatchExecutor(),
+        )
+
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except ConfigEntryNotReady:
+            await item.async_shutdown()
+            raise
+
+        entry.async_on_unload(coordinator.async_start_polling())
+        entry.async_on_unload(entry.add_update_listener(update_listener))
         hass.data[DOMAIN][entry.entry_id] = item
 
+        # The first command would otherwise build the matcher's indexes within its deadline
+        await item.match_executor.warm_up(client.command_grammar)
+
         await hass.config_entries.async_forward_entry_setups(
-            entry, [Platform.CONVERSATION]
+            entry, CUSTOM_AGENT_PLATFORMS
         )
 
         return True
@@ -140,7 +173,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
 
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
-    """Handle options update (currently only relevant for remote services)."""
+    """Reload the entry to apply its changed options."""
     await hass.config_entries.async_reload(entry.entry_id)
 
 
@@ -161,7 +194,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             entry.entry_id,
         )
 
-        platforms_to_unload = {Platform.CONVERSATION}
+        platforms_to_unload = set(CUSTOM_AGENT_PLATFORMS)
 
     elif entry_type == ENTRY_TYPE_REMOTE:
 
@@ -204,6 +237,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         unload_ok = True
 
     if unload_ok:
+        await item.async_shutdown()
         del hass.data[DOMAIN][entry.entry_id]
         if not hass.data[DOMAIN]:
             del hass.data[DOMAIN]
@@ -0,0 +1,176 @@
+"""Counts and times the Modbus transactions on the bus, for diagnostics and the bus sensors."""
+
+import bisect
+import time
+from collections import Counter, deque
+from collections.abc import Callable
+from enum import StrEnum
+from typing import Any
+
+from pymodbus.exceptions import ModbusIOException
+
+from .kronoterm_models import RegisterAddress
+
+# Upper bounds of the latency histogram buckets in milliseconds, the last bucket is unbounded
+LATENCY_BUCKETS_MS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+# Bus utilization is the share of the last this many seconds the bus carried a transaction
+UTILIZATION_WINDOW = 300.0
+
+# Modbus RTU frame sizes in bytes: device id, function code and CRC, plus the function's fields
+_EXCEPTION_RESPONSE_BYTES = 5
+
+
+def frame_bytes(function: str, kwargs: dict[str, Any]) -> tuple[int, int]:
+    """Sizes of the request and of a regular response of a client function, in bytes on the wire."""
+    match function:
+        case "read_holding_registers" | "read_input_registers":
+            return 8, 5 + 2 * kwargs.get("count", 1)
+        case "write_register":
+            return 8, 8
+        case "write_registers":
+            return 9 + 2 * len(kwargs.get("values", ())), 8
+    return 8, 8
+
+
+class Outcome(StrEnum):
+    """How a transaction ended."""
+
+    OK = "ok"
+    TIMEOUT = "timeout"
+    CRC = "crc"
+    EXCEPTION = "exception"
+    ERROR = "error"
+
+    @classmethod
+    def of_error(cls, error: Exception) -> "Outcome":
+        """
+        Classifies a failed request. pymodbus discards RTU frames with a bad CRC and reports the request as
+        unanswered, so CRC errors are counted only where the error names them and otherwise show up as timeouts.
+        """
+        if "CRC" in str(error):
+            return cls.CRC
+        if isinstance(error, ModbusIOException):
+            return cls.TIMEOUT
+        return cls.ERROR
+
+
+class LatencyHistogram:
+    """Latencies counted in the buckets of LATENCY_BUCKETS_MS."""
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        milliseconds = seconds * 1000
+        self.buckets[bisect.bisect_left(self.bounds, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the `q` quantile in milliseconds, the maximum for the last bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean, 2),
+            "p50_ms": round(self.quantile(0.5), 2),
+            "p95_ms": round(self.quantile(0.95), 2),
+            "max_ms": round(self.max, 2),
+            "buckets_ms": dict(zip(labels, self.buckets)),
+        }
+
+
+class BusMetrics:
+    """
+    Transaction counters of one connection: latency on the bus, outcomes, exception codes, retries, bytes on the
+    wire and utilization. Latencies of MqttClient reads and writes per register include the wait for the bus.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.started = clock()
+        self.transactions = 0
+        self.outcomes = dict.fromkeys(Outcome, 0)
+        self.exception_codes: Counter[int] = Counter()
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = LatencyHistogram()
+        self.register_latency: dict[RegisterAddress, LatencyHistogram] = {}
+        self._busy: deque[tuple[float, float]] = deque()
+
+    def record_transaction(
+        self, function: str, kwargs: dict[str, Any], duration: float, outcome: Outcome, exception_code: int | None = None
+    ):
+        request, response = frame_bytes(function, kwargs)
+        self.transactions += 1
+        self.outcomes[outcome] += 1
+        self.bytes_sent += request
+        if outcome is Outcome.OK:
+            self.bytes_received += response
+        elif outcome is Outcome.EXCEPTION:
+            self.bytes_received += _EXCEPTION_RESPONSE_BYTES
+            if exception_code is not None:
+                self.exception_codes[exception_code] += 1
+        self.latency.add(duration)
+
+        now = self._clock()
+        self._busy.append((now, duration))
+        while self._busy and self._busy[0][0] < now - UTILIZATION_WINDOW:
+            self._busy.popleft()
+
+    def record_retry(self):
+        self.retries += 1
+
+    def record_register(self, addr: RegisterAddress, seconds: float):
+        self.register_latency.setdefault(addr, LatencyHistogram()).add(seconds)
+
+    @property
+    def utilization(self) -> float:
+        """Share of the last UTILIZATION_WINDOW seconds, or of the time since the start if shorter, the bus was busy."""
+        now = self._clock()
+        window = min(UTILIZATION_WINDOW, now - self.started)
+        if window <= 0:
+            return 0.0
+        busy = sum(duration for end, duration in self._busy if end >= now - UTILIZATION_WINDOW)
+        return min(busy / window, 1.0)
+
+    @property
+    def errors(self) -> int:
+        return self.transactions - self.outcomes[Outcome.OK]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "transactions": self.transactions,
+            "outcomes": {str(outcome): count for outcome, count in self.outcomes.items()},
+            "exception_codes": dict(self.exception_codes),
+            "retries": self.retries,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "utilization": round(self.utilization, 4),
+            "latency": self.latency.as_dict(),
+            "register_latency": {
+                addr.name: histogram.as_dict()
+                for addr, histogram in sorted(self.register_latency.items(), key=lambda item: item[0].value)
+            },
+        }
@@ -0,0 +1,131 @@
+"""Orders transactions on the half-duplex RS-485 bus by priority."""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+
+# Modbus RTU requires at least 3.5 character times of silence between frames, fixed at 1.75 ms above 19200 baud
+DEFAULT_INTER_FRAME_DELAY = 0.00175
+
+
+class Priority(IntEnum):
+    """Transaction priorities, lower values go first."""
+
+    VOICE_WRITE = 0
+    VOICE_READ = 1
+    POLL = 2
+
+
+@dataclass(eq=False)
+class BusTicket:
+    """Place of a transaction in the queue. Its priority can be raised while it waits, see BusScheduler.promote."""
+
+    priority: Priority
+    waiter: asyncio.Future[None] | None = None
+
+
+@dataclass(frozen=True)
+class BusStats:
+    """Queue depth and time transactions spent waiting for the bus, per priority."""
+
+    depth: int
+    transactions: dict[Priority, int]
+    total_wait: dict[Priority, float]
+    max_wait: dict[Priority, float]
+
+    def mean_wait(self, priority: Priority) -> float:
+        count = self.transactions[priority]
+        return self.total_wait[priority] / count if count else 0.0
+
+
+class BusScheduler:
+    """
+    Grants the bus to one transaction at a time. Waiting transactions are served by priority, in arrival order
+    within a priority, and each one starts at least `inter_frame_delay` seconds after the previous one ended.
+    A waiting transaction can be promoted to a higher priority through its BusTicket.
+    """
+
+    def __init__(self, inter_frame_delay: float = DEFAULT_INTER_FRAME_DELAY):
+        self.inter_frame_delay = inter_frame_delay
+        self.busy = False
+        self.last_wait = 0.0
+        # A promoted ticket is queued again, its entry with the old priority is skipped
+        self._queue: list[tuple[Priority, int, BusTicket]] = []
+        self._sequence = itertools.count()
+        self._released_at = 0.0
+        self._transactions = dict.fromkeys(Priority, 0)
+        self._total_wait = dict.fromkeys(Priority, 0.0)
+        self._max_wait = dict.fromkeys(Priority, 0.0)
+
+    @property
+    def depth(self) -> int:
+        """Transactions waiting for the bus."""
+        return sum(
+            priority == ticket.priority and not ticket.waiter.done() for priority, _, ticket in self._queue
+        )
+
+    @asynccontextmanager
+    async def slot(
+        self, priority: Priority = Priority.VOICE_READ, ticket: BusTicket | None = None
+    ) -> AsyncIterator[None]:
+        """Holds the bus for the duration of the block. With a `ticket` its priority is used instead of `priority`."""
+        ticket = ticket or BusTicket(priority)
+        enqueued = time.monotonic()
+        if self.busy:
+            waiter = ticket.waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._queue, (ticket.priority, next(self._sequence), ticket))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # The bus may have been handed over just before the cancellation
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                raise
+        self.busy = True
+
+        try:
+            silence = self._released_at + self.inter_frame_delay - time.monotonic()
+            if silence > 0:
+                await asyncio.sleep(silence)
+            self._record_wait(ticket.priority, time.monotonic() - enqueued)
+            yield
+        finally:
+            self._released_at = time.monotonic()
+            self._release()
+
+    def promote(self, ticket: BusTicket, priority: Priority):
+        """Raises the priority of a transaction that has not got the bus yet. Lower priorities are ignored."""
+        if priority >= ticket.priority or (ticket.waiter is not None and ticket.waiter.done()):
+            return
+
+        ticket.priority = priority
+        if ticket.waiter is not None:
+            heapq.heappush(self._queue, (priority, next(self._sequence), ticket))
+
+    def _record_wait(self, priority: Priority, wait: float):
+        self.last_wait = wait
+        self._transactions[priority] += 1
+        self._total_wait[priority] += wait
+        self._max_wait[priority] = max(self._max_wait[priority], wait)
+
+    def _release(self):
+        """Hands the bus to the next waiting transaction that was not cancelled."""
+        while self._queue:
+            priority, _, ticket = heapq.heappop(self._queue)
+            if priority == ticket.priority and not ticket.waiter.done():
+                ticket.waiter.set_result(None)
+                return
+        self.busy = False
+
+    def stats(self) -> BusStats:
+        return BusStats(
+            depth=self.depth,
+            transactions=dict(self._transactions),
+            total_wait=dict(self._total_wait),
+            max_wait=dict(self._max_wait),
+        )
@@ -8,14 +8,20 @@ from urllib.parse import urlparse
 
 import voluptuous as vol
 
-from homeassistant.config_entries import SOURCE_HASSIO, ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    SOURCE_HASSIO,
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_PASSWORD, CONF_USERNAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import selector
 from homeassistant.helpers.service_info.hassio import HassioServiceInfo
 from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
 
-from .const import DOMAIN
+from .const import CONF_OPTIMISTIC_RESPONSES, DOMAIN
 from .data import WyomingService
 
 _LOGGER = logging.getLogger(__name__)
@@ -79,6 +85,12 @@ STEP_CUSTOM_AGENT_AUTH_SCHEMA = vol.Schema(
 
 STEP_CONFIRM_SCHEMA = vol.Schema({})
 
+CUSTOM_AGENT_OPTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_OPTIMISTIC_RESPONSES, default=False): selector.BooleanSelector(),
+    }
+)
+
 
 async def _validate_remote_connection(
     hass: HomeAssistant, host: str, port: int
@@ -104,6 +116,18 @@ class WyomingConfigFlow(ConfigFlow, domain=DOMAIN):
     _port: int | None = None
     _discovered_name: str | None = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Get the options flow of the custom agent."""
+        return CustomAgentOptionsFlow()
+
+    @classmethod
+    @callback
+    def async_supports_options_flow(cls, config_entry: ConfigEntry) -> bool:
+        """Only the custom agent has options."""
+        return config_entry.data.get(CONF_TYPE) == ENTRY_TYPE_CUSTOM
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -334,3 +358,21 @@ class WyomingConfigFlow(ConfigFlow, domain=DOMAIN):
             description_placeholders={"name": self._discovered_name},
             data_schema=STEP_CONFIRM_SCHEMA,  # Empty schema, just needs submit
         )
+
+
+class CustomAgentOptionsFlow(OptionsFlow):
+    """Handle the options of the custom Kronoterm conversation agent."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options, the entry is reloaded to apply them."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                CUSTOM_AGENT_OPTIONS_SCHEMA, self.config_entry.options
+            ),
+        )
@@ -9,4 +9,7 @@ SAMPLE_CHANNELS = 1
 # For multi-speaker voices, this is the name of the selected speaker.
 ATTR_SPEAKER = "speaker"
 
-MODBUS_SLAVE_ID = 20
\ No newline at end of file
+MODBUS_SLAVE_ID = 20
+
+# Option of the custom agent entry: answer setpoint commands before the heat pump confirms the value
+CONF_OPTIMISTIC_RESPONSES = "optimistic_responses"
@@ -1,4 +1,5 @@
 import logging
+from functools import partial
 
 from homeassistant.components import conversation
 from homeassistant.config_entries import ConfigEntry
@@ -7,11 +8,15 @@ from homeassistant.const import (
     CONF_USERNAME,
 )
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import intent
 from homeassistant.util import ulid as ulid_util
 
-from .mqtt_client import MqttClient
+from .const import DOMAIN
+from .mqtt_client import MqttClient, follow_up_announcer
 from .matcher import match_command
+from .match_executor import MatchExecutor, MatchTimeoutError
+from .models import DomainDataItem
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -54,6 +59,9 @@ class WyomingConversationEntity(
 
         self._supported_languages = ["sl"]
 
+        # The client, its serial connection and cache, the coordinator and the matcher workers live with the entry
+        self._item: DomainDataItem = hass.data[DOMAIN][config_entry.entry_id]
+
         self._attr_unique_id = f"{config_entry.entry_id}-conversation"
 
         _LOGGER.debug(
@@ -68,16 +76,36 @@ class WyomingConversationEntity(
 
         return self._supported_languages
 
+    async def _async_announce(self, device_id: str, message: str) -> None:
+        """Announces a follow-up to a command on the satellite it came from."""
+        try:
+            await self.hass.services.async_call(
+                "assist_satellite",
+                "announce",
+                {"message": message},
+                target={"device_id": device_id},
+                blocking=True,
+            )
+        except HomeAssistantError:
+            _LOGGER.exception("Announcing on device %s failed: %s", device_id, message)
+
     async def async_process(
         self, user_input: conversation.ConversationInput
     ) -> conversation.ConversationResult:
         """Process user input using the custom matcher."""
         conversation_id = user_input.conversation_id or ulid_util.ulid_now()
         intent_response = intent.IntentResponse(language=user_input.language)
+        # Commands from a satellite may be answered before the heat pump confirms them, see MqttClient.optimistic
+        token = None
+        if user_input.device_id is not None:
+            token = follow_up_announcer.set(partial(self._async_announce, user_input.device_id))
 
         try:
-            response = await execute_command(user_input.text)
+            response = await execute_command(user_input.text, self._item.client, self._item.match_executor)
             intent_response.async_set_speech(response)
+        except MatchTimeoutError:
+            _LOGGER.warning("Matching timed out for: %s", user_input.text)
+            intent_response.async_set_speech("Oprostite, ukaza nisem uspel pravočasno obdelati.")
         except ValueError:
             intent_response.async_set_speech("Oprostite, tega nisem razumel.")
 
@@ -90,14 +118,25 @@ class WyomingConversationEntity(
             return conversation.ConversationResult(
                 response=intent_response, conversation_id=conversation_id
             )
+        finally:
+            if token is not None:
+                follow_up_announcer.reset(token)
 
         return conversation.ConversationResult(
             response=intent_response, conversation_id=conversation_id
         )
 
 
-async def execute_command(text: str) -> str:
-    client = MqttClient()
-    commands = client.map_template_to_function.keys()
-    action, parameter = match_command(text, commands)
-    return await client.invoke_kronoterm_action(action, parameter)
\ No newline at end of file
+async def execute_command(
+    text: str,
+    client: MqttClient | None = None,
+    executor: MatchExecutor | None = None,
+) -> str:
+    """Matches the text to a command and runs it with `client`, a new client on the default port if none is given."""
+    client = client or MqttClient()
+    commands = client.command_grammar
+    if executor is None:
+        action, parameter = match_command(text, commands)
+    else:
+        action, parameter = await executor.match(text, commands)
+    return await client.invoke_kronoterm_action(action, parameter)
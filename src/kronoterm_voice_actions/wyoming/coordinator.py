@@ -0,0 +1,101 @@
+"""Polls the heat pump in the background so voice queries are answered from memory."""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .bus_scheduler import Priority
+from .kronoterm_models import RegisterAddress
+from .modbus_connection import ModbusConnectionError
+from .mqtt_client import MqttClient
+from .register_cache import DEPENDENT_REGISTERS
+from .register_snapshot import RegisterSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 30.0
+DEFAULT_MAX_STALENESS = 90.0
+REQUEST_REFRESH_COOLDOWN = 1.0
+
+
+class KronotermCoordinator(DataUpdateCoordinator[RegisterSnapshot]):
+    """
+    Reads a snapshot of all registers with block reads every `poll_interval` seconds.
+
+    Values are served to MqttClient only while the snapshot is younger than `max_staleness`, older ones are read
+    from the bus again. Writing a register drops it from the snapshot and requests a refresh, which is debounced so
+    a burst of writes costs one poll. The coordinator registers itself as the client's snapshot source. Polling
+    runs while the coordinator has listeners, async_start_polling adds one for MqttClient.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: MqttClient,
+        config_entry: ConfigEntry | None = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        max_staleness: float = DEFAULT_MAX_STALENESS,
+    ) -> None:
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=config_entry,
+            name="Kronoterm heat pump",
+            update_interval=timedelta(seconds=poll_interval),
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=REQUEST_REFRESH_COOLDOWN, immediate=True
+            ),
+        )
+        self.client = client
+        self.max_staleness = max_staleness
+        client.coordinator = self
+
+    async def _async_update_data(self) -> RegisterSnapshot:
+        try:
+            return await self.client.read_snapshot(priority=Priority.POLL)
+        except ModbusConnectionError as e:
+            raise UpdateFailed(f"Reading the heat pump registers failed: {e}") from e
+
+    @callback
+    def async_start_polling(self) -> CALLBACK_TYPE:
+        """
+        Keeps polling for MqttClient, which reads the snapshot without listening to updates, even when no entity
+        listens. Returns the callback that stops it.
+        """
+        return self.async_add_listener(self._async_snapshot_updated)
+
+    @callback
+    def _async_snapshot_updated(self) -> None:
+        """MqttClient reads the snapshot on demand, so there is nothing to update."""
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.data is not None and self.data.age <= self.max_staleness
+
+    def value(self, address: RegisterAddress) -> int | None:
+        """The polled value, or None if the snapshot is missing, too old or lacks the register."""
+        if not self.is_fresh:
+            return None
+        return self.data.values.get(address)
+
+    async def async_ensure_fresh(self, max_age: float | None = None) -> None:
+        """Polls right away unless the snapshot is younger than `max_age` (by default the staleness bound)."""
+        limit = self.max_staleness if max_age is None else max_age
+        if self.data is None or self.data.age > limit:
+            await self.async_refresh()
+
+    def invalidate(self, address: RegisterAddress) -> None:
+        """Drops a written register and its dependent registers, then requests a refresh."""
+        if self.data is None:
+            return
+
+        dropped = {address, *DEPENDENT_REGISTERS.get(address, ())}
+        values = {key: value for key, value in self.data.values.items() if key not in dropped}
+        self.data = RegisterSnapshot(values, taken_at=self.data.taken_at)
+        self.hass.async_create_task(self.async_request_refresh())
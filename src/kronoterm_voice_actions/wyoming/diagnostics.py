@@ -0,0 +1,54 @@
+"""Diagnostics for Wyoming."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .models import DomainDataItem
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry, with the Modbus bus statistics of the custom agent."""
+    item: DomainDataItem | None = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    diagnostics: dict[str, Any] = {"entry_data": async_redact_data(dict(entry.data), TO_REDACT)}
+    if item is None or item.client is None:
+        return diagnostics
+
+    connection = item.client.connection
+    scheduler = connection.scheduler.stats()
+    cache = item.client.cache.stats()
+    diagnostics["connection"] = {
+        "port": connection.port,
+        "is_open": connection.is_open,
+        "opened": connection.opened_count,
+        "failures": connection.failure_count,
+        "coalesced_reads": connection.coalesced_count,
+        "coalesced_writes": connection.coalesced_write_count,
+    }
+    diagnostics["bus"] = connection.metrics.as_dict()
+    diagnostics["scheduler"] = {
+        "depth": scheduler.depth,
+        "transactions": {priority.name: count for priority, count in scheduler.transactions.items()},
+        "mean_wait_ms": {
+            priority.name: round(scheduler.mean_wait(priority) * 1000, 2) for priority in scheduler.transactions
+        },
+        "max_wait_ms": {priority.name: round(wait * 1000, 2) for priority, wait in scheduler.max_wait.items()},
+    }
+    diagnostics["cache"] = asdict(cache) | {"hit_rate": round(cache.hit_rate, 4)}
+
+    if (coordinator := item.coordinator) is not None:
+        diagnostics["coordinator"] = {
+            "last_update_success": coordinator.last_update_success,
+            "snapshot_age": round(coordinator.data.age, 1) if coordinator.data is not None else None,
+            "registers": len(coordinator.data) if coordinator.data is not None else 0,
+        }
+    return diagnostics
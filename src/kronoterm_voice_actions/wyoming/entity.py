@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers import entity
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
+from .coordinator import KronotermCoordinator
 from .devices import SatelliteDevice
 
 
@@ -23,3 +26,19 @@ class WyomingSatelliteEntity(entity.Entity):
             identifiers={(DOMAIN, device.satellite_id)},
             entry_type=DeviceEntryType.SERVICE,
         )
+
+
+class KronotermEntity(CoordinatorEntity[KronotermCoordinator]):
+    """Entity of the Kronoterm heat pump, updated with every poll of the coordinator."""
+
+    _attr_has_entity_name = True
+
+    def __init__(self, coordinator: KronotermCoordinator, config_entry: ConfigEntry) -> None:
+        """Initialize entity."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{config_entry.entry_id}-{self.entity_description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.entry_id)},
+            manufacturer="Kronoterm",
+            name="Kronoterm heat pump",
+        )
@@ -0,0 +1,204 @@
+"""
+Command grammar with slots.
+
+A rule pattern may contain one slot in braces, e.g. "izklopi {loop_nom} ogrevalni krog". The braces name the form
+of the slot word, so the pattern covers every value of the slot ("izklopi prvi ogrevalni krog", "izklopi drugi ...").
+The matcher scores utterances against the skeletons, patterns with the slot replaced by its placeholder, then resolves
+the slot from the word the user said. When that word is too garbled to recognise, the slot value is the one whose
+concrete template is most similar to the utterance.
+"""
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from functools import cached_property
+from string import Formatter
+from typing import Any
+
+from .scorer import DifflibScorer, RapidfuzzScorer
+
+
+@dataclass(frozen=True)
+class Slot:
+    """
+    A slot filled by one word. `forms` maps the form name used in patterns to the word for every value,
+    `aliases` are further words recognised for a value (digits, common transcription variants).
+    """
+
+    name: str
+    values: tuple[int, ...]
+    forms: tuple[tuple[str, tuple[str, ...]], ...]
+    aliases: tuple[tuple[str, int], ...] = ()
+
+    @property
+    def placeholder(self) -> str:
+        return f"<{self.name}>"
+
+    def word(self, form: str, value: int) -> str:
+        """The word for the value in the given form."""
+        return dict(self.forms)[form][self.values.index(value)]
+
+    @cached_property
+    def vocabulary(self) -> dict[str, int]:
+        """Every recognised word mapped to its value."""
+        words = {word: value for _, words in self.forms for word, value in zip(words, self.values)}
+        words.update(self.aliases)
+        return words
+
+
+LOOP_SLOT = Slot(
+    name="loop",
+    values=(1, 2, 3, 4),
+    forms=(
+        ("loop", ("ena", "dva", "tri", "štiri")),
+        ("loop_nom", ("prvi", "drugi", "tretji", "četrti")),
+        ("loop_gen", ("prvega", "drugega", "tretjega", "četrtega")),
+        ("loop_loc", ("prvem", "drugem", "tretjem", "četrtem")),
+    ),
+    aliases=(("1", 1), ("2", 2), ("3", 3), ("4", 4)),
+)
+
+
+@dataclass(frozen=True)
+class Command:
+    """Handler of a concrete template together with the slot values it is called with."""
+
+    handler: Callable[..., Any]
+    args: tuple[int, ...] = ()
+
+    @property
+    def label(self) -> str:
+        """Handler name with its slot arguments, e.g. set_loop_operating_mode(2, 1)."""
+        if not self.args:
+            return self.handler.__name__
+        return f"{self.handler.__name__}({', '.join(map(str, self.args))})"
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    A pattern dispatched to a handler. Slot values are passed to the handler first, followed by `args`
+    and the temperature.
+    """
+
+    pattern: str
+    handler: Callable[..., Any]
+    args: tuple[int, ...] = ()
+
+    @cached_property
+    def form(self) -> str | None:
+        """Name of the slot form in the pattern, None if the pattern has no slot."""
+        fields = [field for _, field, _, _ in Formatter().parse(self.pattern) if field is not None]
+        if len(fields) > 1:
+            raise ValueError(f"Pattern '{self.pattern}' has more than one slot")
+
+        return fields[0] if fields else None
+
+
+class Grammar:
+    """
+    Rules compiled into skeletons to match against and the concrete templates they expand to.
+    Grammars compare equal when their rules and slots do, so a grammar can be a cache key and can be sent to worker
+    processes.
+    """
+
+    slot_similarity = 0.86
+    word_cache_size = 4096
+
+    def __init__(self, rules: Mapping[str, Callable[..., Any] | tuple], slots: tuple[Slot, ...] = (LOOP_SLOT,)):
+        self.rules = tuple(
+            Rule(pattern, *target) if isinstance(target, tuple) else Rule(pattern, target)
+            for pattern, target in rules.items()
+        )
+        self.slots = slots
+        self.slot_by_form = {form: slot for slot in slots for form, _ in slot.forms}
+
+        self.word_cache: dict[str, dict[str, tuple[Slot, int] | None]] = {}
+        self.skeletons: dict[str, Rule] = {}
+        self.commands: dict[str, Command] = {}
+        self.expansions: dict[str, dict[str, int]] = {}
+        for rule in self.rules:
+            skeleton = self.skeleton(rule)
+            if skeleton in self.skeletons:
+                raise ValueError(f"Patterns '{self.skeletons[skeleton].pattern}' and '{rule.pattern}' are the same")
+            self.skeletons[skeleton] = rule
+
+            if rule.form is None:
+                self.commands[rule.pattern] = Command(rule.handler, rule.args)
+                continue
+
+            slot = self.slot_by_form[rule.form]
+            self.expansions[skeleton] = {}
+            for value in slot.values:
+                template = rule.pattern.format(**{rule.form: slot.word(rule.form, value)})
+                self.commands[template] = Command(rule.handler, (value, *rule.args))
+                self.expansions[skeleton][template] = value
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Grammar) and (self.rules, self.slots) == (other.rules, other.slots)
+
+    def __hash__(self) -> int:
+        return hash((self.rules, self.slots))
+
+    def __len__(self) -> int:
+        return len(self.skeletons)
+
+    def skeleton(self, rule: Rule) -> str:
+        if rule.form is None:
+            return rule.pattern
+        return rule.pattern.format(**{rule.form: self.slot_by_form[rule.form].placeholder})
+
+    @cached_property
+    def vocabulary(self) -> dict[str, tuple[Slot, int]]:
+        """Every slot word mapped to its slot and value."""
+        return {word: (slot, value) for slot in self.slots for word, value in slot.vocabulary.items()}
+
+    def lookup(self, word: str, scorer: DifflibScorer | RapidfuzzScorer) -> tuple[Slot, int] | None:
+        """The slot and value of the word, found by fuzzy matching against the slot words."""
+        cache = self.word_cache.get(scorer.name)
+        if cache is None:
+            cache = self.word_cache[scorer.name] = dict(self.vocabulary)
+
+        if word in cache:
+            return cache[word]
+
+        match = scorer.extract_one(word, list(self.vocabulary), self.slot_similarity)
+        found = None if match is None else self.vocabulary[match[0]]
+        if len(cache) < self.word_cache_size:
+            cache[word] = found
+
+        return found
+
+    def resolve(self, text: str, scorer: DifflibScorer | RapidfuzzScorer) -> tuple[str, dict[str, int]]:
+        """
+        Replaces the first word of every slot in the text with the slot placeholder.
+        Returns the text and the value of every slot found.
+        """
+        words = text.split()
+        values: dict[str, int] = {}
+        for i, word in enumerate(words):
+            found = self.lookup(word, scorer)
+            if found is None or found[0].name in values:
+                continue
+
+            slot, value = found
+            values[slot.name] = value
+            words[i] = slot.placeholder
+
+        return " ".join(words), values
+
+    def expand(
+        self, skeleton: str, values: Mapping[str, int], text: str, scorer: DifflibScorer | RapidfuzzScorer
+    ) -> str:
+        """
+        The concrete template of the skeleton for the resolved slot values. If the slot of the skeleton was not
+        resolved, the concrete template most similar to the text is returned.
+        """
+        rule = self.skeletons[skeleton]
+        if rule.form is None:
+            return skeleton
+
+        slot = self.slot_by_form[rule.form]
+        if slot.name in values:
+            return rule.pattern.format(**{rule.form: slot.word(rule.form, values[slot.name])})
+
+        return scorer.extract_one(text, list(self.expansions[skeleton]), cutoff=0.0)[0]
@@ -155,3 +155,51 @@ class RegisterAddress(Enum):
 
     COP                                  = 2371  # COP [×0.01]
     SCOP                                 = 2372  # SCOP [×0.01]
+
+
+@dataclass(frozen=True)
+class HeatingLoop:
+    """Registers of one heating loop and its ordinal number in Slovenian, used in the spoken responses."""
+    ordinal: str  # imenovalnik, "prvi"
+    ordinal_genitive: str  # rodilnik, "prvega"
+    target_room_temp: RegisterAddress
+    current_target_room_temp: RegisterAddress
+    mode_select: RegisterAddress
+    schedule_status: RegisterAddress
+    temp_sensor: RegisterAddress
+
+
+HEATING_LOOPS = {
+    1: HeatingLoop(
+        "prvi", "prvega",
+        RegisterAddress.LOOP_1_TARGET_ROOM_TEMP,
+        RegisterAddress.LOOP_1_CURRENT_TARGET_ROOM_TEMP,
+        RegisterAddress.LOOP_1_MODE_SELECT,
+        RegisterAddress.LOOP_1_SCHEDULE_STATUS,
+        RegisterAddress.LOOP_1_TEMP_SENSOR,
+    ),
+    2: HeatingLoop(
+        "drugi", "drugega",
+        RegisterAddress.LOOP_2_TARGET_ROOM_TEMP,
+        RegisterAddress.LOOP_2_CURRENT_TARGET_ROOM_TEMP,
+        RegisterAddress.LOOP_2_MODE_SELECT,
+        RegisterAddress.LOOP_2_SCHEDULE_STATUS,
+        RegisterAddress.LOOP_2_TEMP_SENSOR,
+    ),
+    3: HeatingLoop(
+        "tretji", "tretjega",
+        RegisterAddress.LOOP_3_ROOM_TARGET_TEMP,
+        RegisterAddress.LOOP_3_TARGET_ROOM_TEMP,
+        RegisterAddress.LOOP_3_MODE_SELECT,
+        RegisterAddress.LOOP_3_SCHEDULE_STATUS,
+        RegisterAddress.LOOP_3_TEMP_SENSOR,
+    ),
+    4: HeatingLoop(
+        "četrti", "četrtega",
+        RegisterAddress.LOOP_4_ROOM_TARGET_TEMP,
+        RegisterAddress.LOOP_4_TARGET_ROOM_TEMP,
+        RegisterAddress.LOOP_4_MODE_SELECT,
+        RegisterAddress.LOOP_4_SCHEDULE_STATUS,
+        RegisterAddress.LOOP_4_TEMP_SENSOR,
+    ),
+}
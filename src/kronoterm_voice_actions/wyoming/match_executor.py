@@ -0,0 +1,121 @@
+"""Runs the command matcher in a worker pool so fuzzy matching never blocks the Home Assistant event loop."""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from .grammar import Grammar
+from .matcher import get_lexicon, match_command
+from .scorer import get_scorer
+
+_LOGGER = logging.getLogger(__name__)
+
+# Deadline of a warm match, which takes a few milliseconds on x86 and tens of milliseconds on a Raspberry Pi class
+# host. Building the command index and the numeral lexicon takes far longer, warm_up does it before the first command.
+DEFAULT_MATCH_TIMEOUT = 0.5
+
+# Utterance matched by warm_up, a temperature command so numeral parsing is warmed up as well
+WARM_UP_TEXT = "nastavi temperaturo sanitarne vode na petinštirideset stopinj"
+
+
+class MatchTimeoutError(TimeoutError):
+    """The matcher did not produce a result before the request deadline."""
+
+
+@dataclass(frozen=True)
+class MatchTiming:
+    """Where the time of a single match request went."""
+
+    queued: float
+    compute: float
+
+    @property
+    def total(self) -> float:
+        return self.queued + self.compute
+
+
+def timed_match(
+    text: str, commands: tuple[str, ...] | Grammar, scorer_name: str | None, submitted: float
+) -> tuple[tuple[str, float | None] | None, float, float]:
+    """
+    Worker side of a match request. Returns the match together with the time the request waited in the queue
+    and the time spent matching. time.monotonic is used since it is comparable across worker processes.
+    The scorer is passed by name so worker processes keep hitting their own compiled index cache.
+    """
+    started = time.monotonic()
+    match = match_command(text, commands, get_scorer(scorer_name))
+    return match, started - submitted, time.monotonic() - started
+
+
+def prepare_matcher(commands: tuple[str, ...] | Grammar, scorer_name: str | None) -> float:
+    """Worker side of warm_up. Builds the numeral lexicon and the command index, returns the time it took."""
+    started = time.monotonic()
+    scorer = get_scorer(scorer_name)
+    get_lexicon(scorer)
+    match_command(WARM_UP_TEXT, commands, scorer)
+    return time.monotonic() - started
+
+
+class MatchExecutor:
+    """
+    Dedicated pool for command matching with a per-request deadline.
+    A thread pool is used by default. The matcher mostly runs C code when rapidfuzz is installed, while the difflib
+    fallback holds the GIL, so `use_processes` moves the work into separate processes instead.
+
+    A request that overruns its deadline keeps running in its worker, so there are two workers by default and the
+    next request does not queue behind it. Call warm_up before the first request, which would otherwise build the
+    matcher's indexes within its deadline.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        timeout: float = DEFAULT_MATCH_TIMEOUT,
+        use_processes: bool = False,
+        scorer_name: str | None = None,
+    ):
+        self.timeout = timeout
+        self.scorer_name = scorer_name
+        self._executor: Executor
+        if use_processes:
+            self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kronoterm_matcher")
+
+    async def warm_up(self, commands: tuple[str, ...] | Grammar) -> None:
+        """
+        Builds the command index and the numeral lexicon in the pool, without a deadline. With `use_processes` only
+        the process running it is warmed up, the others build their indexes on their first request.
+        """
+        loop = asyncio.get_running_loop()
+        elapsed = await loop.run_in_executor(self._executor, prepare_matcher, commands, self.scorer_name)
+        _LOGGER.debug("Warmed up the matcher in %.1f ms", elapsed * 1000)
+
+    async def match(self, text: str, commands: tuple[str, ...] | Grammar) -> tuple[str, float | None] | None:
+        """
+        Matches the text in the pool. Raises MatchTimeoutError if no result arrives within the timeout.
+        A request still waiting in the queue at the deadline is cancelled, a running one finishes in the background.
+        """
+        match, _ = await self.match_timed(text, commands)
+        return match
+
+    async def match_timed(
+        self, text: str, commands: tuple[str, ...] | Grammar
+    ) -> tuple[tuple[str, float | None] | None, MatchTiming]:
+        """Like match, but also returns where the time of the request went."""
+        loop = asyncio.get_running_loop()
+        submitted = time.monotonic()
+        future = loop.run_in_executor(self._executor, timed_match, text, commands, self.scorer_name, submitted)
+        try:
+            match, queued, compute = await asyncio.wait_for(future, self.timeout)
+        except TimeoutError as e:
+            raise MatchTimeoutError(f"Matching '{text}' took longer than {self.timeout:.3f}s") from e
+
+        _LOGGER.debug("Matched '%s' in %.1f ms (queued %.1f ms)", text, compute * 1000, queued * 1000)
+        return match, MatchTiming(queued=queued, compute=compute)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stops the workers, cancelling queued requests. With `wait` running requests are waited for."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -1,6 +1,20 @@
 ﻿import re
-import difflib
+import threading
+from collections import Counter, OrderedDict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple
+
+from .grammar import Grammar
+from .ngram_index import NgramIndex, ShortlistStats
+from .scorer import DifflibScorer, RapidfuzzScorer, get_scorer
+
+if TYPE_CHECKING:
+    import numpy as np
+
+Scorer = DifflibScorer | RapidfuzzScorer
 
 number_words = {
     "eno": 1,
@@ -37,10 +51,16 @@ compound_number_words = {
     "devetdeset": 90,
 }
 
-floating_point_words = {
+direct_similarity = 0.86
+compound_similarity = 0.7
+
+number_words_list = list(number_words)
+compound_number_words_list = list(compound_number_words)
+
+floating_point_words = (
     "celih",
     "cela",
-}
+)
 
 digit_to_text = {
     "1": "ena",
@@ -54,6 +74,11 @@ digit_to_text = {
 }
 
 
+strip_exclamations = str.maketrans('', '', "!?")
+strip_separators = str.maketrans('', '', ",.")
+strip_punctuation = str.maketrans('', '', ",.!?")
+
+
 def find_last_number(text: str) -> str | None:
     matches = re.findall(r'\d+(?:\.\d+)?', text)
     if not matches:
@@ -92,7 +117,7 @@ def includes_temperature(text: str, ensured_similarity: float = 0.65) -> bool:
     """
     Checks if the text includes a temperature command.
     """
-    if "°C" in text:
+    if "°c" in text.lower():
         return True
 
     words = text.lower().split()
@@ -105,10 +130,11 @@ def get_similarity(a: str, b: str) -> float:
     return SequenceMatcher(None, a, b).ratio()
 
 
-def insert_dots_for_floats(words: list[str]) -> list[str]:
+def insert_dots_for_floats(words: list[str], scorer: Scorer | None = None) -> list[str]:
+    scorer = scorer or get_scorer()
     for i in range(len(words)):
         word = words[i]
-        match = difflib.get_close_matches(word, floating_point_words, n=1, cutoff=0.79)
+        match = scorer.extract_one(word, floating_point_words, cutoff=0.79)
         if match:
             words[i] = "."
 
@@ -154,14 +180,14 @@ def slovenian_word_to_number_strict(word) -> str | None:
     if word.isdigit():
         return str(get_float(word))
 
-    word = word.translate(str.maketrans('', '', "!?"))
+    word = word.translate(strip_exclamations)
     if get_float(word) is not None:
         return str(get_float(word))
 
     if word.isdigit():
         return str(get_float(word))
 
-    word = word.translate(str.maketrans('', '', ",."))
+    word = word.translate(strip_separators)
     if word.isdigit():
         return str(get_float(word))
 
@@ -182,29 +208,27 @@ def slovenian_word_to_number_strict(word) -> str | None:
     return None
 
 
-def slovenian_word_to_number(word) -> str | None:
-    """Converts a Slovenian number word to its digit equivalent, allowing for slight typos."""
-
-    word = word.translate(str.maketrans('', '', ",.!?"))
-    if len(word) < 3:
-        return None
-
-    direct_similarity = 0.86
-    match = difflib.get_close_matches(word, number_words.keys(), n=1, cutoff=direct_similarity)
+def direct_word_to_number(word: str, scorer: Scorer) -> str | None:
+    """Matches the whole word to a unit or tens number word."""
+    match = scorer.extract_one(word, number_words_list, cutoff=direct_similarity)
     if match:
         return str(float(number_words[match[0]]))
 
-    match = difflib.get_close_matches(word, compound_number_words.keys(), n=1, cutoff=direct_similarity)
+    match = scorer.extract_one(word, compound_number_words_list, cutoff=direct_similarity)
     if match:
         return str(float(compound_number_words[match[0]]))
 
-    compound_similarity = 0.7
+    return None
+
+
+def compound_word_to_number(word: str, scorer: Scorer) -> str | None:
+    """Matches the end of the word to a tens number word and its beginning to a unit number word."""
     best_suff = (0.0, None, None)
     for tens_word in compound_number_words.keys():
         L = len(tens_word)
         for suffix_len in range(max(1, L - 2), L + 3):
             suffix = word[-suffix_len:]
-            sim = get_similarity(suffix, tens_word)
+            sim = scorer.similarity(suffix, tens_word, cutoff=max(compound_similarity, best_suff[0]))
             if sim >= compound_similarity and sim > best_suff[0]:
                 best_suff = (sim, tens_word, suffix)
 
@@ -218,7 +242,7 @@ def slovenian_word_to_number(word) -> str | None:
         L = len(number_word)
         for prefix_len in range(max(3, L - 2), L + 3):
             prefix = remainder[:prefix_len]
-            sim = get_similarity(prefix, number_word)
+            sim = scorer.similarity(prefix, number_word, cutoff=max(compound_similarity, best_pref[0]))
             if sim >= compound_similarity and sim > best_pref[0]:
                 best_pref = (sim, number_word, prefix)
 
@@ -229,8 +253,234 @@ def slovenian_word_to_number(word) -> str | None:
     return str(float(number_words[number_word] + compound_number_words[tens_word]))
 
 
-def replace_numbers_with_digits(text: str) -> str:
-    """Replaces Slovenian number words in the text with their digit equivalents"""
+def slovenian_word_to_number_scan(word, scorer: Scorer | None = None) -> str | None:
+    """Reference implementation of slovenian_word_to_number that compares the word with every number word."""
+    scorer = scorer or get_scorer()
+
+    word = word.translate(strip_punctuation)
+    if len(word) < 3:
+        return None
+
+    return direct_word_to_number(word, scorer) or compound_word_to_number(word, scorer)
+
+
+def deletion_neighbourhood(word: str) -> set[str]:
+    """All strings obtained by deleting one character of the word."""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+class NumeralLexicon:
+    """
+    Precomputed fuzzy lookup table for slovenian_word_to_number.
+
+    Holds every unit, tens and compound numeral up to 99 and its deletion neighbourhood (each form with one letter
+    dropped, the most common transcription error), resolved once with the reference scan, so these words resolve in
+    a single dict lookup with exactly the same 0.86/0.7 similarity semantics. Any other word is resolved with the
+    reference scan and kept in a least recently used memo of `max_entries` words, so the words of a long-running
+    instance keep being remembered. Before the expensive compound scan the word is rejected if its last letters
+    cannot share enough characters with any tens word to reach the 0.7 similarity, which is an exact bound for both
+    scorers.
+    """
+
+    def __init__(self, scorer: Scorer, max_entries: int = 4096):
+        self.scorer = scorer
+        self.tens_counts = [(len(tens_word), tuple(Counter(tens_word).items())) for tens_word in compound_number_words]
+        self.window = max(length for length, _ in self.tens_counts) + 2
+        self.entries: dict[str, str | None] = {}
+        for form in numeral_forms():
+            self.entries[form] = self.resolve(form)
+            for variant in deletion_neighbourhood(form):
+                if len(variant) >= 3 and variant not in self.entries:
+                    self.entries[variant] = self.resolve(variant)
+
+        self.max_entries = max_entries
+        self.memo: OrderedDict[str, str | None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, word: str) -> str | None:
+        """Converts a number word (without punctuation, at least 3 characters long) to its digit equivalent."""
+        try:
+            return self.entries[word]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if word in self.memo:
+                self.memo.move_to_end(word)
+                return self.memo[word]
+
+        number = self.resolve(word)
+        with self._lock:
+            self.memo[word] = number
+            if len(self.memo) > self.max_entries:
+                self.memo.popitem(last=False)
+
+        return number
+
+    def resolve(self, word: str) -> str | None:
+        number = direct_word_to_number(word, self.scorer)
+        if number is not None or not self.may_end_with_tens(word):
+            return number
+
+        return compound_word_to_number(word, self.scorer)
+
+    def may_end_with_tens(self, word: str) -> bool:
+        """
+        False if no suffix of the word can reach the compound similarity with any tens word.
+        The similarity 2 * M / (|suffix| + |tens|) needs M matching characters, and M is at most the number of
+        characters the tens word shares with the longest suffix that is compared.
+        """
+        window = Counter(word[-self.window:])
+        for length, counts in self.tens_counts:
+            shortest = min(length - 2, len(word))
+            required = (7 * (shortest + length) + 19) // 20  # ceil(0.35 * (|suffix| + |tens|))
+            shared = 0
+            for char, count in counts:
+                available = window.get(char)
+                if available:
+                    shared += min(available, count)
+            if shared >= required:
+                return True
+
+        return False
+
+
+def numeral_forms() -> Iterator[str]:
+    """Every unit, tens and compound ("petindvajset") number word up to 99."""
+    yield from number_words
+    yield from compound_number_words
+    for tens_word in compound_number_words:
+        for unit_word, value in number_words.items():
+            if value < 10:
+                yield f"{unit_word}in{tens_word}"
+
+
+@lru_cache(maxsize=4)
+def get_lexicon(scorer: Scorer) -> NumeralLexicon:
+    """Returns the numeral lexicon for the scorer, building it on first use."""
+    return NumeralLexicon(scorer)
+
+
+def slovenian_word_to_number(word, scorer: Scorer | None = None) -> str | None:
+    """Converts a Slovenian number word to its digit equivalent, allowing for slight typos."""
+    word = word.translate(strip_punctuation)
+    if len(word) < 3:
+        return None
+
+    return get_lexicon(scorer or get_scorer()).lookup(word)
+
+
+class NumeralToken(NamedTuple):
+    """A word of the utterance after numeral recognition."""
+
+    text: str
+    value: float | None  # None for words that are not numbers
+    is_in: bool = False  # the conjunction "in" joining "pet in dvajset"
+
+
+@lru_cache(maxsize=1024)
+def classify_word(word: str, scorer: Scorer) -> NumeralToken:
+    """Recognizes a single word: number words become digits, words similar to "celih" become a decimal dot."""
+    number = slovenian_word_to_number_strict(word)
+    if number is not None:
+        word = number
+
+    number = slovenian_word_to_number(word, scorer)
+    if number is not None:
+        word = number
+
+    if is_float(word):
+        return NumeralToken(word, get_float(word))
+
+    if scorer.extract_one(word, floating_point_words, cutoff=0.79):
+        return NumeralToken(".", None, word == "in")
+
+    return NumeralToken(word, None, word == "in")
+
+
+def merge_sum_tokens(tokens: Iterator[NumeralToken]) -> Iterator[NumeralToken]:
+    """Streaming merge_numbers: <number> in <number> becomes their sum ("pet in dvajset" -> 25)."""
+    first = conjunction = None
+    for token in tokens:
+        if first is None:
+            if token.value is not None:
+                first = token
+            else:
+                yield token
+        elif conjunction is None:
+            if token.is_in:
+                conjunction = token
+            elif token.value is not None:
+                yield first
+                first = token
+            else:
+                yield first
+                yield token
+                first = None
+        else:
+            if token.value is not None:
+                total = first.value + token.value
+                yield NumeralToken(str(total), total)
+            else:
+                yield first
+                yield conjunction
+                yield token
+            first = conjunction = None
+
+    if first is not None:
+        yield first
+    if conjunction is not None:
+        yield conjunction
+
+
+def merge_decimal_tokens(tokens: Iterator[NumeralToken]) -> Iterator[NumeralToken]:
+    """Streaming merge_floats: <number> . <number> becomes a decimal number ("dve celih pet" -> 2.5)."""
+    whole = separator = None
+    for token in tokens:
+        if whole is None:
+            if token.value is not None:
+                whole = token
+            else:
+                yield token
+        elif separator is None:
+            if token.text == "." or token.text == ",":
+                separator = token
+            elif token.value is not None:
+                yield whole
+                whole = token
+            else:
+                yield whole
+                yield token
+                whole = None
+        else:
+            if token.value is not None:
+                merged = f"{int(whole.value)}.{int(token.value)}"
+                yield NumeralToken(merged, float(merged))
+            else:
+                yield whole
+                yield separator
+                yield token
+            whole = separator = None
+
+    if whole is not None:
+        yield whole
+    if separator is not None:
+        yield separator
+
+
+def replace_numbers_with_digits(text: str, scorer: Scorer | None = None) -> str:
+    """
+    Replaces Slovenian number words in the text with their digit equivalents.
+    Single left-to-right scan: every word is recognized once (memoized in classify_word) and streamed through
+    the "in" and decimal merges, which only hold back the few words they still need to decide.
+    """
+    scorer = scorer or get_scorer()
+    tokens = (classify_word(word, scorer) for word in text.lower().split())
+    return ' '.join(token.text for token in merge_decimal_tokens(merge_sum_tokens(tokens)))
+
+
+def replace_numbers_with_digits_multipass(text: str, scorer: Scorer | None = None) -> str:
+    """Reference implementation of replace_numbers_with_digits that rebuilds the word list for every step."""
     words = text.lower().split()
     new_words = []
     for word in words:
@@ -242,14 +492,14 @@ def replace_numbers_with_digits(text: str) -> str:
 
     words = []
     for word in new_words:
-        number = slovenian_word_to_number(word)
+        number = slovenian_word_to_number(word, scorer)
         if number is None:
             words.append(word)
         else:
             words.append(number)
 
     words = merge_numbers(words)
-    words = insert_dots_for_floats(words)
+    words = insert_dots_for_floats(words, scorer)
     words = merge_floats(words)
     return ' '.join(words)
 
@@ -264,17 +514,26 @@ def insert_numbers_back(text: str) -> str:
     return ' '.join(words)
 
 def sanitize_text(text: str) -> str:
-    text = text.replace("°C", "")
+    text = text.replace("°C", "").replace("°c", "")
     if text.endswith("."):
         text = text[:-1]
 
     return text
 
-def match_command(text: str, commands: list[str]) -> tuple[str, float | None]:
+def normalize_text(text: str) -> str:
+    """Lowercases the text and collapses all whitespace to single spaces."""
+    return " ".join(text.lower().split())
+
+
+def prepare_text(text: str, scorer: Scorer | None = None) -> tuple[str, str | None]:
+    """
+    Rewrites the spoken numbers in a temperature command and replaces the temperature with a placeholder.
+    Returns the processed text and the extracted temperature (None if the text is not a temperature command).
+    """
     temperature = None
     if includes_temperature(text):
         text = sanitize_text(text)
-        text = replace_numbers_with_digits(text)
+        text = replace_numbers_with_digits(text, scorer)
         temperature = find_last_number(text)
         if temperature is None:
             raise ValueError
@@ -282,13 +541,321 @@ def match_command(text: str, commands: list[str]) -> tuple[str, float | None]:
         text = text.replace(temperature, "<temperature>")
 
     text = insert_numbers_back(text)
-    print(f"Processed text: {text}")
-    match = difflib.get_close_matches(text, commands, n=1, cutoff=0.65)
-    if not match:
-        raise ValueError
+    return text, temperature
+
+
+@dataclass(frozen=True)
+class CacheInfo:
+    """Hit/miss counters of a MatchCache."""
+
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+
+class MatchCache:
+    """Bounded LRU cache of match results, keyed on the normalized transcript."""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[str, float | None] | None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[bool, tuple[str, float | None] | None]:
+        """Returns (True, result) on a hit and (False, None) on a miss. A cached result of None means no match."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._entries[key]
+
+    def put(self, key: str, result: tuple[str, float | None] | None):
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drops all entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(hits=self.hits, misses=self.misses, size=len(self._entries), maxsize=self.maxsize)
+
+
+@dataclass(frozen=True)
+class BatchMatch:
+    """
+    Results of matching a batch of utterances, one array element per utterance.
+    Template ids index CommandIndex.templates, the skeletons when matching a grammar.
+    Utterances without a match have action None, template id -1 and parameter NaN. With rapidfuzz their score is still
+    the best one found, so the cutoff can be tuned on the results. The difflib fallback stops scoring below the cutoff
+    and reports 0, as do temperature commands whose temperature could not be parsed.
+    """
+
+    actions: "np.ndarray"
+    template_ids: "np.ndarray"
+    parameters: "np.ndarray"
+    scores: "np.ndarray"
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+
+class CommandIndex:
+    """
+    Command templates compiled once, so they can be matched against many utterances.
+
+    Holds the normalized templates together with their token lists, lengths and character counts. For scorers that
+    are expensive per template (difflib) a character trigram index first shortlists the `shortlist_size` templates
+    sharing the most trigrams with the utterance, so the cost of fuzzy scoring does not grow with the number of
+    templates (None scores every template). rapidfuzz scores a whole list faster than the shortlist is built, so it
+    skips this step.
+    With the difflib scorer the lengths and character counts give the same upper bounds difflib uses internally, so
+    most candidates are rejected without running the full SequenceMatcher. Other scorers score the candidates in
+    one extract_one call.
+
+    Results are kept in an LRU cache of `cache_size` entries keyed on the normalized utterance, so repeated commands
+    skip the numeral rewriting and fuzzy scoring. The cache is cleared whenever the template set changes.
+
+    Given a Grammar the index holds its skeletons instead of every concrete template. The slot word of the utterance
+    is replaced with the slot placeholder before scoring, and the matched skeleton is expanded back to the concrete
+    template for the resolved slot value.
+    """
+
+    def __init__(
+        self,
+        commands: Iterable[str] | Grammar,
+        cutoff: float = 0.65,
+        scorer: Scorer | None = None,
+        shortlist_size: int | None = 24,
+        cache_size: int = 128,
+    ):
+        self.cutoff = cutoff
+        self.scorer = scorer or get_scorer()
+        self.shortlist_size = shortlist_size
+        self.cache = MatchCache(cache_size)
+        self._compile(commands)
+
+    def _compile(self, commands: Iterable[str] | Grammar):
+        self.grammar = commands if isinstance(commands, Grammar) else None
+        self.templates = list(commands.skeletons if self.grammar is not None else commands)
+        self.normalized = [normalize_text(template) for template in self.templates]
+        self.by_normalized = dict(zip(self.normalized, self.templates))
+        self.tokens = [template.split() for template in self.normalized]
+        self.lengths = [len(template) for template in self.normalized]
+        self.char_counts = [Counter(template) for template in self.normalized]
+        self.ngrams = NgramIndex(self.normalized)
+        self.last_shortlist: ShortlistStats | None = None
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def set_templates(self, commands: Iterable[str] | Grammar):
+        """Recompiles the index for a new template set and invalidates the cached results."""
+        if isinstance(commands, Grammar):
+            if commands == self.grammar:
+                return
+        else:
+            commands = list(commands)
+            if self.grammar is None and commands == self.templates:
+                return
+
+        self._compile(commands)
+        self.cache.clear()
+
+    def cache_info(self) -> CacheInfo:
+        return self.cache.info()
+
+    def shortlist(self, text: str) -> list[int]:
+        """Returns the ids of templates worth scoring and records the pruning in last_shortlist."""
+        if (
+            self.shortlist_size is not None
+            and self.shortlist_size < len(self.templates)
+            and self.scorer.benefits_from_shortlist
+        ):
+            candidates, self.last_shortlist = self.ngrams.shortlist(text, self.shortlist_size)
+            if candidates:
+                return candidates
+
+        self.last_shortlist = ShortlistStats(total=len(self.templates), candidates=len(self.templates))
+        return list(range(len(self.templates)))
+
+    def best_template(self, text: str) -> tuple[str, float] | None:
+        """
+        Returns the most similar template and its score, or None if no template reaches the cutoff.
+        Without a shortlist and with the difflib scorer this is equivalent to
+        difflib.get_close_matches(text, templates, n=1, cutoff=cutoff).
+        """
+        candidates = self.shortlist(text)
+        if not isinstance(self.scorer, DifflibScorer):
+            match = self.scorer.extract_one(text, [self.normalized[i] for i in candidates], self.cutoff)
+            if match is None:
+                return None
+
+            return self.by_normalized[match[0]], match[1]
+
+        matcher = SequenceMatcher()
+        matcher.set_seq2(text)
+        text_length = len(text)
+        text_counts = Counter(text)
+
+        best: tuple[float, str] | None = None
+        for i in candidates:
+            template = self.normalized[i]
+            threshold = self.cutoff if best is None else max(self.cutoff, best[0])
+            total = self.lengths[i] + text_length
+            if total == 0 or 2.0 * min(self.lengths[i], text_length) / total < threshold:
+                continue
+
+            if 2.0 * (self.char_counts[i] & text_counts).total() / total < threshold:
+                continue
+
+            matcher.set_seq1(template)
+            score = matcher.ratio()
+            if score < threshold:
+                continue
+
+            candidate = (score, self.templates[i])
+            if best is None or candidate > best:
+                best = candidate
+
+        if best is None:
+            return None
+
+        return best[1], best[0]
+
+    def match(self, text: str) -> tuple[str, float | None]:
+        """Matches the utterance to a template. Same semantics as match_command."""
+        key = normalize_text(text)
+        found, result = self.cache.get(key)
+        if not found:
+            result = self._match_uncached(key)
+            self.cache.put(key, result)
+
+        if result is None:
+            raise ValueError
+
+        return result
+
+    def match_batch(self, texts: Iterable[str]) -> BatchMatch:
+        """
+        Matches many utterances at once, giving the same matches as match(). With rapidfuzz every distinct prepared
+        utterance is scored against every template in a single score matrix (cdist runs on all cores) instead of one
+        lookup per utterance. The difflib fallback matches the distinct utterances one by one.
+        The cache is neither read nor filled. numpy is only needed here, so it is imported on the first batch.
+        """
+        import numpy as np
+
+        texts = list(texts)
+        actions = np.full(len(texts), None, dtype=object)
+        template_ids = np.full(len(texts), -1, dtype=np.int64)
+        parameters = np.full(len(texts), np.nan)
+        scores = np.zeros(len(texts))
+
+        rows: dict[str, list[int]] = {}
+        prepared_texts: dict[int, str] = {}
+        slot_values: dict[int, dict[str, int]] = {}
+        for i, text in enumerate(texts):
+            try:
+                prepared, temperature = prepare_text(normalize_text(text), self.scorer)
+            except ValueError:
+                continue
+
+            prepared_texts[i] = normalize_text(prepared)
+            prepared, slot_values[i] = self.resolve_slots(prepared_texts[i])
+            rows.setdefault(prepared, []).append(i)
+            if temperature is not None:
+                parameters[i] = float(temperature)
+
+        if not rows or not self.templates:
+            return BatchMatch(actions, template_ids, parameters, scores)
+
+        best: dict[str, tuple[int, float]] = {}
+        if isinstance(self.scorer, RapidfuzzScorer):
+            queries = list(rows)
+            matrix = self.scorer.score_matrix(queries, self.normalized)
+            best_ids = matrix.argmax(axis=1)
+            best_scores = matrix[np.arange(len(queries)), best_ids]
+            best = {query: (int(i), float(score)) for query, i, score in zip(queries, best_ids, best_scores)}
+        else:
+            for query in rows:
+                match = self.best_template(query)
+                best[query] = (-1, 0.0) if match is None else (self.templates.index(match[0]), match[1])
+
+        for query, indices in rows.items():
+            template_id, score = best[query]
+            scores[indices] = score
+            for i in indices:
+                if score < self.cutoff:
+                    parameters[i] = np.nan
+                    continue
+
+                actions[i] = self.expand(self.templates[template_id], slot_values[i], prepared_texts[i])
+                template_ids[i] = template_id
+
+        return BatchMatch(actions, template_ids, parameters, scores)
+
+    def resolve_slots(self, text: str) -> tuple[str, dict[str, int]]:
+        """Replaces the slot words of a grammar with their placeholders, see Grammar.resolve."""
+        if self.grammar is None:
+            return text, {}
+        return self.grammar.resolve(text, self.scorer)
+
+    def expand(self, template: str, slot_values: dict[str, int], text: str) -> str:
+        """The concrete template of a matched skeleton, see Grammar.expand."""
+        if self.grammar is None:
+            return template
+        return self.grammar.expand(template, slot_values, text, self.scorer)
+
+    def _match_uncached(self, text: str) -> tuple[str, float | None] | None:
+        try:
+            text, temperature = prepare_text(text, self.scorer)
+        except ValueError:
+            return None
+
+        text = normalize_text(text)
+        skeleton_text, slot_values = self.resolve_slots(text)
+        match = self.best_template(skeleton_text)
+        if match is None:
+            return None
+
+        template = self.expand(match[0], slot_values, text)
+        if temperature is None:
+            return template, None
+
+        return template, float(temperature)
+
+
+@lru_cache(maxsize=8)
+def compile_commands(commands: tuple[str, ...] | Grammar, scorer: Scorer | None = None) -> CommandIndex:
+    """Returns the compiled index for the template set or grammar, building it only on the first call."""
+    return CommandIndex(commands, scorer=scorer)
+
+
+def command_key(commands: Iterable[str] | Grammar) -> tuple[str, ...] | Grammar:
+    return commands if isinstance(commands, Grammar) else tuple(commands)
+
+
+def match_command(
+    text: str, commands: Iterable[str] | Grammar, scorer: Scorer | None = None
+) -> tuple[str, float | None]:
+    return compile_commands(command_key(commands), scorer or get_scorer()).match(text)
 
-    match = match
-    if temperature is None:
-        return match[0], None
 
-    return match[0], float(temperature)
\ No newline at end of file
+def match_commands(texts: Iterable[str], commands: Iterable[str] | Grammar, scorer: Scorer | None = None) -> BatchMatch:
+    """Vectorized match_command for a whole batch of utterances, see CommandIndex.match_batch."""
+    return compile_commands(command_key(commands), scorer or get_scorer()).match_batch(texts)
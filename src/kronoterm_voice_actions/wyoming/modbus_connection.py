@@ -0,0 +1,338 @@
+"""Long-lived Modbus serial session shared by all register accesses."""
+
+import asyncio
+import inspect
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, NamedTuple
+
+import pymodbus.client
+from pymodbus.exceptions import ModbusException
+from pymodbus.pdu import ExceptionResponse
+
+from .bus_metrics import BusMetrics, Outcome
+from .bus_scheduler import DEFAULT_INTER_FRAME_DELAY, BusScheduler, BusTicket, Priority
+
+log = logging.getLogger(__name__)
+
+DEFAULT_IDLE_TIMEOUT = 30.0
+DEFAULT_RESPONSE_TIMEOUT = 3.0
+# Writes to a register within this many seconds of the previous one are sent as one write of the last value
+WRITE_COALESCING_WINDOW = 0.5
+
+_accepts_slave: dict[Callable[..., Any], bool] = {}
+
+
+def _device_kwargs(function: Callable[..., Any], kwargs: dict[str, Any]) -> dict[str, Any]:
+    """pymodbus 3.10 renamed the `slave` argument of client requests to `device_id`."""
+    if "slave" not in kwargs:
+        return kwargs
+
+    key = getattr(function, "__func__", function)
+    if key not in _accepts_slave:
+        parameters = inspect.signature(function).parameters.values()
+        _accepts_slave[key] = any(
+            parameter.name == "slave" or parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters
+        )
+    if _accepts_slave[key]:
+        return kwargs
+
+    kwargs = dict(kwargs)
+    kwargs["device_id"] = kwargs.pop("slave")
+    return kwargs
+
+
+class ModbusConnectionError(ConnectionError):
+    """The serial port could not be opened or the heat pump did not answer after reopening it."""
+
+
+class _Flight(NamedTuple):
+    """A shared read and its place in the bus queue."""
+
+    future: asyncio.Future
+    ticket: BusTicket
+
+
+class RegisterWrite(NamedTuple):
+    """The response to a register write and the value that went out, which a later coalesced write may have replaced."""
+
+    response: Any
+    value: int
+
+
+@dataclass
+class _PendingWrite:
+    """A write queued behind the previous write to its register, with the last value written to the register since."""
+
+    value: int
+    flight: asyncio.Future | None = None
+
+
+def _retrieve_exception(flight: asyncio.Future):
+    """Marks the exception of a shared request as retrieved, in case every caller was cancelled."""
+    if not flight.cancelled():
+        flight.exception()
+
+
+class ModbusConnection:
+    """
+    Keeps the serial port open between register accesses instead of opening it for every value.
+
+    Concurrent reads of the same register range share one request, see read_holding_registers. With a
+    `write_window` writes to a register within the window after the previous write to it are coalesced into one, see
+    write_register.
+    Requests are serialized by a BusScheduler, since the bus carries one transaction at a time. Waiting requests
+    are served by priority: voice writes, then voice reads, then background polls. The port is closed after
+    `idle_timeout` seconds without requests and opened again by the next one. A request that fails with a Modbus
+    or OS error closes the port, opens it again and is retried `retries` times before ModbusConnectionError is raised.
+    Every transaction is timed and counted in `metrics`, see BusMetrics.
+
+    The port may also be a pyserial URL such as socket://localhost:5020, which the simulator serves.
+    By default the synchronous ModbusSerialClient runs in worker threads. With `use_async` the connection uses
+    AsyncModbusSerialClient instead and awaits requests on the event loop, without taking an executor thread.
+    """
+
+    def __init__(
+        self,
+        port: str,
+        baudrate: int = 115200,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        retries: int = 1,
+        use_async: bool = False,
+        inter_frame_delay: float = DEFAULT_INTER_FRAME_DELAY,
+        timeout: float = DEFAULT_RESPONSE_TIMEOUT,
+        write_window: float = 0.0,
+    ):
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.retries = retries
+        self.use_async = use_async
+        self.write_window = write_window
+        self.client: pymodbus.client.ModbusSerialClient | pymodbus.client.AsyncModbusSerialClient
+        if use_async:
+            self.client = pymodbus.client.AsyncModbusSerialClient(port, baudrate=baudrate, timeout=timeout)
+        else:
+            self.client = pymodbus.client.ModbusSerialClient(port, baudrate=baudrate, timeout=timeout)
+        self.is_open = False
+        self.last_used = 0.0
+        self.opened_count = 0
+        self.failure_count = 0
+        self.coalesced_count = 0
+        self.coalesced_write_count = 0
+        self._in_flight: dict[tuple[int, int, int], _Flight] = {}
+        self._write_flights: dict[tuple[int, int], asyncio.Future] = {}
+        self._pending_writes: dict[tuple[int, int], _PendingWrite] = {}
+        self._write_landed_at: dict[tuple[int, int], float] = {}
+        self.scheduler = BusScheduler(inter_frame_delay)
+        self.metrics = BusMetrics()
+        self._idle_handle: asyncio.TimerHandle | None = None
+
+    async def _open(self):
+        if self.is_open and self.client.connected:
+            return
+
+        connected = await self.client.connect() if self.use_async else self.client.connect()
+        if not connected:
+            self.is_open = False
+            raise ModbusConnectionError(f"Unable to open {self.port}")
+
+        self.is_open = True
+        self.opened_count += 1
+        log.debug(f"Opened Modbus connection on {self.port}")
+
+    def close(self):
+        """Closes the port. The next request opens it again."""
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+
+        if self.is_open:
+            self.client.close()
+            self.is_open = False
+            log.debug(f"Closed Modbus connection on {self.port}")
+
+    def _record(
+        self,
+        function: Callable[..., Any],
+        kwargs: dict[str, Any],
+        started: float,
+        outcome: Outcome,
+        exception_code: int | None = None,
+    ):
+        name = getattr(function, "__name__", "")
+        self.metrics.record_transaction(name, kwargs, time.monotonic() - started, outcome, exception_code)
+
+    def _close_if_idle(self):
+        self._idle_handle = None
+        if self.scheduler.busy:
+            return
+
+        idle = time.monotonic() - self.last_used
+        if idle >= self.idle_timeout:
+            self.close()
+        else:
+            self._schedule_idle_close(self.idle_timeout - idle)
+
+    def _schedule_idle_close(self, delay: float):
+        if self._idle_handle is None:
+            self._idle_handle = asyncio.get_running_loop().call_later(delay, self._close_if_idle)
+
+    async def call(
+        self,
+        function: Callable[..., Any],
+        *args,
+        priority: Priority = Priority.VOICE_READ,
+        ticket: BusTicket | None = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Runs a client function such as client.read_holding_registers once the scheduler grants the bus at `priority`,
+        or at the priority of `ticket`, which may be raised while the call waits. Blocking functions of the
+        synchronous client run in a worker thread, coroutine functions of the asynchronous client are awaited directly.
+        """
+        async with self.scheduler.slot(priority, ticket):
+            try:
+                for attempt in range(self.retries + 1):
+                    started = time.monotonic()
+                    try:
+                        await self._open()
+                        kwargs = _device_kwargs(function, kwargs)
+                        if self.use_async:
+                            response = await function(*args, **kwargs)
+                        else:
+                            response = await asyncio.to_thread(function, *args, **kwargs)
+                    except (ModbusException, OSError) as e:
+                        self._record(function, kwargs, started, Outcome.of_error(e))
+                        self.failure_count += 1
+                        log.warning(f"Modbus request failed on {self.port} (attempt {attempt + 1}): {e}")
+                        self.close()
+                        if attempt == self.retries:
+                            raise ModbusConnectionError(f"Modbus request failed on {self.port}") from e
+                        self.metrics.record_retry()
+                    else:
+                        if isinstance(response, ExceptionResponse):
+                            self._record(function, kwargs, started, Outcome.EXCEPTION, response.exception_code)
+                        else:
+                            self._record(function, kwargs, started, Outcome.OK)
+                        return response
+            finally:
+                self.last_used = time.monotonic()
+                if self.is_open:
+                    self._schedule_idle_close(self.idle_timeout)
+
+    async def read_holding_registers(
+        self, address: int, count: int, slave: int, priority: Priority = Priority.VOICE_READ
+    ) -> Any:
+        """
+        Reads holding registers. A read of the same range that is already queued or on the bus is awaited instead of
+        issuing another request, so every caller gets the same response. A queued read is promoted to the highest
+        priority of its callers, so a voice query sharing a poll's read does not wait behind other polls. Cancelling
+        one caller does not cancel the request for the others.
+        """
+        key = (address, count, slave)
+        flight = self._in_flight.get(key)
+        if flight is None:
+            ticket = BusTicket(priority)
+            future = asyncio.ensure_future(
+                self.call(self.client.read_holding_registers, address, count=count, slave=slave, ticket=ticket)
+            )
+            flight = self._in_flight[key] = _Flight(future, ticket)
+            future.add_done_callback(lambda done: self._land(key, done))
+        else:
+            self.coalesced_count += 1
+            self.scheduler.promote(flight.ticket, priority)
+
+        return await asyncio.shield(flight.future)
+
+    def _land(self, key: tuple[int, int, int], future: asyncio.Future):
+        flight = self._in_flight.get(key)
+        if flight is not None and flight.future is future:
+            del self._in_flight[key]
+        _retrieve_exception(future)
+
+    async def write_register(self, address: int, value: int, slave: int, coalesce: bool = True) -> RegisterWrite:
+        """
+        Writes a holding register at voice write priority and returns the response with the value that went out.
+
+        Without a `write_window` or `coalesce` the write goes out right away. Otherwise a write to a register that
+        had no write within the window goes out right away too. Writes to the same register that arrive while it is in
+        flight or within `write_window` seconds after it landed are queued as one write of the last of their values,
+        sent once the window after the previous write has passed. Every caller of the queued write gets its response
+        and value, which differs from the caller's own value if a later write replaced it. Cancelling one caller does
+        not cancel the write.
+        """
+        if self.write_window <= 0 or not coalesce:
+            return RegisterWrite(await self._write_now(address, value, slave), value)
+
+        key = (address, slave)
+        pending = self._pending_writes.get(key)
+        if pending is None:
+            pending = _PendingWrite(value)
+            pending.flight = asyncio.ensure_future(self._write_after(key, pending, self._write_flights.get(key)))
+            pending.flight.add_done_callback(partial(self._write_landed, key))
+            self._write_flights[key] = pending.flight
+            self._pending_writes[key] = pending
+        else:
+            log.debug(f"Coalescing write of {value} to {address} with the queued write of {pending.value}")
+            pending.value = value
+            self.coalesced_write_count += 1
+
+        return await asyncio.shield(pending.flight)
+
+    async def _write_after(
+        self, key: tuple[int, int], pending: _PendingWrite, previous: asyncio.Future | None
+    ) -> RegisterWrite:
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            landed_at = self._write_landed_at.get(key)
+            if landed_at is not None:
+                await asyncio.sleep(landed_at + self.write_window - time.monotonic())
+        finally:
+            if self._pending_writes.get(key) is pending:
+                del self._pending_writes[key]
+        try:
+            return RegisterWrite(await self._write_now(key[0], pending.value, key[1]), pending.value)
+        finally:
+            self._write_landed_at[key] = time.monotonic()
+
+    def _write_landed(self, key: tuple[int, int], flight: asyncio.Future):
+        if self._write_flights.get(key) is flight:
+            del self._write_flights[key]
+        _retrieve_exception(flight)
+
+    async def _write_now(self, address: int, value: int, slave: int) -> Any:
+        self._forget_reads(address, 1, slave)
+        return await self.call(
+            self.client.write_register, address, value=value, slave=slave, priority=Priority.VOICE_WRITE
+        )
+
+    async def write_registers(self, address: int, values: list[int], slave: int) -> Any:
+        """Writes consecutive holding registers with one request at voice write priority."""
+        self._forget_reads(address, len(values), slave)
+        return await self.call(
+            self.client.write_registers, address, values=values, slave=slave, priority=Priority.VOICE_WRITE
+        )
+
+    def _forget_reads(self, address: int, count: int, slave: int):
+        """
+        Reads of written registers that are already in flight are no longer shared, so reads issued after the write
+        see the new values.
+        """
+        for key in [
+            key for key in self._in_flight
+            if key[0] < address + count and address < key[0] + key[1] and key[2] == slave
+        ]:
+            del self._in_flight[key]
+
+    async def health_check(self, address: int, slave: int) -> bool:
+        """Reads one register to check that the heat pump answers."""
+        try:
+            response = await self.read_holding_registers(address, count=1, slave=slave, priority=Priority.POLL)
+        except ModbusConnectionError:
+            return False
+
+        return not response.isError()
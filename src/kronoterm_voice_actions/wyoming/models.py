@@ -1,9 +1,16 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from .data import WyomingService
 from .devices import SatelliteDevice
 
+if TYPE_CHECKING:
+    from .coordinator import KronotermCoordinator
+    from .match_executor import MatchExecutor
+    from .mqtt_client import MqttClient
+
 
 @dataclass
 class DomainDataItem:
@@ -13,3 +20,18 @@ class DomainDataItem:
 
     service: WyomingService | None = None
     device: SatelliteDevice | None = None
+
+    # Heat pump access of the custom conversation agent, shared by every voice command of the entry
+    client: MqttClient | None = None
+    coordinator: KronotermCoordinator | None = None
+    match_executor: MatchExecutor | None = None
+
+    async def async_shutdown(self) -> None:
+        """Stops polling and the matcher workers, lets setpoint read-backs finish and closes the serial port."""
+        if self.coordinator is not None:
+            await self.coordinator.async_shutdown()
+        if self.match_executor is not None:
+            self.match_executor.shutdown()
+        if self.client is not None:
+            await self.client.wait_for_verifications()
+            self.client.connection.close()
@@ -1,11 +1,33 @@
 import asyncio
 import logging
-import pymodbus.client
+import time
+from collections.abc import Awaitable, Callable, Coroutine, Iterable
+from contextvars import ContextVar
+from typing import Any
+from .bus_scheduler import Priority
 from .const import MODBUS_SLAVE_ID
-from .kronoterm_models import RegisterAddress
+from .grammar import Grammar
+from .kronoterm_models import HEATING_LOOPS, RegisterAddress
+from .modbus_connection import ModbusConnection, ModbusConnectionError
+from .read_plan import ReadPlanner
+from .register_cache import RegisterCache
+from .register_codec import OFF, REGISTER_SPECS
+from .register_snapshot import (
+    REGISTER_BLOCKS,
+    RegisterBlock,
+    RegisterSnapshot,
+    SnapshotSource,
+    decode_block,
+)
+from .write_transaction import WriteTransaction
 
 
 log = logging.getLogger(__name__)
+
+# Announces follow-ups to the command being processed on the device it came from, set by the caller per command
+follow_up_announcer: ContextVar[Callable[[str], Awaitable[None]] | None] = ContextVar(
+    "follow_up_announcer", default=None
+)
 logging.basicConfig(
     level=logging.DEBUG, format="%(asctime)s [%(levelname)-8s] %(module)s:%(funcName)s:%(lineno)d - %(message)s"
 )
@@ -40,71 +62,226 @@ def deg_tozilnik(deg: float) -> str:
         return f"{deg:.1f} stopinj"
 
 
+def clamp_warning(requested: float, actual: float, subject: str) -> str:
+    """Explains that the heat pump set `actual` instead of `requested`, or nothing if they are the same."""
+    if actual < requested:
+        return (f"Izbrana temperatura {deg_imenovalnik(requested)} je previsoka. Najvišja "
+                f"podprta temperatura {subject} je {deg_imenovalnik(actual)}.")
+    if actual > requested:
+        return (f"Izbrana temperatura {deg_imenovalnik(requested)} je prenizka. Najnižja "
+                f"podprta temperatura {subject} je {deg_imenovalnik(actual)}.")
+    return ""
+
+
+def setpoint_correction(requested: float, written: float, actual: float, subject: str) -> str:
+    """
+    Explains why the heat pump set `actual` instead of `requested`: a newer command replaced it with `written`, the
+    heat pump clamped the written temperature, or both. Nothing if it set `requested`.
+    """
+    warning = clamp_warning(written, actual, subject)
+    if written == requested:
+        return warning
+    return f"Novejši ukaz je temperaturo popravil na {deg_tozilnik(written)}. {warning}".rstrip()
+
+
 class MqttClient:
 
-    def __init__(self, usb_port: int = 0):
-        """Kronoterm heat pump mqtt client."""
-        port = "/dev/ttyUSB" + str(usb_port)
-        self.modbus_client = pymodbus.client.ModbusSerialClient(port, baudrate=115200)
+    def __init__(
+        self,
+        usb_port: int = 0,
+        connection: ModbusConnection | None = None,
+        read_planner: ReadPlanner | None = None,
+        cache: RegisterCache | None = None,
+        coordinator: SnapshotSource | None = None,
+        optimistic: bool = False,
+        create_background_task: Callable[[Coroutine[Any, Any, Any], str], asyncio.Task] | None = None,
+    ):
+        """
+        Kronoterm heat pump mqtt client. Clients given the same connection share one open serial port.
+        Reads are answered from the polled snapshot of `coordinator` first, then from `cache` while the values are
+        fresh enough. Writes invalidate the written register in both.
+
+        With `optimistic` and `create_background_task`, such as HomeAssistant.async_create_background_task,
+        setpoint handlers of commands that set a follow_up_announcer answer as soon as the value is written and read
+        it back in a background task. If the heat pump clamped the value, the explanation is announced.
+        """
+        self.connection = connection or ModbusConnection("/dev/ttyUSB" + str(usb_port), baudrate=115200)
+        self.modbus_client = self.connection.client
+        self.read_planner = read_planner or ReadPlanner()
+        self.cache = cache if cache is not None else RegisterCache()
+        self.coordinator = coordinator
+        self.optimistic = optimistic
+        self.create_background_task = create_background_task
+        self._verifications: set[asyncio.Task] = set()
 
     async def invoke_kronoterm_action(self, action: str, parameter: float | None):
         """Invokes an action on the Kronoterm heat pump."""
-        handler = self.map_template_to_function.get(action)
-        if handler is None:
+        command = self.map_template_to_function.get(action)
+        if command is None:
             raise ValueError(f"Action '{action}' not supported")
 
         if parameter is None:
             # noinspection PyArgumentList
-            return await handler(self)
+            return await command.handler(self, *command.args)
 
         # noinspection PyArgumentList
-        return await handler(self, parameter)
+        return await command.handler(self, *command.args, parameter)
 
 
     async def read(self, addr: RegisterAddress, desc: str = "") -> int:
         """Read one Modbus holding register"""
-        self.modbus_client.connect()
-        rr = await asyncio.to_thread(
-            self.modbus_client.read_holding_registers,
-            addr.to_int() - 1,
-            count=1,
-            slave=MODBUS_SLAVE_ID
-        )
-        raw = rr.registers[0]
-        value = raw - (raw >> 15 << 16)
+        value = self._polled_value(addr)
+        if value is None:
+            value = self.cache.get(addr)
+        if value is not None:
+            log.debug(f"{desc}: {value} (cached)")
+            return value
+
+        started = time.monotonic()
+        try:
+            rr = await self.connection.read_holding_registers(addr.to_int() - 1, count=1, slave=MODBUS_SLAVE_ID)
+        finally:
+            self.connection.metrics.record_register(addr, time.monotonic() - started)
+        value = REGISTER_SPECS[addr].from_word(rr.registers[0])
+        self.cache.put(addr, value)
         log.debug(f"{desc}: {value}")
-        self.modbus_client.close()
         return value
 
 
-    async def write(self, addr: RegisterAddress, raw: int):
-        """Write a raw 16-bit word to a Modbus holding register."""
-        self.modbus_client.connect()
-        await asyncio.to_thread(
-            self.modbus_client.write_register,
-            addr.to_int() - 1,
-            value=raw,
-            slave=MODBUS_SLAVE_ID
-        )
-        log.debug(f"Written {raw} to address {addr}")
-        self.modbus_client.close()
+    def _polled_value(self, addr: RegisterAddress) -> int | None:
+        return self.coordinator.value(addr) if self.coordinator is not None else None
+
+
+    async def read_snapshot(
+        self, blocks: Iterable[RegisterBlock] = REGISTER_BLOCKS, priority: Priority = Priority.VOICE_READ
+    ) -> RegisterSnapshot:
+        """Reads every register block with one request per block and decodes them into a snapshot."""
+        values = {}
+        count = 0
+        for block in blocks:
+            rr = await self.connection.read_holding_registers(
+                block.start - 1,
+                count=block.count,
+                slave=MODBUS_SLAVE_ID,
+                priority=priority
+            )
+            if rr.isError():
+                raise ModbusConnectionError(f"Reading registers {block.start}-{block.end} failed: {rr}")
+            values.update(decode_block(block, rr.registers))
+            count += 1
+
+        log.debug(f"Read snapshot of {len(values)} registers in {count} requests")
+        snapshot = RegisterSnapshot(values)
+        self.cache.put_snapshot(snapshot)
+        return snapshot
+
+
+    async def read_registers(self, addresses: Iterable[RegisterAddress]) -> RegisterSnapshot:
+        """Reads the given registers, the ones neither polled nor cached with the fewest block reads the planner finds."""
+        polled = {address: self._polled_value(address) for address in addresses}
+        values, missing = self.cache.get_many(address for address, value in polled.items() if value is None)
+        values.update((address, value) for address, value in polled.items() if value is not None)
+        if missing:
+            values.update((await self.read_snapshot(self.read_planner.plan(missing))).values)
+
+        return RegisterSnapshot(values)
+
+
+    async def write(self, addr: RegisterAddress, raw: int) -> int:
+        """
+        Write a raw 16-bit word to a Modbus holding register, return the word that went out. That is the word of a
+        later write to the register if the connection coalesced this one with it.
+        """
+        started = time.monotonic()
+        try:
+            written = await self.connection.write_register(addr.to_int() - 1, raw, slave=MODBUS_SLAVE_ID)
+        finally:
+            self.connection.metrics.record_register(addr, time.monotonic() - started)
+            # Also after a failed write, the register may have changed anyway
+            self.invalidate(addr)
+        log.debug(f"Written {written.value} to address {addr}")
+        return written.value
+
+
+    def invalidate(self, addr: RegisterAddress):
+        """Drops a written register and the ones depending on it from the cache and the polled snapshot."""
+        self.cache.invalidate(addr)
+        if self.coordinator is not None:
+            self.coordinator.invalidate(addr)
+
+
+    def transaction(self) -> WriteTransaction:
+        """Starts a transaction writing several registers together, see WriteTransaction."""
+        return WriteTransaction(self)
 
 
     async def read_temperature(self, addr: RegisterAddress, desc: str = "") -> float:
         """Read a temperature from a Modbus holding register, log a formatted value, return float"""
-        signed = await self.read(addr, desc)
-        val = signed / 10.0
-        self.modbus_client.close()
-        return val
+        return float(REGISTER_SPECS[addr].scaled(await self.read(addr, desc)))
+
+
+    async def read_label(self, addr: RegisterAddress, unknown: str = "Neznano") -> str:
+        """Read an enum register and return the label of its value"""
+        return REGISTER_SPECS[addr].label(await self.read(addr)) or unknown
+
+
+    async def write_temperature(self, addr: RegisterAddress, temperature: float) -> float:
+        """Writes a temperature and returns the one that went out, a later command's if it replaced this one"""
+        spec = REGISTER_SPECS[addr]
+        word = spec.to_word(temperature)
+        written = await self.write(addr, word)
+        return temperature if written == word else float(spec.scaled(written))
 
 
     async def set_temperature(self, addr: RegisterAddress, temperature: float, desc: str = "") -> float:
         """Attempts to set the specified temperature and returns the actual new value"""
-        raw = int(temperature * 10)
-        await self.write(addr, raw)
+        await self.write_temperature(addr, temperature)
         return await self.read_temperature(addr, desc)
 
 
+    async def set_setpoint(self, addr: RegisterAddress, temperature: float, subject: str, confirmation: str) -> str:
+        """
+        Sets a temperature setpoint and answers with `confirmation` followed by the temperature set, after a note
+        if a newer command replaced it or the heat pump clamped it. `subject` names what the temperature limits apply to.
+        """
+        written = await self.write_temperature(addr, temperature)
+
+        announce = follow_up_announcer.get()
+        if self.optimistic and announce is not None and self.create_background_task is not None:
+            task = self.create_background_task(
+                self._verify_setpoint(addr, written, subject, confirmation, announce), f"Verify {addr} set to {written}"
+            )
+            self._verifications.add(task)
+            task.add_done_callback(self._verifications.discard)
+            correction = setpoint_correction(temperature, written, written, subject)
+            return f"{correction} {confirmation} {deg_tozilnik(written)}.".lstrip()
+
+        actual = await self.read_temperature(addr)
+        return f"{setpoint_correction(temperature, written, actual, subject)} {confirmation} {deg_tozilnik(actual)}."
+
+
+    async def _verify_setpoint(
+        self,
+        addr: RegisterAddress,
+        written: float,
+        subject: str,
+        confirmation: str,
+        announce: Callable[[str], Awaitable[None]],
+    ):
+        try:
+            actual = await self.read_temperature(addr)
+            if warning := clamp_warning(written, actual, subject):
+                await announce(f"{warning} {confirmation} {deg_tozilnik(actual)}.")
+        except Exception:
+            log.exception(f"Verifying {addr} set to {written} failed")
+
+
+    async def wait_for_verifications(self):
+        """Waits until the read-backs of written setpoints running in the background are done."""
+        if self._verifications:
+            await asyncio.gather(*self._verifications, return_exceptions=True)
+
+
     async def get_system_status(self) -> str:
         """Status delovanja celotne regulacije"""
         status = await self.read(RegisterAddress.SYSTEM_STATUS)
@@ -116,17 +293,7 @@ class MqttClient:
 
     async def get_operating_mode(self) -> str:
         """Funkcija delovanja, ki se izvaja"""
-        mode_tag = await self.read(RegisterAddress.OPERATING_MODE)
-        mode = "Neznano"
-        match mode_tag:
-            case 0: mode = "Ogrevanje"
-            case 1: mode = "Sanitarna voda"
-            case 2: mode = "Hlajenje"
-            case 3: mode = "Ogrevanje bazena"
-            case 4: mode = "Pregrevanje sanitarne vode"
-            case 5: mode = "Mirovanje"
-            case 7: mode = "Daljinski izklop"
-
+        mode = await self.read_label(RegisterAddress.OPERATING_MODE)
         return f"Funkcija, ki se izvaja: {mode}."
 
 
@@ -150,26 +317,13 @@ class MqttClient:
 
     async def get_operation_regime_status(self) -> str:
         """Status režima delovanja"""
-        status = await self.read(RegisterAddress.OPERATING_REGIME)
-        regime = "Neznan"
-        match status:
-            case 0: regime = "Hlajenje"
-            case 1: regime = "Ogrevanje"
-            case 2: regime = "Ogrevanje in hlajenje izklopljeno"
-
+        regime = await self.read_label(RegisterAddress.OPERATING_REGIME, unknown="Neznan")
         return f"Trenutno aktiven režim: {regime}."
 
 
     async def get_program_mode(self) -> str:
         """Dodatni programi delovanja"""
-        mode = await self.read(RegisterAddress.PROGRAM_MODE)
-        program = "Neznan"
-        match mode:
-            case 0: program = "Normalno delovanje"
-            case 1: program = "Generalno delovanje v ECO režimu"
-            case 2: program = "Generalno delovanje v COM režimu"
-            case 3: program = "Program sušenja estrihov"
-
+        program = await self.read_label(RegisterAddress.PROGRAM_MODE, unknown="Neznan")
         return f"Trenutno aktiven dodaten program delovanja: {program}."
 
 
@@ -193,13 +347,19 @@ class MqttClient:
 
     async def turn_system_on(self) -> str:
         """Vklop sistema (toplotna črpalka in ogrevalni krogi)"""
-        await self.write(RegisterAddress.SYSTEM_ON, 1)
+        async with self.transaction() as transaction:
+            transaction.write(RegisterAddress.SYSTEM_ON, 1)
+        if not transaction.result.ok:
+            return "Vklop sistema ni uspel."
         return "Vklop sistema uspešen."
 
 
     async def turn_system_off(self) -> str:
         """Izklop sistema (toplotna črpalka in ogrevalni krogi)"""
-        await self.write(RegisterAddress.SYSTEM_ON, 0)
+        async with self.transaction() as transaction:
+            transaction.write(RegisterAddress.SYSTEM_ON, 0)
+        if not transaction.result.ok:
+            return "Izklop sistema ni uspel."
         return "Izklop sistema uspešen."
 
 
@@ -241,24 +401,23 @@ class MqttClient:
 
     async def set_dhw_target_temperature(self, temperature: float) -> str:
         """Želena temperatura sanitarne vode"""
-        actual = await self.set_temperature(RegisterAddress.DHW_TARGET_TEMP, temperature)
-        warning = ""
-        if actual < temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je previsoka. Najvišja "
-                       f"podprta temperatura za sanitarno vodo je {deg_imenovalnik(actual)}.")
-        elif actual > temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je prenizka. Najnižja "
-                       f"podprta temperatura za sanitarno vodo je {deg_imenovalnik(actual)}.")
-
-        return f"{warning} Želena temperatura sanitarne vode nastavljena na {deg_tozilnik(actual)}."
+        return await self.set_setpoint(
+            RegisterAddress.DHW_TARGET_TEMP,
+            temperature,
+            "za sanitarno vodo",
+            "Želena temperatura sanitarne vode nastavljena na",
+        )
 
 
     async def get_dhw_target_temperature(self) -> str:
         """Trenutna želena temperatura sanitarne vode"""
-        temp = await self.read_temperature(RegisterAddress.DHW_CURRENT_TARGET_TEMP)
-        if temp == 500:
+        spec = REGISTER_SPECS[RegisterAddress.DHW_CURRENT_TARGET_TEMP]
+        raw = await self.read(RegisterAddress.DHW_CURRENT_TARGET_TEMP)
+        if spec.sentinel(raw) == OFF:
             return "Sanitarna voda je izklopljena."
 
+        temp = spec.scaled(raw)
+
         return f"Trenutna želena temperatura sanitarne vode je {deg_imenovalnik(temp)}."
 
 
@@ -282,14 +441,7 @@ class MqttClient:
 
     async def get_dhw_schedule_mode(self) -> str:
         """Status delovanja sanitarne vode po urniku"""
-        mode_tag = await self.read(RegisterAddress.DHW_SCHEDULE_STATUS)
-        mode = "Neznano"
-        match mode_tag:
-            case 0: mode = "Izklopljeno"
-            case 1: mode = "Normalno"
-            case 2: mode = "ECO"
-            case 3: mode = "COM"
-
+        mode = await self.read_label(RegisterAddress.DHW_SCHEDULE_STATUS)
         return f"Trenuten način delovanja sanitarne vode po urniku: {mode}"
 
 
@@ -299,244 +451,69 @@ class MqttClient:
         return f"Trenutna temperatura sanitarne vode je {deg_imenovalnik(temp)}."
 
 
-    async def set_loop1_room_target_temp(self, temperature: float) -> str:
-        """Želena temperatura 1. kroga"""
-        actual = await self.set_temperature(RegisterAddress.LOOP_1_TARGET_ROOM_TEMP, temperature)
-        warning = ""
-        if actual < temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je previsoka. Najvišja "
-                       f"podprta temperatura za prostor prvega kroga je {deg_imenovalnik(actual)}.")
-        elif actual > temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je prenizka. Najnižja "
-                       f"podprta temperatura za prostor prvega kroga je {deg_imenovalnik(actual)}.")
-
-        return f"{warning} Želena temperatura prostora prvega kroga nastavljena na {deg_tozilnik(actual)}."
-
-
-    async def get_loop1_room_target_temp(self) -> str:
-        """Trenutna želena temperatura 1. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_1_CURRENT_TARGET_ROOM_TEMP)
-        if temp == 500:
-            return "Prvi ogrevalni krog je izklopljen."
-
-        return f"Trenutna želena temperatura prostora prvega ogrevalnega kroga je {deg_imenovalnik(temp)}."
-
-
-    async def set_loop1_operating_mode_disabled(self) -> str:
-        """Izklopi 1. krog"""
-        await self.write(RegisterAddress.LOOP_1_MODE_SELECT, 0)
-        return "Prvi ogrevalni krog izklopljen."
-
-
-    async def set_loop1_operating_mode_normal(self) -> str:
-        """Nastavi delovanje 1. kroga na normalni režim"""
-        await self.write(RegisterAddress.LOOP_1_MODE_SELECT, 1)
-        return "Delovanje prvega ogrevalnega kroga nastavljeno na normalni režim."
-
-
-    async def set_loop1_operating_mode_schedule(self) -> str:
-        """Nastavi delovanje 1. kroga na delovanje po urniku"""
-        await self.write(RegisterAddress.LOOP_1_MODE_SELECT, 2)
-        return "Delovanje prvega ogrevalnega kroga nastavljeno na delovanje po urniku."
-
-
-    async def get_loop1_operating_mode(self) -> str:
-        """Status delovanja 1. kroga po urniku"""
-        mode_tag = await self.read(RegisterAddress.LOOP_1_SCHEDULE_STATUS)
-        mode = "Neznano"
-        match mode_tag:
-            case 0: mode = "Izklopljeno"
-            case 1: mode = "Normalno"
-            case 2: mode = "ECO"
-            case 3: mode = "COM"
-
-        return f"Trenutni status delovanja prvega kroga po urniku: {mode}."
-
-
-    async def get_loop1_temp(self) -> str:
-        """Temperatura 1. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_1_TEMP_SENSOR, "Loop 1 temperature")
-        return f"Trenutna temperatura prvega ogrevalnega kroga: {deg_imenovalnik(temp)}."
-
-
-    async def set_loop2_room_target_temp(self, temperature: float) -> str:
-        """Želena temperatura prostora 2. kroga"""
-        actual = await self.set_temperature(RegisterAddress.LOOP_2_TARGET_ROOM_TEMP, temperature)
-        warning = ""
-        if actual < temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je previsoka. Najvišja "
-                       f"podprta temperatura za prostor drugega kroga je {deg_imenovalnik(actual)}.")
-        elif actual > temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je prenizka. Najnižja "
-                       f"podprta temperatura za prostor drugega kroga je {deg_imenovalnik(actual)}.")
-
-        return f"{warning} Želena temperatura prostora drugega kroga nastavljena na {deg_tozilnik(actual)}."
-
-
-    async def get_loop2_room_target_temp(self) -> str:
-        """Trenutna želena temperatura prostora 2. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_2_CURRENT_TARGET_ROOM_TEMP)
-        if temp == 500:
-            return "Drugi ogrevalni krog je izklopljen."
-
-        return f"Trenutna želena temperatura prostora drugega ogrevalnega je {deg_imenovalnik(temp)}."
-
-
-    async def set_loop2_operating_mode_disabled(self) -> str:
-        """Izklopi 2. krog"""
-        await self.write(RegisterAddress.LOOP_2_MODE_SELECT, 0)
-        return "Drugi ogrevalni krog izklopljen."
-
-
-    async def set_loop2_operating_mode_normal(self) -> str:
-        """Nastavi delovanje 2. kroga na normalni režim"""
-        await self.write(RegisterAddress.LOOP_2_MODE_SELECT, 1)
-        return "Delovanje drugega ogrevalnega kroga nastavljeno na normalni režim."
-
-
-    async def set_loop2_operating_mode_schedule(self) -> str:
-        """Nastavi delovanje 2. kroga na delovanje po urniku"""
-        await self.write(RegisterAddress.LOOP_2_MODE_SELECT, 2)
-        return "Delovanje drugega ogrevalnega kroga nastavljeno na delovanje po urniku."
-
-
-    async def get_loop2_operating_mode(self) -> str:
-        """Status delovanja 2. kroga po urniku"""
-        mode_tag = await self.read(RegisterAddress.LOOP_2_SCHEDULE_STATUS)
-        mode = "Neznano"
-        match mode_tag:
-            case 0: mode = "Izklopljeno"
-            case 1: mode = "Normalno"
-            case 2: mode = "ECO"
-            case 3: mode = "COM"
-
-        return f"Trenutni status delovanja drugega kroga po urniku: {mode}."
-
-
-    async def get_loop2_temp(self) -> str:
-        """Temperatura 2. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_2_TEMP_SENSOR)
-        return f"Trenutna temperatura drugega ogrevalnega kroga: {deg_imenovalnik(temp)}."
-
-
-    async def set_loop3_room_target_temp(self, temperature: float) -> str:
-        """Želena temperatura prostora 3. kroga"""
-        actual = await self.set_temperature(RegisterAddress.LOOP_3_ROOM_TARGET_TEMP, temperature)
-        warning = ""
-        if actual < temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je previsoka. Najvišja "
-                       f"podprta temperatura za prostor tretjega kroga je {deg_imenovalnik(actual)}.")
-        elif actual > temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je prenizka. Najnižja "
-                       f"podprta temperatura za prostor tretjega kroga je {deg_imenovalnik(actual)}.")
-
-        return f"{warning} Želena temperatura prostora tretjega kroga nastavljena na {deg_tozilnik(actual)}."
-
-
-    async def get_loop3_room_target_temp(self) -> str:
-        """Trenutna želena temperatura prostora 3. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_3_TARGET_ROOM_TEMP)
-        if temp == 500:
-            return "Tretji ogrevalni krog je izklopljen."
-
-        return f"Trenutna želena temperatura tretjega ogrevalnega kroga je {deg_imenovalnik(temp)}."
-
-
-    async def set_loop3_operating_mode_disabled(self) -> str:
-        """Izklopi 3. krog"""
-        await self.write(RegisterAddress.LOOP_3_MODE_SELECT, 0)
-        return "Tretji ogrevalni krog izklopljen."
-
-
-    async def set_loop3_operating_mode_normal(self) -> str:
-        """Nastavi delovanje 3. kroga na normalni režim"""
-        await self.write(RegisterAddress.LOOP_3_MODE_SELECT, 1)
-        return "Delovanje tretjega ogrevalnega kroga nastavljeno na normalni režim."
-
-
-    async def set_loop3_operating_mode_schedule(self) -> str:
-        """Nastavi delovanje 3. kroga na delovanje po urniku"""
-        await self.write(RegisterAddress.LOOP_3_MODE_SELECT, 2)
-        return "Delovanje tretjega ogrevalnega kroga nastavljeno na delovanje po urniku."
-
-
-    async def get_loop3_operating_mode(self) -> str:
-        """Status delovanja 3. kroga po urniku"""
-        mode_tag = await self.read(RegisterAddress.LOOP_3_SCHEDULE_STATUS)
-        mode = "Neznano"
-        match mode_tag:
-            case 0: mode = "Izklopljeno"
-            case 1: mode = "Normalno"
-            case 2: mode = "ECO"
-            case 3: mode = "COM"
-
-        return f"Trenutni status delovanja tretjega kroga po urniku: {mode}."
-
-
-    async def get_loop3_temp(self) -> str:
-        """Temperatura 3. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_3_TEMP_SENSOR)
-        return f"Trenutna temperatura tretjega ogrevalnega kroga: {deg_imenovalnik(temp)}."
-
-
-    async def set_loop4_room_target_temp(self, temperature: float) -> str:
-        """Želena temperatura prostora 4. kroga"""
-        actual = await self.set_temperature(RegisterAddress.LOOP_4_ROOM_TARGET_TEMP, temperature)
-        warning = ""
-        if actual < temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je previsoka. Najvišja "
-                       f"podprta temperatura za prostor četrtega kroga je {deg_imenovalnik(actual)}.")
-        elif actual > temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je prenizka. Najnižja "
-                       f"podprta temperatura za prostor četrtega kroga je {deg_imenovalnik(actual)}.")
-
-        return f"{warning} Želena temperatura prostora četrtega kroga nastavljena na {deg_tozilnik(actual)}."
+    async def set_loop_room_target_temp(self, loop: int, temperature: float) -> str:
+        """Želena temperatura prostora ogrevalnega kroga"""
+        heating_loop = HEATING_LOOPS[loop]
+        return await self.set_setpoint(
+            heating_loop.target_room_temp,
+            temperature,
+            f"za prostor {heating_loop.ordinal_genitive} kroga",
+            f"Želena temperatura prostora {heating_loop.ordinal_genitive} kroga nastavljena na",
+        )
 
 
-    async def get_loop4_room_target_temp(self) -> str:
-        """Trenutna želena temperatura prostora 4. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_4_TARGET_ROOM_TEMP)
-        if temp == 500:
-            return "Četrti ogrevalni krog je izklopljen."
+    async def get_loop_room_target_temp(self, loop: int) -> str:
+        """Trenutna želena temperatura prostora ogrevalnega kroga"""
+        heating_loop = HEATING_LOOPS[loop]
+        spec = REGISTER_SPECS[heating_loop.current_target_room_temp]
+        raw = await self.read(heating_loop.current_target_room_temp)
+        if spec.sentinel(raw) == OFF:
+            return f"{heating_loop.ordinal.capitalize()} ogrevalni krog je izklopljen."
 
-        return f"Trenutna želena temperatura četrtega ogrevalnega kroga je {deg_imenovalnik(temp)}."
+        temp = spec.scaled(raw)
 
+        return (f"Trenutna želena temperatura prostora {heating_loop.ordinal_genitive} ogrevalnega kroga je "
+                f"{deg_imenovalnik(temp)}.")
 
-    async def set_loop4_operating_mode_disabled(self) -> str:
-        """Izklopi 4. krog"""
-        await self.write(RegisterAddress.LOOP_4_MODE_SELECT, 0)
-        return "Četrti ogrevalni krog izklopljen."
 
+    async def set_loop_operating_mode(self, loop: int, mode: int) -> str:
+        """Izbira delovanja ogrevalnega kroga: 0 izklopljen, 1 normalni režim, 2 delovanje po urniku"""
+        heating_loop = HEATING_LOOPS[loop]
+        await self.write(heating_loop.mode_select, mode)
+        if mode == 0:
+            return f"{heating_loop.ordinal.capitalize()} ogrevalni krog izklopljen."
 
-    async def set_loop4_operating_mode_normal(self) -> str:
-        """Nastavi delovanje 4. kroga na normalni režim"""
-        await self.write(RegisterAddress.LOOP_4_MODE_SELECT, 1)
-        return "Delovanje četrtega ogrevalnega kroga nastavljeno na normalni režim."
+        setting = REGISTER_SPECS[heating_loop.mode_select].label(mode)
+        return f"Delovanje {heating_loop.ordinal_genitive} ogrevalnega kroga nastavljeno na {setting}."
 
 
-    async def set_loop4_operating_mode_schedule(self) -> str:
-        """Nastavi delovanje 4. kroga na delovanje po urniku"""
-        await self.write(RegisterAddress.LOOP_4_MODE_SELECT, 2)
-        return "Delovanje četrtega ogrevalnega kroga nastavljeno na delovanje po urniku."
+    async def turn_loop_on(self, loop: int, temperature: float) -> str:
+        """Vklop ogrevalnega kroga v normalnem režimu skupaj z želeno temperaturo prostora"""
+        heating_loop = HEATING_LOOPS[loop]
+        async with self.transaction() as transaction:
+            transaction.write(heating_loop.mode_select, 1)
+            transaction.set_temperature(heating_loop.target_room_temp, temperature)
+        if heating_loop.mode_select in transaction.result.rejected:
+            return f"Vklop {heating_loop.ordinal_genitive} ogrevalnega kroga ni uspel."
 
+        actual = transaction.result.verified.temperature(heating_loop.target_room_temp)
+        warning = clamp_warning(temperature, actual, f"za prostor {heating_loop.ordinal_genitive} kroga")
+        return (f"{warning} {heating_loop.ordinal.capitalize()} ogrevalni krog vklopljen, želena temperatura "
+                f"prostora nastavljena na {deg_tozilnik(actual)}.").lstrip()
 
-    async def get_loop4_operating_mode(self) -> str:
-        """Status delovanja 4. kroga po urniku"""
-        mode_tag = await self.read(RegisterAddress.LOOP_4_SCHEDULE_STATUS)
-        mode = "Neznano"
-        match mode_tag:
-            case 0: mode = "Izklopljeno"
-            case 1: mode = "Normalno"
-            case 2: mode = "ECO"
-            case 3: mode = "COM"
 
-        return f"Trenutni status delovanja četrtega kroga po urniku: {mode}."
+    async def get_loop_operating_mode(self, loop: int) -> str:
+        """Status delovanja ogrevalnega kroga po urniku"""
+        heating_loop = HEATING_LOOPS[loop]
+        mode = await self.read_label(heating_loop.schedule_status)
+        return f"Trenutni status delovanja {heating_loop.ordinal_genitive} kroga po urniku: {mode}."
 
 
-    async def get_loop4_temp(self) -> str:
-        """Temperatura 4. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_4_TEMP_SENSOR)
-        return f"Trenutna temperatura četrtega ogrevalnega kroga: {deg_imenovalnik(temp)}."
+    async def get_loop_temp(self, loop: int) -> str:
+        """Temperatura ogrevalnega kroga"""
+        heating_loop = HEATING_LOOPS[loop]
+        temp = await self.read_temperature(heating_loop.temp_sensor)
+        return f"Trenutna temperatura {heating_loop.ordinal_genitive} ogrevalnega kroga: {deg_imenovalnik(temp)}."
 
 
     async def get_outside_temp(self) -> str:
@@ -545,7 +522,7 @@ class MqttClient:
         return f"Trenutna zunanja temperatura je {deg_imenovalnik(temp)}"
 
 
-    map_template_to_function = {
+    command_grammar = Grammar({
         "ali je sistem vklopljen": get_system_status,
         "ali je sistem izklopljen": get_system_status,
         "kakšno je stanje sistema": get_system_status,
@@ -620,118 +597,36 @@ class MqttClient:
         "kakšna je temperatura sanitarne vode": get_dhw_temperature,
 
         ####################################################################################################################
-        # LOOP 1
+        # HEATING LOOPS, {loop...} is the loop number in the case the phrase needs ("ena", "prvi", "prvega", "prvem")
         ####################################################################################################################
 
-        "nastavi temperaturo prostora ena na <temperature> stopinj": set_loop1_room_target_temp,
-        "nastavi želeno temperaturo prostora prvega kroga na <temperature> stopinj": set_loop1_room_target_temp,
-
-        "kakšna je trenutna želena temperatura prostora prvega kroga": get_loop1_room_target_temp,
-        "kakšna je trenutna želena temperatura prostora ena": get_loop1_room_target_temp,
-
-        "izklopi prvi ogrevalni krog": set_loop1_operating_mode_disabled,
-        "izklopi ogrevalni krog ena": set_loop1_operating_mode_disabled,
-
-        "nastavi delovanje prvega ogrevalnega kroga na normalni režim": set_loop1_operating_mode_normal,
-        "nastavi delovanje ogrevalnega kroga ena na normalni režim": set_loop1_operating_mode_normal,
-        "vklopi normalni režim na ogrevalnem krogu ena": set_loop1_operating_mode_normal,
-        "vklopi normalni režim na prvem ogrevalnem krogu": set_loop1_operating_mode_normal,
+        "nastavi temperaturo prostora {loop} na <temperature> stopinj": set_loop_room_target_temp,
+        "nastavi želeno temperaturo prostora {loop_gen} kroga na <temperature> stopinj": set_loop_room_target_temp,
 
-        "nastavi delovanje prvega ogrevalnega kroga na delovanje po urniku": set_loop1_operating_mode_schedule,
-        "nastavi delovanje ogrevalnega kroga ena na delovanje po urniku": set_loop1_operating_mode_schedule,
-        "vklopi delovanje po urniku na ogrevalnem krogu ena": set_loop1_operating_mode_schedule,
-        "vklopi delovanje po urniku na prvem ogrevalnem krogu": set_loop1_operating_mode_schedule,
-
-        "kakšen je status delovanja prvega ogrevalnega kroga": get_loop1_operating_mode,
-        "kakšen je status delovanja ogrevalnega kroga ena": get_loop1_operating_mode,
-
-        "kakšna je temperatura ogrevalnega kroga ena": get_loop1_temp,
-        "kakšna je temperatura prvega ogrevalnega kroga": get_loop1_temp,
-
-        ####################################################################################################################
-        # LOOP 2
-        ####################################################################################################################
-
-        "nastavi temperaturo prostora dva na <temperature> stopinj": set_loop2_room_target_temp,
-        "nastavi želeno temperaturo prostora drugega kroga na <temperature> stopinj": set_loop2_room_target_temp,
-
-        "kakšna je trenutna želena temperatura prostora drugega kroga": get_loop2_room_target_temp,
-        "kakšna je trenutna želena temperatura prostora dva": get_loop2_room_target_temp,
-
-        "izklopi drugi ogrevalni krog": set_loop2_operating_mode_disabled,
-        "izklopi ogrevalni krog dva": set_loop2_operating_mode_disabled,
-
-        "nastavi delovanje drugega ogrevalnega kroga na normalni režim": set_loop2_operating_mode_normal,
-        "nastavi delovanje ogrevalnega kroga dva na normalni režim": set_loop2_operating_mode_normal,
-        "vklopi normalni režim na ogrevalnem krogu dva": set_loop2_operating_mode_normal,
-        "vklopi normalni režim na drugem ogrevalnem krogu": set_loop2_operating_mode_normal,
-
-        "nastavi delovanje drugega ogrevalnega kroga na delovanje po urniku": set_loop2_operating_mode_schedule,
-        "nastavi delovanje ogrevalnega kroga dva na delovanje po urniku": set_loop2_operating_mode_schedule,
-        "vklopi delovanje po urniku na ogrevalnem krogu dva": set_loop2_operating_mode_schedule,
-        "vklopi delovanje po urniku na drugem ogrevalnem krogu": set_loop2_operating_mode_schedule,
-
-        "kakšen je status delovanja drugega ogrevalnega kroga": get_loop2_operating_mode,
-        "kakšen je status delovanja ogrevalnega kroga dva": get_loop2_operating_mode,
-
-        "kakšna je temperatura ogrevalnega kroga dva": get_loop2_temp,
-        "kakšna je temperatura drugega ogrevalnega kroga": get_loop2_temp,
-
-        ####################################################################################################################
-        # LOOP 3
-        ####################################################################################################################
-
-        "nastavi temperaturo prostora tri na <temperature> stopinj": set_loop3_room_target_temp,
-        "nastavi želeno temperaturo prostora tretjega kroga na <temperature> stopinj": set_loop3_room_target_temp,
-
-        "kakšna je trenutna želena temperatura prostora tretjega kroga": get_loop3_room_target_temp,
-        "kakšna je trenutna želena temperatura prostora tri": get_loop3_room_target_temp,
-
-        "izklopi tretji ogrevalni krog": set_loop3_operating_mode_disabled,
-        "izklopi ogrevalni krog tri": set_loop3_operating_mode_disabled,
-
-        "nastavi delovanje tretjega ogrevalnega kroga na normalni režim": set_loop3_operating_mode_normal,
-        "nastavi delovanje ogrevalnega kroga tri na normalni režim": set_loop3_operating_mode_normal,
-        "vklopi normalni režim na ogrevalnem krogu tri": set_loop3_operating_mode_normal,
-        "vklopi normalni režim na tretjem ogrevalnem krogu": set_loop3_operating_mode_normal,
-
-        "nastavi delovanje tretjega ogrevalnega kroga na delovanje po urniku": set_loop3_operating_mode_schedule,
-        "nastavi delovanje ogrevalnega kroga tri na delovanje po urniku": set_loop3_operating_mode_schedule,
-        "vklopi delovanje po urniku na ogrevalnem krogu tri": set_loop3_operating_mode_schedule,
-        "vklopi delovanje po urniku na tretjem ogrevalnem krogu": set_loop3_operating_mode_schedule,
-
-        "kakšen je status delovanja tretjega ogrevalnega kroga": get_loop3_operating_mode,
-        "kakšen je status delovanja ogrevalnega kroga tri": get_loop3_operating_mode,
-
-        "kakšna je temperatura ogrevalnega kroga tri": get_loop3_temp,
-        "kakšna je temperatura tretjega ogrevalnega kroga": get_loop3_temp,
-
-        ####################################################################################################################
-        # LOOP 4
-        ####################################################################################################################
+        "kakšna je trenutna želena temperatura prostora {loop_gen} kroga": get_loop_room_target_temp,
+        "kakšna je trenutna želena temperatura prostora {loop}": get_loop_room_target_temp,
 
-        "nastavi temperaturo prostora štiri na <temperature> stopinj": set_loop4_room_target_temp,
-        "nastavi želeno temperaturo prostora četrtega kroga na <temperature> stopinj": set_loop4_room_target_temp,
+        "izklopi {loop_nom} ogrevalni krog": (set_loop_operating_mode, (0,)),
+        "izklopi ogrevalni krog {loop}": (set_loop_operating_mode, (0,)),
 
-        "kakšna je trenutna želena temperatura prostora četrtega kroga": get_loop4_room_target_temp,
-        "kakšna je trenutna želena temperatura prostora štiri": get_loop4_room_target_temp,
+        "nastavi delovanje {loop_gen} ogrevalnega kroga na normalni režim": (set_loop_operating_mode, (1,)),
+        "nastavi delovanje ogrevalnega kroga {loop} na normalni režim": (set_loop_operating_mode, (1,)),
+        "vklopi normalni režim na ogrevalnem krogu {loop}": (set_loop_operating_mode, (1,)),
+        "vklopi normalni režim na {loop_loc} ogrevalnem krogu": (set_loop_operating_mode, (1,)),
 
-        "izklopi četrti ogrevalni krog": set_loop4_operating_mode_disabled,
-        "izklopi ogrevalni krog štiri": set_loop4_operating_mode_disabled,
+        "nastavi delovanje {loop_gen} ogrevalnega kroga na delovanje po urniku": (set_loop_operating_mode, (2,)),
+        "nastavi delovanje ogrevalnega kroga {loop} na delovanje po urniku": (set_loop_operating_mode, (2,)),
+        "vklopi delovanje po urniku na ogrevalnem krogu {loop}": (set_loop_operating_mode, (2,)),
+        "vklopi delovanje po urniku na {loop_loc} ogrevalnem krogu": (set_loop_operating_mode, (2,)),
 
-        "nastavi delovanje četrtega ogrevalnega kroga na normalni režim": set_loop4_operating_mode_normal,
-        "nastavi delovanje ogrevalnega kroga štiri na normalni režim": set_loop4_operating_mode_normal,
-        "vklopi normalni režim na ogrevalnem krogu štiri": set_loop4_operating_mode_normal,
-        "vklopi normalni režim na četrtem ogrevalnem krogu": set_loop4_operating_mode_normal,
+        "vklopi ogrevalni krog {loop} na <temperature> stopinj": turn_loop_on,
+        "vklopi {loop_nom} ogrevalni krog na <temperature> stopinj": turn_loop_on,
 
-        "nastavi delovanje četrtega ogrevalnega kroga na delovanje po urniku": set_loop4_operating_mode_schedule,
-        "nastavi delovanje ogrevalnega kroga štiri na delovanje po urniku": set_loop4_operating_mode_schedule,
-        "vklopi delovanje po urniku na ogrevalnem krogu štiri": set_loop4_operating_mode_schedule,
-        "vklopi delovanje po urniku na četrtem ogrevalnem krogu": set_loop4_operating_mode_schedule,
+        "kakšen je status delovanja {loop_gen} ogrevalnega kroga": get_loop_operating_mode,
+        "kakšen je status delovanja ogrevalnega kroga {loop}": get_loop_operating_mode,
 
-        "kakšen je status delovanja četrtega ogrevalnega kroga": get_loop4_operating_mode,
-        "kakšen je status delovanja ogrevalnega kroga štiri": get_loop4_operating_mode,
+        "kakšna je temperatura ogrevalnega kroga {loop}": get_loop_temp,
+        "kakšna je temperatura {loop_gen} ogrevalnega kroga": get_loop_temp,
+    })
 
-        "kakšna je temperatura ogrevalnega kroga štiri": get_loop4_temp,
-        "kakšna je temperatura četrtega ogrevalnega kroga": get_loop4_temp,
-    }
+    map_template_to_function = command_grammar.commands
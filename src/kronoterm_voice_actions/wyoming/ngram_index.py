@@ -0,0 +1,73 @@
+"""Character n-gram inverted index used to shortlist command templates before fuzzy scoring."""
+
+import heapq
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass
+from itertools import chain
+
+
+def char_ngrams(text: str, n: int = 3) -> set[str]:
+    """Returns the set of character n-grams of the text, padded with a space on both sides."""
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+@dataclass(frozen=True)
+class ShortlistStats:
+    """How many documents the shortlist kept out of the whole index."""
+
+    total: int
+    candidates: int
+
+    @property
+    def pruned(self) -> int:
+        return self.total - self.candidates
+
+    @property
+    def pruned_ratio(self) -> float:
+        if self.total == 0:
+            return 0.0
+        return self.pruned / self.total
+
+
+class NgramIndex:
+    """
+    Maps every character n-gram to the documents containing it.
+    N-grams found in more than `max_df` of the documents (" na", "ega", ...) barely discriminate between documents,
+    so they are left out of the index to keep the lookup cost down.
+    """
+
+    def __init__(self, documents: Sequence[str], n: int = 3, max_df: float = 0.3):
+        self.n = n
+        self.size = len(documents)
+        self.gram_counts: list[int] = []
+        self.postings: dict[str, list[int]] = {}
+        for doc_id, document in enumerate(documents):
+            grams = char_ngrams(document, n)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(doc_id)
+
+        max_postings = max(1, int(max_df * self.size))
+        self.postings = {gram: ids for gram, ids in self.postings.items() if len(ids) <= max_postings}
+
+    def shortlist(self, text: str, limit: int) -> tuple[list[int], ShortlistStats]:
+        """
+        Returns ids of at most `limit` documents sharing the most n-grams with the text (ranked by Dice coefficient),
+        in index order, together with the pruning statistics. The list is empty if the text shares no indexed n-gram
+        with any document.
+        """
+        grams = char_ngrams(text, self.n)
+        shared = Counter(chain.from_iterable(self.postings[gram] for gram in grams if gram in self.postings))
+        if len(shared) > limit:
+            query_count = len(grams)
+            gram_counts = self.gram_counts
+            shared = heapq.nlargest(
+                limit, shared.items(), key=lambda item: item[1] / (gram_counts[item[0]] + query_count)
+            )
+            candidates = sorted(doc_id for doc_id, _ in shared)
+        else:
+            candidates = sorted(shared)
+
+        return candidates, ShortlistStats(total=self.size, candidates=len(candidates))
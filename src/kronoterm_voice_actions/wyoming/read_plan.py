@@ -0,0 +1,86 @@
+"""Plans the Modbus block reads needed to fetch a set of registers."""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from .kronoterm_models import RegisterAddress
+from .register_snapshot import MAX_BLOCK_SIZE, RegisterBlock
+
+# Reading one unused register costs about 1/20 of a request: a register adds two bytes to the response, while a
+# request adds two frames, the inter-frame silence and the heat pump's turnaround time.
+DEFAULT_GAP_COST = 0.05
+
+
+@dataclass(frozen=True)
+class ReadPlan:
+    """Blocks to read and what reading them costs, in units of one request."""
+
+    blocks: tuple[RegisterBlock, ...]
+    unused: int
+    cost: float
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+
+class ReadPlanner:
+    """
+    Computes the cheapest set of block reads covering the requested registers.
+
+    A block costs one request plus `gap_cost` for every register read in between that nobody asked for, and spans
+    at most `max_block_size` registers. Registers are sorted and split into consecutive runs with dynamic
+    programming, which is exact since an optimal block always covers a consecutive run of the sorted registers.
+    """
+
+    def __init__(self, gap_cost: float = DEFAULT_GAP_COST, max_block_size: int = MAX_BLOCK_SIZE):
+        if not 0 < max_block_size <= MAX_BLOCK_SIZE:
+            raise ValueError(f"Block size must be between 1 and {MAX_BLOCK_SIZE}")
+        if gap_cost < 0:
+            raise ValueError("Gap cost must not be negative")
+
+        self.gap_cost = gap_cost
+        self.max_block_size = max_block_size
+
+    def plan(self, addresses: Iterable[RegisterAddress | int]) -> ReadPlan:
+        wanted = sorted({address.to_int() if isinstance(address, RegisterAddress) else address for address in addresses})
+        if not wanted:
+            return ReadPlan((), 0, 0.0)
+
+        # best[i] is the (cost, requests) of reading wanted[:i], start[i] where the last block of that plan starts.
+        # Comparing tuples prefers fewer requests between plans of equal cost.
+        best = [(0.0, 0)] + [(float("inf"), 0)] * len(wanted)
+        start = [0] * (len(wanted) + 1)
+        for end in range(1, len(wanted) + 1):
+            last = wanted[end - 1]
+            for first in range(end - 1, -1, -1):
+                span = last - wanted[first] + 1
+                if span > self.max_block_size:
+                    break
+
+                cost, requests = best[first]
+                candidate = (cost + 1 + self.gap_cost * (span - (end - first)), requests + 1)
+                if candidate < best[end]:
+                    best[end] = candidate
+                    start[end] = first
+
+        blocks = []
+        end = len(wanted)
+        while end:
+            first = start[end]
+            blocks.append(RegisterBlock(wanted[first], wanted[end - 1] - wanted[first] + 1))
+            end = first
+
+        blocks.reverse()
+        unused = sum(block.count for block in blocks) - len(wanted)
+        return ReadPlan(tuple(blocks), unused, best[-1][0])
+
+
+def plan_reads(
+    addresses: Iterable[RegisterAddress | int],
+    gap_cost: float = DEFAULT_GAP_COST,
+    max_block_size: int = MAX_BLOCK_SIZE,
+) -> ReadPlan:
+    return ReadPlanner(gap_cost, max_block_size).plan(addresses)
@@ -0,0 +1,152 @@
+"""Keeps recently read register values so slow-changing settings are not read from the bus for every query."""
+
+import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+
+from .kronoterm_models import HEATING_LOOPS, RegisterAddress
+from .register_snapshot import RegisterSnapshot
+
+# Measurements and statuses
+DEFAULT_MAX_AGE = 2.0
+# Settings that only change when somebody changes them, on the heat pump panel or through MqttClient.write
+CONFIGURATION_MAX_AGE = 600.0
+
+_CONFIGURATION_NAMES = (
+    "PROGRAM_MODE",
+    "PROGRAM_SELECT",
+    "MODE_SELECT",
+    "CURVE_POINT",
+    "ADAPTIVE_CURVE_ENABLE",
+    "ECO_OFFSET",
+    "COMFORT_OFFSET",
+    "TEMP_CORRECTION",
+    "THERMAL_DISINF",
+    "PRESSURE_SETPOINT",
+    "SCOP",
+)
+
+CONFIGURATION_REGISTERS = frozenset(
+    address for address in RegisterAddress if any(name in address.name for name in _CONFIGURATION_NAMES)
+)
+
+DEFAULT_MAX_AGES: dict[RegisterAddress, float] = {address: CONFIGURATION_MAX_AGE for address in CONFIGURATION_REGISTERS}
+
+# Registers whose value follows from a written register, invalidated together with it
+DEPENDENT_REGISTERS: dict[RegisterAddress, tuple[RegisterAddress, ...]] = {
+    RegisterAddress.SYSTEM_ON: (RegisterAddress.SYSTEM_STATUS, RegisterAddress.OPERATING_MODE),
+    RegisterAddress.PROGRAM_SELECT: (RegisterAddress.PROGRAM_MODE,),
+    RegisterAddress.DHW_QUICK_HEAT_ENABLE: (RegisterAddress.DHW_QUICK_HEAT,),
+    RegisterAddress.DHW_TARGET_TEMP: (RegisterAddress.DHW_CURRENT_TARGET_TEMP,),
+    RegisterAddress.DHW_MODE_SELECT: (RegisterAddress.DHW_SCHEDULE_STATUS, RegisterAddress.DHW_CURRENT_TARGET_TEMP),
+}
+for _loop in HEATING_LOOPS.values():
+    DEPENDENT_REGISTERS[_loop.target_room_temp] = (_loop.current_target_room_temp,)
+    DEPENDENT_REGISTERS[_loop.mode_select] = (_loop.schedule_status, _loop.current_target_room_temp)
+
+
+@dataclass(frozen=True)
+class RegisterCacheStats:
+    """Counters of a RegisterCache. Expired entries count as misses."""
+
+    hits: int
+    misses: int
+    expired: int
+    invalidations: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class RegisterCache:
+    """
+    Register values with a freshness limit per register. Values older than their limit are misses, so the caller
+    reads them from the bus again. Limits default to DEFAULT_MAX_AGES and `default_max_age` for the rest.
+    """
+
+    def __init__(
+        self,
+        max_ages: Mapping[RegisterAddress, float] | None = None,
+        default_max_age: float = DEFAULT_MAX_AGE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_ages = dict(DEFAULT_MAX_AGES if max_ages is None else max_ages)
+        self.default_max_age = default_max_age
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+        self._entries: dict[RegisterAddress, tuple[int, float]] = {}
+
+    def max_age(self, address: RegisterAddress) -> float:
+        return self.max_ages.get(address, self.default_max_age)
+
+    def get(self, address: RegisterAddress) -> int | None:
+        """The cached value, or None if there is none fresh enough."""
+        entry = self._entries.get(address)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, read_at = entry
+        if self.clock() - read_at > self.max_age(address):
+            del self._entries[address]
+            self.misses += 1
+            self.expired += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def get_many(self, addresses: Iterable[RegisterAddress]) -> tuple[dict[RegisterAddress, int], list[RegisterAddress]]:
+        """Splits the addresses into cached values and the addresses that have to be read."""
+        values = {}
+        missing = []
+        for address in dict.fromkeys(addresses):
+            value = self.get(address)
+            if value is None:
+                missing.append(address)
+            else:
+                values[address] = value
+
+        return values, missing
+
+    def put(self, address: RegisterAddress, value: int, read_at: float | None = None):
+        self._entries[address] = (value, self.clock() if read_at is None else read_at)
+
+    def put_snapshot(self, snapshot: RegisterSnapshot):
+        """Caches every value of the snapshot. Snapshots are taken with time.monotonic, so a custom clock ignores
+        their timestamp."""
+        read_at = snapshot.taken_at if self.clock is time.monotonic else None
+        for address, value in snapshot.values.items():
+            self.put(address, value, read_at)
+
+    def invalidate(self, address: RegisterAddress):
+        """Drops the register and the registers that depend on it, called when the register is written."""
+        for dropped in (address, *DEPENDENT_REGISTERS.get(address, ())):
+            if self._entries.pop(dropped, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drops all entries and resets the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> RegisterCacheStats:
+        return RegisterCacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            expired=self.expired,
+            invalidations=self.invalidations,
+            size=len(self._entries),
+        )
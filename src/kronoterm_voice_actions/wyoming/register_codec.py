@@ -0,0 +1,123 @@
+"""Declares how each register is encoded: scale, signedness, unit, enum labels and sentinel values."""
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from .kronoterm_models import HEATING_LOOPS, RegisterAddress
+
+# Sentinel meaning a setpoint is switched off, the heat pump reports 500.0 °C
+OFF = "off"
+
+
+def to_signed(raw: int) -> int:
+    """Decodes a 16-bit two's complement register value."""
+    return raw - (raw >> 15 << 16)
+
+
+@dataclass(frozen=True)
+class RegisterSpec:
+    """
+    Encoding of one register. Values are stored as 16-bit words and decoded to integers according to `signed`,
+    the physical value is the integer divided by `divisor`. Labels name enum values, sentinels name special integers.
+    """
+
+    divisor: int = 1
+    signed: bool = True
+    unit: str | None = None
+    labels: Mapping[int, str] = field(default_factory=dict)
+    sentinels: Mapping[int, str] = field(default_factory=dict)
+
+    def from_word(self, word: int) -> int:
+        return to_signed(word) if self.signed else word
+
+    def to_word(self, value: float) -> int:
+        """Encodes a physical value into the 16-bit word to write."""
+        return round(value * self.divisor) & 0xFFFF
+
+    def scaled(self, raw: int) -> float | int:
+        return raw / self.divisor if self.divisor != 1 else raw
+
+    def label(self, raw: int) -> str | None:
+        return self.labels.get(raw)
+
+    def sentinel(self, raw: int) -> str | None:
+        return self.sentinels.get(raw)
+
+
+TEMPERATURE = RegisterSpec(divisor=10, unit="°C")
+SETPOINT = RegisterSpec(divisor=10, unit="°C", sentinels={5000: OFF})
+SWITCH = RegisterSpec(labels={0: "izklopljeno", 1: "vklopljeno"})
+BITMASK = RegisterSpec(signed=False)
+
+SCHEDULE_STATUS = RegisterSpec(labels={0: "Izklopljeno", 1: "Normalno", 2: "ECO", 3: "COM"})
+MODE_SELECT = RegisterSpec(labels={0: "izklopljen", 1: "normalni režim", 2: "delovanje po urniku"})
+
+_SPECS: dict[RegisterAddress, RegisterSpec] = {
+    RegisterAddress.OPERATING_MODE: RegisterSpec(labels={
+        0: "Ogrevanje",
+        1: "Sanitarna voda",
+        2: "Hlajenje",
+        3: "Ogrevanje bazena",
+        4: "Pregrevanje sanitarne vode",
+        5: "Mirovanje",
+        7: "Daljinski izklop",
+    }),
+    RegisterAddress.OPERATING_REGIME: RegisterSpec(labels={
+        0: "Hlajenje",
+        1: "Ogrevanje",
+        2: "Ogrevanje in hlajenje izklopljeno",
+    }),
+    RegisterAddress.PROGRAM_MODE: RegisterSpec(labels={
+        0: "Normalno delovanje",
+        1: "Generalno delovanje v ECO režimu",
+        2: "Generalno delovanje v COM režimu",
+        3: "Program sušenja estrihov",
+    }),
+    RegisterAddress.PROGRAM_SELECT: RegisterSpec(labels={0: "normalni", 1: "ECO", 2: "COM"}),
+    RegisterAddress.DHW_MODE_SELECT: RegisterSpec(labels={0: "izklopljeno", 1: "normalni režim", 2: "delovanje po urniku"}),
+    RegisterAddress.DHW_SCHEDULE_STATUS: SCHEDULE_STATUS,
+    RegisterAddress.DHW_CURRENT_TARGET_TEMP: SETPOINT,
+    RegisterAddress.THERMAL_DISINF_PERIOD: RegisterSpec(unit="d"),
+    RegisterAddress.THERMAL_DISINF_START_MIN: RegisterSpec(unit="min"),
+    RegisterAddress.HEAT_SYSTEM_PRESSURE: RegisterSpec(divisor=10, unit="bar"),
+    RegisterAddress.HEAT_SYSTEM_PRESSURE_SETPOINT: RegisterSpec(divisor=10, unit="bar"),
+    RegisterAddress.CURRENT_HP_LOAD: RegisterSpec(unit="%"),
+    RegisterAddress.CURRENT_ELECTRIC_POWER: RegisterSpec(unit="W"),
+    RegisterAddress.CURRENT_POWER_CONSUMPTION: RegisterSpec(unit="W"),
+    RegisterAddress.COP: RegisterSpec(divisor=100),
+    RegisterAddress.SCOP: RegisterSpec(divisor=100),
+    RegisterAddress.PUMPED_WATER_VOLUME_HIGH: RegisterSpec(signed=False, unit="m³"),
+    RegisterAddress.PUMPED_WATER_VOLUME_LOW: RegisterSpec(signed=False, unit="m³"),
+    RegisterAddress.ENERGY_ELECTRIC_HIGH: RegisterSpec(signed=False, unit="kWh"),
+    RegisterAddress.ENERGY_ELECTRIC_LOW: RegisterSpec(signed=False, unit="kWh"),
+    RegisterAddress.ENERGY_HEAT_HIGH: RegisterSpec(signed=False, unit="kWh"),
+    RegisterAddress.ENERGY_HEAT_LOW: RegisterSpec(signed=False, unit="kWh"),
+}
+
+# The current target room temperature of a heating loop reports the off sentinel when the loop is switched off
+for _loop in HEATING_LOOPS.values():
+    _SPECS[_loop.mode_select] = MODE_SELECT
+    _SPECS[_loop.schedule_status] = SCHEDULE_STATUS
+    _SPECS[_loop.current_target_room_temp] = SETPOINT
+
+_TEMPERATURE_NAMES = ("TEMP", "CURVE_POINT", "THERMOSTAT_SETPOINT", "ECO_OFFSET", "COMFORT_OFFSET")
+_BITMASK_NAMES = ("COMPRESSOR_STATUS", "CASCADE_STATUS", "FAULT_", "ALARM", "WARNING")
+_SWITCH_NAMES = ("_ENABLE", "SYSTEM_ON", "SYSTEM_STATUS", "RESERVE_SOURCE", "ALTERNATIVE_SOURCE", "DHW_QUICK_HEAT",
+                 "DEFROST_MODE", "SCREED_DRYING_MODE", "THERMAL_DISINF_MODE", "HEAT_SYSTEM_FILLING")
+
+
+def _default_spec(address: RegisterAddress) -> RegisterSpec:
+    name = address.name
+    if any(part in name for part in _BITMASK_NAMES):
+        return BITMASK
+    if any(part in name for part in _TEMPERATURE_NAMES):
+        return TEMPERATURE
+    if any(part in name for part in _SWITCH_NAMES):
+        return SWITCH
+    return RegisterSpec()
+
+
+REGISTER_SPECS: Mapping[RegisterAddress, RegisterSpec] = MappingProxyType(
+    {address: _SPECS.get(address) or _default_spec(address) for address in RegisterAddress}
+)
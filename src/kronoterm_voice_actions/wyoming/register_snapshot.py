@@ -0,0 +1,111 @@
+"""Reads the whole register map in a few multi-register requests and decodes it into a snapshot."""
+
+import time
+from array import array
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import NamedTuple, Protocol
+
+from .kronoterm_models import RegisterAddress
+from .register_codec import REGISTER_SPECS
+
+# A Modbus read holding registers request returns at most 125 registers
+MAX_BLOCK_SIZE = 125
+
+
+class RegisterBlock(NamedTuple):
+    """Contiguous range of registers read in one request, `start` is the register address as in RegisterAddress."""
+
+    start: int
+    count: int
+
+    @property
+    def end(self) -> int:
+        return self.start + self.count - 1
+
+    def __contains__(self, address: int) -> bool:
+        return self.start <= address <= self.end
+
+
+# Clusters of the Kronoterm register map, every RegisterAddress falls in one of them
+REGISTER_BLOCKS = (
+    RegisterBlock(2000, 28),
+    RegisterBlock(2042, 38),
+    RegisterBlock(2101, 30),
+    RegisterBlock(2160, 38),
+    RegisterBlock(2301, 72),
+)
+
+
+@dataclass(frozen=True)
+class RegisterSnapshot:
+    """Signed register values read at `taken_at` (time.monotonic)."""
+
+    values: Mapping[RegisterAddress, int]
+    taken_at: float = field(default_factory=time.monotonic)
+
+    def __getitem__(self, address: RegisterAddress) -> int:
+        return self.values[address]
+
+    def __contains__(self, address: RegisterAddress) -> bool:
+        return address in self.values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def scaled(self, address: RegisterAddress) -> float | int:
+        """The physical value of the register, in the unit of its RegisterSpec."""
+        return REGISTER_SPECS[address].scaled(self.values[address])
+
+    def temperature(self, address: RegisterAddress) -> float:
+        return float(self.scaled(address))
+
+    def label(self, address: RegisterAddress) -> str | None:
+        return REGISTER_SPECS[address].label(self.values[address])
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.taken_at
+
+
+class SnapshotSource(Protocol):
+    """Keeps a recent snapshot in memory, such as the polling coordinator."""
+
+    def value(self, address: RegisterAddress) -> int | None:
+        """The register value, or None if it is not known or too old."""
+
+    def invalidate(self, address: RegisterAddress) -> None:
+        """Forgets the register after it was written."""
+
+
+@lru_cache(maxsize=64)
+def _block_layout(block: RegisterBlock) -> tuple[tuple[RegisterAddress, int, bool], ...]:
+    """Known registers of the block with their offset and signedness."""
+    return tuple(
+        (address, address.to_int() - block.start, REGISTER_SPECS[address].signed)
+        for address in RegisterAddress
+        if address.to_int() in block
+    )
+
+
+def decode_block(block: RegisterBlock, registers: list[int]) -> dict[RegisterAddress, int]:
+    """
+    Decodes every known register in the block. The response is converted to unsigned and signed 16-bit arrays in one
+    pass each, and every register takes its value from the array matching its RegisterSpec.
+    """
+    if len(registers) < block.count:
+        raise ValueError(f"Block at {block.start} returned {len(registers)} of {block.count} registers")
+
+    unsigned = array("H", registers[:block.count])
+    signed = array("h", unsigned.tobytes())
+    return {
+        address: signed[offset] if is_signed else unsigned[offset]
+        for address, offset, is_signed in _block_layout(block)
+    }
+
+
+def blocks_for(addresses: Iterable[RegisterAddress], blocks: Iterable[RegisterBlock] = REGISTER_BLOCKS) -> list[RegisterBlock]:
+    """The blocks needed to read the given registers."""
+    wanted = {address.to_int() for address in addresses}
+    return [block for block in blocks if any(address in block for address in wanted)]
@@ -0,0 +1,88 @@
+"""Similarity scoring backends used by the matcher."""
+
+import difflib
+from collections.abc import Sequence
+from difflib import SequenceMatcher
+from typing import TYPE_CHECKING
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # rapidfuzz is optional, difflib is always available
+    fuzz = None
+    process = None
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class DifflibScorer:
+    """Pure Python scorer built on difflib.SequenceMatcher."""
+
+    name = "difflib"
+    benefits_from_shortlist = True
+
+    def similarity(self, a: str, b: str, cutoff: float = 0.0) -> float:
+        """
+        Similarity of the two strings in range [0, 1]. Similarities below `cutoff` may be reported as 0, which lets
+        the cheap upper bounds of SequenceMatcher skip the full comparison.
+        """
+        matcher = SequenceMatcher(None, a, b)
+        if cutoff and (matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff):
+            return 0.0
+        return matcher.ratio()
+
+    def extract_one(self, query: str, choices: Sequence[str], cutoff: float) -> tuple[str, float] | None:
+        """Returns the choice most similar to the query and its score, or None if no choice reaches the cutoff."""
+        match = difflib.get_close_matches(query, choices, n=1, cutoff=cutoff)
+        if not match:
+            return None
+
+        return match[0], SequenceMatcher(None, match[0], query).ratio()
+
+
+class RapidfuzzScorer:
+    """C-accelerated scorer built on rapidfuzz."""
+
+    name = "rapidfuzz"
+    benefits_from_shortlist = False
+
+    def similarity(self, a: str, b: str, cutoff: float = 0.0) -> float:
+        """Similarity of the two strings in range [0, 1]. `cutoff` is accepted for symmetry with DifflibScorer."""
+        return fuzz.ratio(a, b) / 100.0
+
+    def extract_one(self, query: str, choices: Sequence[str], cutoff: float) -> tuple[str, float] | None:
+        """Returns the choice most similar to the query and its score, or None if no choice reaches the cutoff."""
+        match = process.extractOne(query, choices, scorer=fuzz.ratio, score_cutoff=cutoff * 100.0)
+        if match is None:
+            return None
+
+        return match[0], match[1] / 100.0
+
+    def score_matrix(self, queries: Sequence[str], choices: Sequence[str]) -> "np.ndarray":
+        """Similarity of every query (rows) to every choice (columns), in range [0, 1], scored on all cores."""
+        import numpy as np
+
+        return process.cdist(queries, choices, scorer=fuzz.ratio, dtype=np.float64, workers=-1) / 100.0
+
+
+DIFFLIB = DifflibScorer()
+RAPIDFUZZ = RapidfuzzScorer() if fuzz is not None else None
+
+
+def get_scorer(name: str | None = None) -> DifflibScorer | RapidfuzzScorer:
+    """
+    Returns the scorer with the given name.
+    Without a name rapidfuzz is returned when it is installed, difflib otherwise.
+    """
+    if name is None:
+        return RAPIDFUZZ or DIFFLIB
+
+    if name == DIFFLIB.name:
+        return DIFFLIB
+
+    if name == RapidfuzzScorer.name:
+        if RAPIDFUZZ is None:
+            raise ValueError("Scorer 'rapidfuzz' requested, but rapidfuzz is not installed")
+        return RAPIDFUZZ
+
+    raise ValueError(f"Unknown scorer '{name}'")
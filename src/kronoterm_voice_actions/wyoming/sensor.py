@@ -0,0 +1,143 @@
+"""Sensors of the Modbus bus to the Kronoterm heat pump."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+
+from .bus_metrics import BusMetrics, Outcome
+from .const import DOMAIN
+from .coordinator import KronotermCoordinator
+from .entity import KronotermEntity
+
+if TYPE_CHECKING:
+    from .models import DomainDataItem
+
+
+@dataclass(frozen=True, kw_only=True)
+class KronotermBusSensorEntityDescription(SensorEntityDescription):
+    """Sensor reading one figure of the connection's BusMetrics."""
+
+    value_fn: Callable[[BusMetrics], float | int]
+    entity_category: EntityCategory | None = EntityCategory.DIAGNOSTIC
+    entity_registry_enabled_default: bool = False
+
+
+BUS_SENSORS: tuple[KronotermBusSensorEntityDescription, ...] = (
+    KronotermBusSensorEntityDescription(
+        key="bus_utilization",
+        translation_key="bus_utilization",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        value_fn=lambda metrics: metrics.utilization * 100,
+    ),
+    KronotermBusSensorEntityDescription(
+        key="bus_latency_mean",
+        translation_key="bus_latency_mean",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        value_fn=lambda metrics: metrics.latency.mean,
+    ),
+    KronotermBusSensorEntityDescription(
+        key="bus_latency_p95",
+        translation_key="bus_latency_p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda metrics: metrics.latency.quantile(0.95),
+    ),
+    KronotermBusSensorEntityDescription(
+        key="bus_timeouts",
+        translation_key="bus_timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.outcomes[Outcome.TIMEOUT],
+    ),
+    KronotermBusSensorEntityDescription(
+        key="bus_crc_errors",
+        translation_key="bus_crc_errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.outcomes[Outcome.CRC],
+    ),
+    KronotermBusSensorEntityDescription(
+        key="bus_exception_responses",
+        translation_key="bus_exception_responses",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.outcomes[Outcome.EXCEPTION],
+    ),
+    KronotermBusSensorEntityDescription(
+        key="bus_retries",
+        translation_key="bus_retries",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.retries,
+    ),
+    KronotermBusSensorEntityDescription(
+        key="bus_bytes",
+        translation_key="bus_bytes",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.bytes_sent + metrics.bytes_received,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> None:
+    """Set up the bus sensors of the custom conversation agent."""
+    item: DomainDataItem = hass.data[DOMAIN][config_entry.entry_id]
+
+    # Setup is only forwarded for the custom agent
+    assert item.coordinator is not None
+
+    async_add_entities(
+        KronotermBusSensor(item.coordinator, config_entry, description) for description in BUS_SENSORS
+    )
+
+
+class KronotermBusSensor(KronotermEntity, SensorEntity):
+    """Figure of the Modbus transport, updated with every poll."""
+
+    entity_description: KronotermBusSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: KronotermCoordinator,
+        config_entry: ConfigEntry,
+        description: KronotermBusSensorEntityDescription,
+    ) -> None:
+        """Initialize entity."""
+        self.entity_description = description
+        super().__init__(coordinator, config_entry)
+
+    @property
+    def available(self) -> bool:
+        """The bus figures are known even when the last poll failed."""
+        return True
+
+    @property
+    def native_value(self) -> float | int:
+        return self.entity_description.value_fn(self.coordinator.client.connection.metrics)
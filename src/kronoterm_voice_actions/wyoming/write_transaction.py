@@ -0,0 +1,133 @@
+"""Writes several registers as one transaction: grouped into as few requests as possible, then verified."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, NamedTuple, Self
+
+from .const import MODBUS_SLAVE_ID
+from .kronoterm_models import RegisterAddress
+from .modbus_connection import ModbusConnectionError
+from .read_plan import ReadPlanner
+from .register_codec import REGISTER_SPECS
+from .register_snapshot import RegisterSnapshot
+
+if TYPE_CHECKING:
+    from .mqtt_client import MqttClient
+
+log = logging.getLogger(__name__)
+
+# Write Multiple Registers carries at most 123 registers per request
+MAX_WRITE_BLOCK_SIZE = 123
+
+# Verification reads as few blocks as possible, reading registers in between costs nothing
+_VERIFY_PLANNER = ReadPlanner(gap_cost=0.0)
+
+
+class WriteRun(NamedTuple):
+    """Words written to consecutive registers starting at register `start`."""
+
+    start: int
+    words: tuple[int, ...]
+
+
+def group_writes(writes: Mapping[RegisterAddress, int], max_run: int = MAX_WRITE_BLOCK_SIZE) -> list[WriteRun]:
+    """Splits the writes into runs of consecutive registers."""
+    runs: list[WriteRun] = []
+    for address, word in sorted((address.to_int(), word) for address, word in writes.items()):
+        if runs and address == runs[-1].start + len(runs[-1].words) and len(runs[-1].words) < max_run:
+            runs[-1] = WriteRun(runs[-1].start, runs[-1].words + (word,))
+        else:
+            runs.append(WriteRun(address, (word,)))
+    return runs
+
+
+@dataclass(frozen=True)
+class WriteResult:
+    """Values a transaction wrote and the registers read back after it."""
+
+    written: dict[RegisterAddress, int]
+    verified: RegisterSnapshot
+
+    @property
+    def rejected(self) -> dict[RegisterAddress, int]:
+        """Registers the heat pump did not take as written, with the value it holds instead."""
+        return {
+            address: self.verified[address]
+            for address, value in self.written.items()
+            if self.verified[address] != value
+        }
+
+    @property
+    def ok(self) -> bool:
+        return not self.rejected
+
+
+class WriteTransaction:
+    """
+    Collects register writes and sends them together on commit, or when the `async with` block ends.
+
+    Consecutive registers are written with one Write Multiple Registers request each. The remaining requests are
+    queued at once, so they follow each other on the bus at voice write priority without polls in between. Every
+    written register is then read back with a single block read where the span allows, and the result tells which
+    writes the heat pump rejected or clamped.
+    """
+
+    def __init__(self, client: MqttClient):
+        self.client = client
+        self.result: WriteResult | None = None
+        self._writes: dict[RegisterAddress, int] = {}
+
+    def write(self, addr: RegisterAddress, raw: int) -> WriteTransaction:
+        """Adds a raw 16-bit word to write. A later write to the same register replaces it."""
+        self._writes[addr] = raw & 0xFFFF
+        return self
+
+    def set_temperature(self, addr: RegisterAddress, temperature: float) -> WriteTransaction:
+        return self.write(addr, REGISTER_SPECS[addr].to_word(temperature))
+
+    async def commit(self) -> WriteResult:
+        if self.result is not None:
+            raise RuntimeError("The transaction was already committed")
+
+        runs = group_writes(self._writes)
+        try:
+            outcomes = await asyncio.gather(*(self._send(run) for run in runs), return_exceptions=True)
+        finally:
+            # Also after failed writes, the registers may have changed anyway
+            for addr in self._writes:
+                self.client.invalidate(addr)
+
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+
+        verified = await self.client.read_snapshot(_VERIFY_PLANNER.plan(self._writes))
+        self.result = WriteResult(
+            written={addr: REGISTER_SPECS[addr].from_word(word) for addr, word in self._writes.items()},
+            verified=verified,
+        )
+        log.debug(f"Wrote {len(self._writes)} registers in {len(runs)} requests, rejected: {self.result.rejected}")
+        return self.result
+
+    async def _send(self, run: WriteRun) -> Any:
+        connection = self.client.connection
+        if len(run.words) == 1:
+            written = await connection.write_register(run.start - 1, run.words[0], slave=MODBUS_SLAVE_ID, coalesce=False)
+            response = written.response
+        else:
+            response = await connection.write_registers(run.start - 1, list(run.words), slave=MODBUS_SLAVE_ID)
+
+        if response is not None and response.isError():
+            raise ModbusConnectionError(f"Writing registers {run.start}-{run.start + len(run.words) - 1} failed: {response}")
+        return response
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            await self.commit()